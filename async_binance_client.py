@@ -0,0 +1,312 @@
+import asyncio
+import hmac
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+import aiohttp
+from config import API_KEY, SECRET_KEY, REST_BASE_URL, ASYNC_HTTP_POOL_SIZE
+from logger_setup import get_logger
+from metrics import metrics
+from clock_sync import shared_server_clock, is_timestamp_error
+from rate_limiter import (
+    shared_rate_limiter, request_weight, request_priority, is_new_order, RATE_LIMIT_STATUSES
+)
+
+logger = get_logger('async_binance_client')
+
+
+class AsyncBinanceClient:
+    def __init__(self, pool_size=ASYNC_HTTP_POOL_SIZE, timeout=10, rate_limiter=None, server_clock=None):
+        """Asyncio counterpart of BinanceClient sharing one keep-alive connection pool.
+
+        Methods mirror BinanceClient but are coroutines, so many requests can
+        be in flight at once. Synchronous code can submit coroutines with
+        run_sync() once start() has launched the client's event loop thread.
+
+        Args:
+            pool_size: Maximum number of concurrent connections
+            timeout: Total timeout per request in seconds
+            rate_limiter: RateLimiter to share; defaults to the process-wide one
+            server_clock: ServerClock stamping signed requests; defaults to the process-wide one
+        """
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.server_clock = server_clock or shared_server_clock
+        self.api_key = API_KEY
+        self.api_secret = SECRET_KEY
+        self.base_url = REST_BASE_URL
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+        self.loop = None
+        self.loop_thread = None
+
+    def _generate_signature(self, params):
+        """Generate HMAC SHA256 signature for request authentication."""
+        query_string = urlencode(params)
+        signature = hmac.new(
+            self.api_secret.encode('utf-8'),
+            query_string.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+        return signature
+
+    def _sign(self, params):
+        """Stamp params with the server time estimate and recvWindow, then sign them."""
+        params.pop('signature', None)
+        params['timestamp'] = self.server_clock.timestamp()
+        params['recvWindow'] = self.server_clock.recv_window
+        params['signature'] = self._generate_signature(params)
+
+    async def _get_session(self):
+        """Create the pooled HTTP session on first use (inside the running loop)."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={'X-MBX-APIKEY': self.api_key}
+            )
+        return self.session
+
+    async def _make_request(self, method, endpoint, params=None, signed=False, retry_count=3):
+        """Make an HTTP request to the Binance API with retry logic."""
+        if params is None:
+            params = {}
+
+        url = f"{self.base_url}{endpoint}"
+        session = await self._get_session()
+        weight = request_weight(method, endpoint, params)
+        priority = request_priority(endpoint)
+        orders = 1 if is_new_order(method, endpoint) else 0
+
+        for attempt in range(retry_count):
+            await self.rate_limiter.acquire_async(weight, priority, orders)
+            if attempt:
+                metrics.inc('rest_retries_total', endpoint=endpoint)
+            if signed:
+                self._sign(params)
+            started = time.perf_counter()
+            try:
+                async with session.request(method, url, params=params) as response:
+                    metrics.observe('rest_request_seconds', time.perf_counter() - started,
+                                    method=method, endpoint=endpoint)
+                    metrics.inc('rest_requests_total', endpoint=endpoint, status=response.status)
+                    self.rate_limiter.update_from_headers(response.headers)
+                    if signed and response.status == 400 and attempt < retry_count - 1 \
+                            and is_timestamp_error(await self._error_body(response)):
+                        # Clock drift: resync and resend at once with a fresh timestamp
+                        metrics.inc('rest_errors_total', endpoint=endpoint, status=response.status)
+                        logger.warning("Request timestamp rejected, resyncing server time")
+                        await asyncio.get_running_loop().run_in_executor(None, self.server_clock.sync, 'rejected')
+                        continue
+                    response.raise_for_status()
+                    return await response.json()
+            except aiohttp.ClientResponseError as e:
+                metrics.inc('rest_errors_total', endpoint=endpoint, status=e.status)
+                if e.status in RATE_LIMIT_STATUSES:
+                    # The limiter now holds every request until Retry-After
+                    retry_after = e.headers.get('Retry-After') if e.headers else None
+                    self.rate_limiter.on_rate_limited(e.status, retry_after)
+                    if e.status == 418 or attempt == retry_count - 1:
+                        logger.error("Request rejected by rate limit (%s): %s", e.status, e)
+                        raise
+                    continue
+                if attempt == retry_count - 1:
+                    logger.error("Request failed after %s attempts: %s", retry_count, e)
+                    raise
+                wait_time = 2 ** attempt
+                logger.warning("Request failed, retrying in %s seconds...", wait_time)
+                await asyncio.sleep(wait_time)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.inc('rest_errors_total', endpoint=endpoint, status='network')
+                if attempt == retry_count - 1:
+                    logger.error("Request failed after %s attempts: %s", retry_count, e)
+                    raise
+                wait_time = 2 ** attempt
+                logger.warning("Request failed, retrying in %s seconds...", wait_time)
+                await asyncio.sleep(wait_time)
+
+    @staticmethod
+    async def _error_body(response):
+        try:
+            return await response.json(content_type=None)
+        except ValueError:
+            return None
+
+    async def get_listen_key(self):
+        """Create a listen key for user data stream."""
+        try:
+            response = await self._make_request('POST', '/v3/userDataStream')
+            listen_key = response.get('listenKey')
+            if not listen_key:
+                raise ValueError("No listen key in response")
+            logger.info("Successfully obtained listen key")
+            return listen_key
+        except Exception as e:
+            logger.error("Failed to get listen key: %s", e)
+            raise
+
+    async def keep_alive_listen_key(self, listen_key):
+        """Keep the user data stream alive."""
+        try:
+            await self._make_request('PUT', '/v3/userDataStream', {'listenKey': listen_key})
+            logger.debug("Successfully renewed listen key")
+            return True
+        except Exception as e:
+            logger.error("Failed to keep listen key alive: %s", e)
+            return False
+
+    async def get_account_info(self):
+        """Get account information."""
+        try:
+            return await self._make_request('GET', '/v3/account', signed=True)
+        except Exception as e:
+            logger.error("Failed to get account info: %s", e)
+            raise
+
+    async def create_order(self, symbol, side, order_type, quantity=None, price=None, time_in_force=None,
+                           client_order_id=None):
+        """Create a new order."""
+        try:
+            params = {
+                'symbol': symbol,
+                'side': side,
+                'type': order_type,
+            }
+
+            if quantity:
+                params['quantity'] = quantity
+            if price and order_type != 'MARKET':
+                params['price'] = price
+            if time_in_force:
+                params['timeInForce'] = time_in_force
+            if client_order_id:
+                params['newClientOrderId'] = client_order_id
+
+            response = await self._make_request('POST', '/v3/order', params, signed=True)
+            logger.info("Successfully created %s %s order for %s", order_type, side, symbol)
+            return response
+        except Exception as e:
+            logger.error("Failed to create order: %s", e)
+            raise
+
+    async def get_order_status(self, symbol, order_id):
+        """Get status of an order."""
+        try:
+            params = {'symbol': symbol, 'orderId': order_id}
+            return await self._make_request('GET', '/v3/order', params, signed=True)
+        except Exception as e:
+            logger.error("Failed to get order status: %s", e)
+            raise
+
+    async def cancel_order(self, symbol, order_id):
+        """Cancel an existing order."""
+        try:
+            params = {'symbol': symbol, 'orderId': order_id}
+            response = await self._make_request('DELETE', '/v3/order', params, signed=True)
+            logger.info("Successfully cancelled order %s for %s", order_id, symbol)
+            return response
+        except Exception as e:
+            logger.error("Failed to cancel order: %s", e)
+            raise
+
+    async def get_open_orders(self, symbol=None):
+        """Get open orders of one symbol, or of all symbols in a single request."""
+        try:
+            params = {'symbol': symbol} if symbol else {}
+            return await self._make_request('GET', '/v3/openOrders', params, signed=True)
+        except Exception as e:
+            logger.error("Failed to get open orders: %s", e)
+            raise
+
+    async def get_symbol_price(self, symbol):
+        """Get current price for a symbol."""
+        try:
+            response = await self._make_request('GET', '/v3/ticker/price', {'symbol': symbol})
+            return float(response['price'])
+        except Exception as e:
+            logger.error("Failed to get price for %s: %s", symbol, e)
+            raise
+
+    async def get_order_book(self, symbol, limit=100):
+        """Get an order book snapshot (bids and asks with lastUpdateId)."""
+        try:
+            params = {'symbol': symbol, 'limit': limit}
+            return await self._make_request('GET', '/v3/depth', params)
+        except Exception as e:
+            logger.error("Failed to get order book for %s: %s", symbol, e)
+            raise
+
+    async def get_exchange_info(self):
+        """Get exchange trading rules and symbol information."""
+        try:
+            return await self._make_request('GET', '/v3/exchangeInfo')
+        except Exception as e:
+            logger.error("Failed to get exchange info: %s", e)
+            raise
+
+    async def get_klines(self, symbol, interval, limit=500, start_time=None):
+        """Get kline/candlestick data, optionally starting at an open time (ms)."""
+        try:
+            params = {
+                'symbol': symbol,
+                'interval': interval,
+                'limit': limit
+            }
+            if start_time is not None:
+                params['startTime'] = int(start_time)
+            return await self._make_request('GET', '/v3/klines', params)
+        except Exception as e:
+            logger.error("Failed to get klines for %s: %s", symbol, e)
+            raise
+
+    async def get_klines_many(self, symbols, interval, limit=500):
+        """Fetch klines for many symbols concurrently.
+
+        Returns:
+            {symbol: klines or the exception raised for that symbol}
+        """
+        results = await asyncio.gather(
+            *(self.get_klines(symbol, interval, limit) for symbol in symbols),
+            return_exceptions=True
+        )
+        return dict(zip(symbols, results))
+
+    async def close(self):
+        """Close the pooled HTTP session."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    def start(self):
+        """Run the client's event loop in a background thread."""
+        if self.loop_thread and self.loop_thread.is_alive():
+            return
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever)
+        self.loop_thread.daemon = True
+        self.loop_thread.start()
+        logger.info("Async client event loop started")
+
+    def run_sync(self, coro, timeout=None):
+        """Run a coroutine on the client's loop and wait for its result."""
+        if not self.loop:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        """Close the session and stop the event loop thread."""
+        if not self.loop:
+            return
+        try:
+            self.run_sync(self.close(), timeout=5)
+        except Exception as e:
+            logger.error("Error closing async client session: %s", e)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(timeout=1)
+        self.loop = None
+        logger.info("Async client event loop stopped")
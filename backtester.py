@@ -0,0 +1,246 @@
+import argparse
+import json
+import time
+import numpy as np
+from config import (
+    RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD, MOVING_AVERAGE_PERIOD,
+    STOP_LOSS_PERCENTAGE, TAKE_PROFIT_PERCENTAGE, MAX_TRADES_PER_DAY,
+    ORDER_SIZE, TRADING_PAIR, KLINE_INTERVAL
+)
+from logger_setup import get_logger
+from indicators import rsi_series, sma_series
+from kline_store import OPEN_TIME, CLOSE, KLINE_COLUMNS, parse_klines
+from trading_strategy import is_entry_signal, is_exit_signal, loss_percentage, profit_percentage
+
+logger = get_logger('backtester')
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+HISTORY_PAGE_LIMIT = 1000
+
+EXIT_STOP_LOSS = 'stop_loss'
+EXIT_TAKE_PROFIT = 'take_profit'
+EXIT_SIGNAL = 'signal'
+EXIT_OPEN = 'open'  # Still in position at the end of the data
+
+
+def load_klines(path):
+    """Load candles from a .npy file or a Binance kline CSV dump.
+
+    .npy files are memory mapped. CSV files may have a header row; only
+    the first six columns (open time, OHLC, volume) are used.
+    """
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+
+    with open(path) as f:
+        first = f.readline()
+    skiprows = 0 if first[:1].isdigit() else 1
+    return np.loadtxt(path, delimiter=',', usecols=range(KLINE_COLUMNS), skiprows=skiprows, ndmin=2)
+
+
+def fetch_klines(binance_client, symbol, interval, start_time, end_time=None):
+    """Download candles from start_time (ms) onward, paging over /v3/klines."""
+    pages = []
+    while True:
+        klines = binance_client.get_klines(symbol, interval, limit=HISTORY_PAGE_LIMIT, start_time=start_time)
+        rows = parse_klines(klines)
+        if end_time is not None:
+            rows = rows[rows[:, OPEN_TIME] < end_time]
+        if len(rows):
+            pages.append(rows)
+        if len(klines) < HISTORY_PAGE_LIMIT or len(rows) < len(klines):
+            break
+        start_time = int(rows[-1, OPEN_TIME]) + 1
+        logger.info("Fetched %s %s candles for %s", sum(len(p) for p in pages), interval, symbol)
+
+    if not pages:
+        return np.empty((0, KLINE_COLUMNS))
+    return np.concatenate(pages)
+
+
+class Backtester:
+    def __init__(self, rsi_period=RSI_PERIOD, rsi_overbought=RSI_OVERBOUGHT,
+                 rsi_oversold=RSI_OVERSOLD, ma_period=MOVING_AVERAGE_PERIOD,
+                 stop_loss_pct=STOP_LOSS_PERCENTAGE, take_profit_pct=TAKE_PROFIT_PERCENTAGE,
+                 max_trades_per_day=MAX_TRADES_PER_DAY, order_size=ORDER_SIZE, fee_rate=0.0):
+        """Replay the TradingStrategy rules over historical candles.
+
+        Each bar is evaluated once at its close, the same way
+        TradingStrategy.generate_signal evaluates the latest price: stop loss
+        and take profit first, then the RSI/MA entry and exit conditions.
+        Orders fill at the evaluated close. Trading days are UTC days of the
+        candle open time.
+
+        Args:
+            fee_rate: Fraction of notional charged per fill (e.g. 0.001)
+        """
+        self.rsi_period = rsi_period
+        self.rsi_overbought = rsi_overbought
+        self.rsi_oversold = rsi_oversold
+        self.ma_period = ma_period
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.max_trades_per_day = max_trades_per_day
+        self.order_size = order_size
+        self.fee_rate = fee_rate
+
+    def compute_indicators(self, closes):
+        """RSI and moving average series for every bar."""
+        return rsi_series(closes, self.rsi_period), sma_series(closes, self.ma_period)
+
+    def compute_signals(self, closes):
+        """Vectorized entry and indicator-exit masks for every bar."""
+        rsi, ma = self.compute_indicators(closes)
+        valid = ~(np.isnan(rsi) | np.isnan(ma))
+        with np.errstate(invalid='ignore'):
+            entries = valid & is_entry_signal(rsi, closes, ma, self.rsi_oversold)
+            exits = valid & is_exit_signal(rsi, closes, ma, self.rsi_overbought)
+        return valid, entries, exits
+
+    def _find_exit(self, closes, valid, entry_index, limit):
+        """First bar after entry_index and before limit that hits stop loss or take profit.
+
+        Scans in growing chunks so a long hold costs a few vectorized passes
+        instead of one Python step per bar.
+        """
+        entry_price = closes[entry_index]
+        start = entry_index + 1
+        chunk = 256
+        while start < limit:
+            end = min(start + chunk, limit)
+            window = closes[start:end]
+            stop = loss_percentage(entry_price, window) >= self.stop_loss_pct
+            take = profit_percentage(entry_price, window) >= self.take_profit_pct
+            hits = np.flatnonzero(valid[start:end] & (stop | take))
+            if len(hits):
+                index = start + hits[0]
+                return index, EXIT_STOP_LOSS if stop[hits[0]] else EXIT_TAKE_PROFIT
+            start = end
+            chunk *= 4
+        return limit, EXIT_SIGNAL
+
+    def run(self, candles):
+        """Backtest over a (n, 6) candle array and return a results dict."""
+        started = time.perf_counter()
+        candles = np.asarray(candles, dtype=float)
+        closes = np.ascontiguousarray(candles[:, CLOSE])
+        open_times = candles[:, OPEN_TIME]
+        days = (open_times // MS_PER_DAY).astype(np.int64)
+        n = len(closes)
+
+        valid, entries, exits = self.compute_signals(closes)
+        entry_indices = np.flatnonzero(entries)
+        exit_indices = np.flatnonzero(exits)
+
+        trades = []
+        position = 0
+        trades_on_day = {}
+        while True:
+            k = np.searchsorted(entry_indices, position)
+            if k == len(entry_indices):
+                break
+            entry = entry_indices[k]
+
+            day = days[entry]
+            if trades_on_day.get(day, 0) >= self.max_trades_per_day:
+                # Skip to the first bar of the next trading day
+                position = np.searchsorted(days, day, side='right')
+                continue
+            trades_on_day[day] = trades_on_day.get(day, 0) + 1
+
+            m = np.searchsorted(exit_indices, entry + 1)
+            signal_exit = exit_indices[m] if m < len(exit_indices) else n
+            exit_index, reason = self._find_exit(closes, valid, entry, signal_exit)
+            if exit_index == n:
+                exit_index, reason = n - 1, EXIT_OPEN
+
+            trades.append((entry, exit_index, reason))
+            position = exit_index + 1
+
+        result = self._summarize(candles, closes, trades)
+        elapsed = time.perf_counter() - started
+        result['bars'] = n
+        result['elapsed'] = elapsed
+        result['bars_per_second'] = n / elapsed if elapsed > 0 else float('inf')
+        return result
+
+    def _summarize(self, candles, closes, trades):
+        """Build trade records, PnL and mark-to-market drawdown."""
+        n = len(closes)
+        records = []
+        equity = np.ones(n)  # Compounded equity, fully invested while in position
+        capital = 1.0
+        last = 0
+        total_pnl = 0.0
+        wins = 0
+
+        for entry, exit_index, reason in trades:
+            entry_price = closes[entry]
+            exit_price = closes[exit_index]
+            gross = (exit_price - entry_price) * self.order_size
+            fees = (entry_price + exit_price) * self.order_size * self.fee_rate
+            pnl = gross - fees
+            ret = (exit_price * (1 - self.fee_rate)) / (entry_price * (1 + self.fee_rate)) - 1
+
+            equity[last:entry + 1] = capital
+            hold = closes[entry + 1:exit_index + 1] / (entry_price * (1 + self.fee_rate))
+            equity[entry + 1:exit_index + 1] = capital * hold
+            capital *= 1 + ret
+            equity[exit_index] = capital
+            last = exit_index + 1
+
+            total_pnl += pnl
+            wins += pnl > 0
+            records.append({
+                'entry_time': int(candles[entry, OPEN_TIME]),
+                'exit_time': int(candles[exit_index, OPEN_TIME]),
+                'entry_price': float(entry_price),
+                'exit_price': float(exit_price),
+                'exit_reason': reason,
+                'pnl': float(pnl),
+                'return_pct': float(ret * 100)
+            })
+        equity[last:] = capital
+
+        peaks = np.maximum.accumulate(equity) if n else equity
+        drawdowns = 1 - equity / peaks if n else equity
+
+        return {
+            'trades': records,
+            'num_trades': len(records),
+            'win_rate': float(wins) / len(records) * 100 if records else 0.0,
+            'total_pnl': float(total_pnl),
+            'total_return_pct': float(capital - 1) * 100,
+            'max_drawdown_pct': float(drawdowns.max()) * 100 if n else 0.0
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest the RSI/MA strategy on historical klines')
+    parser.add_argument('--file', help='Candle file (.npy or Binance kline CSV)')
+    parser.add_argument('--symbol', default=TRADING_PAIR)
+    parser.add_argument('--interval', default=KLINE_INTERVAL)
+    parser.add_argument('--days', type=int, default=365, help='History to download when no file is given')
+    parser.add_argument('--save', help='Save downloaded candles to this .npy file')
+    parser.add_argument('--fee-rate', type=float, default=0.0)
+    parser.add_argument('--show-trades', action='store_true')
+    args = parser.parse_args()
+
+    if args.file:
+        candles = load_klines(args.file)
+    else:
+        from binance_client import BinanceClient
+        start_time = int(time.time() * 1000) - args.days * MS_PER_DAY
+        candles = fetch_klines(BinanceClient(), args.symbol, args.interval, start_time)
+        if args.save:
+            np.save(args.save, candles)
+            logger.info("Saved %s candles to %s", len(candles), args.save)
+
+    result = Backtester(fee_rate=args.fee_rate).run(candles)
+    if not args.show_trades:
+        result.pop('trades')
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
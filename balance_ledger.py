@@ -0,0 +1,69 @@
+import threading
+from logger_setup import get_logger
+
+logger = get_logger('balance_ledger')
+
+
+class BalanceLedger:
+    def __init__(self, binance_client):
+        """In-memory account balances kept current from user data events.
+
+        Seeded from GET /v3/account (again after each user data stream
+        reconnect, when events may have been missed), then updated from
+        outboundAccountPosition (absolute balances) and balanceUpdate
+        (deposit/withdrawal deltas) events. Reads never touch the network.
+
+        Args:
+            binance_client: Instance of BinanceClient, used to seed balances
+        """
+        self.binance_client = binance_client
+        self.balances = {}  # asset -> (free, locked)
+        self.last_update_time = 0
+        self.seeded = False  # Balances are unknown until the first successful seed
+        self.lock = threading.Lock()
+
+    def seed(self):
+        """Load every balance from the account endpoint."""
+        account_info = self.binance_client.get_account_info()
+        with self.lock:
+            self.balances = {
+                balance['asset']: (float(balance['free']), float(balance['locked']))
+                for balance in account_info['balances']
+            }
+            self.last_update_time = account_info.get('updateTime', 0)
+            self.seeded = True
+        logger.info("Balance ledger seeded with %s assets", len(self.balances))
+
+    def apply_account_position(self, event):
+        """Apply an outboundAccountPosition event with the new balances of changed assets."""
+        with self.lock:
+            # Events can arrive after a newer REST seed
+            if event.get('u', 0) < self.last_update_time:
+                return
+            for balance in event['B']:
+                self.balances[balance['a']] = (float(balance['f']), float(balance['l']))
+            self.last_update_time = event.get('u', self.last_update_time)
+
+    def apply_balance_update(self, event):
+        """Apply a balanceUpdate event (deposit, withdrawal or transfer delta)."""
+        with self.lock:
+            if event.get('T', 0) < self.last_update_time:
+                return
+            free, locked = self.balances.get(event['a'], (0.0, 0.0))
+            self.balances[event['a']] = (free + float(event['d']), locked)
+
+    def free(self, asset):
+        """Free balance of an asset."""
+        return self.balances.get(asset, (0.0, 0.0))[0]
+
+    def locked(self, asset):
+        """Balance of an asset locked in open orders."""
+        return self.balances.get(asset, (0.0, 0.0))[1]
+
+    def non_zero(self):
+        """Non-zero balances as a list of {asset, free, locked} dicts."""
+        return [
+            {'asset': asset, 'free': free, 'locked': locked}
+            for asset, (free, locked) in list(self.balances.items())
+            if free > 0 or locked > 0
+        ]
@@ -0,0 +1,293 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import numpy as np
+
+# Add parent directory to path to import bot modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+# Benchmarks run offline against stubs; config only requires the keys to be set
+os.environ.setdefault('BINANCE_API_KEY', 'benchmark')
+os.environ.setdefault('BINANCE_SECRET_KEY', 'benchmark')
+
+from kline_store import KlineStore, parse_klines
+from exchange_info_cache import ExchangeInfoCache
+from order_manager import OrderManager
+from scanner import MarketScanner
+from trade_journal import TradeJournal
+from trading_strategy import TradingStrategy
+from user_data_stream import UserDataStream
+from main import TradingBot
+from stubs import StubBinanceClient, EXECUTION_REPORT, execution_report_frames, random_walk, raw_klines
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+DEFAULT_THRESHOLD = 0.15  # Relative slowdown reported as a regression
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'XRPUSDT', 'ADAUSDT', 'DOGEUSDT', 'AVAXUSDT',
+           'DOTUSDT', 'LINKUSDT', 'LTCUSDT', 'TRXUSDT', 'MATICUSDT', 'ATOMUSDT', 'UNIUSDT', 'ETCUSDT',
+           'XLMUSDT', 'FILUSDT', 'NEARUSDT', 'APTUSDT']
+
+# name -> setup(stack) returning (function to time, operations per call)
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a setup function under `name`."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def order_manager(stack, client, symbols):
+    exchange_info = ExchangeInfoCache(client, path=os.path.join(stack.tmpdir, 'exchange_info.json'))
+    return OrderManager(client, symbols, exchange_info=exchange_info)
+
+
+for size in (100, 1000, 10000):
+    @benchmark(f'strategy.calculate_rsi[{size}]')
+    def bench_rsi(stack, size=size):
+        strategy = TradingStrategy(None, kline_store=KlineStore(None))
+        prices = random_walk(size)
+        return lambda: strategy.calculate_rsi(prices), 1
+
+    @benchmark(f'strategy.calculate_moving_average[{size}]')
+    def bench_ma(stack, size=size):
+        strategy = TradingStrategy(None, kline_store=KlineStore(None))
+        prices = random_walk(size)
+        return lambda: strategy.calculate_moving_average(prices), 1
+
+
+for size in (100, 1000):
+    @benchmark(f'kline_store.parse_klines[{size}]')
+    def bench_parse_klines(stack, size=size):
+        klines = raw_klines(size)
+        return lambda: parse_klines(klines), 1
+
+
+@benchmark('strategy.generate_signal')
+def bench_generate_signal(stack):
+    """One new closed candle per call: fetch, parse, merge and indicator update."""
+    strategy = TradingStrategy(StubBinanceClient(['BTCUSDT']), symbol='BTCUSDT')
+    strategy.generate_signal()
+    return strategy.generate_signal, 1
+
+
+@benchmark('order_manager.normalize_quantity')
+def bench_normalize_quantity(stack):
+    manager = order_manager(stack, StubBinanceClient(['BTCUSDT']), ['BTCUSDT'])
+    return lambda: manager.normalize_quantity(0.0123456789, 'BTCUSDT'), 1
+
+
+@benchmark('order_manager.normalize_price')
+def bench_normalize_price(stack):
+    manager = order_manager(stack, StubBinanceClient(['BTCUSDT']), ['BTCUSDT'])
+    return lambda: manager.normalize_price(37251.123456, 'BTCUSDT'), 1
+
+
+@benchmark('order_manager.normalize_quantities[1000]')
+def bench_normalize_quantities(stack):
+    manager = order_manager(stack, StubBinanceClient(['BTCUSDT']), ['BTCUSDT'])
+    quantities = random_walk(1000) / 1e6
+    return lambda: manager.normalize_quantities(quantities, 'BTCUSDT'), 1
+
+
+def active_order_manager(stack, order_count=100):
+    """OrderManager tracking `order_count` open orders."""
+    manager = order_manager(stack, StubBinanceClient(['BTCUSDT']), ['BTCUSDT'])
+    for order_id in range(order_count):
+        manager.active_orders[order_id] = {
+            'symbol': 'BTCUSDT', 'side': 'BUY', 'quantity': 0.01, 'price': 37250.0, 'timestamp': None
+        }
+    return manager
+
+
+@benchmark('order_manager.update_order_status')
+def bench_update_order_status(stack):
+    manager = active_order_manager(stack)
+    update = dict(EXECUTION_REPORT, i=42)
+    return lambda: manager.update_order_status(update), 1
+
+
+@benchmark('order_manager.update_order_status[journal]')
+def bench_update_order_status_journal(stack):
+    manager = active_order_manager(stack)
+    manager.journal = TradeJournal(os.path.join(stack.tmpdir, 'journal.db'))
+    manager.journal.start()
+    stack.callback(manager.journal.close)
+    update = dict(EXECUTION_REPORT, i=42)
+    return lambda: manager.update_order_status(update), 1
+
+
+@benchmark('user_data_stream.throughput[5000]')
+def bench_user_data_stream(stack):
+    """Frames through _on_message, the worker queue, decoding and order updates."""
+    manager = active_order_manager(stack)
+    frames = execution_report_frames(list(manager.active_orders), 5000)
+    done = threading.Event()
+    remaining = [0]
+
+    def handle_execution_report(event):
+        manager.update_order_status(event)
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            done.set()
+
+    stream = UserDataStream(None, handlers={'executionReport': handle_execution_report})
+    stream._start_worker()
+    stack.callback(stream.worker.join)
+    stack.callback(stream.events.put, None)
+
+    def run():
+        remaining[0] = len(frames)
+        done.clear()
+        for frame in frames:
+            stream._on_message(None, frame)
+        done.wait()
+
+    return run, len(frames)
+
+
+for count in (1, 20):
+    @benchmark(f'bot.execute_trading_cycle[{count} symbols]')
+    def bench_trading_cycle(stack, count=count):
+        """A candle-close cycle: scan every symbol, then place the orders signalled."""
+        symbols = SYMBOLS[:count]
+        client = StubBinanceClient(symbols)
+        bot = TradingBot()
+        bot.binance_client = client
+        bot.scanner = MarketScanner(client, symbols)
+        bot.order_manager = order_manager(stack, client, symbols)
+        bot.execute_trading_cycle()
+        return bot.execute_trading_cycle, 1
+
+
+class BenchmarkContext(contextlib.ExitStack):
+    def __init__(self):
+        """Cleanup stack of one benchmark with a private temporary directory."""
+        super().__init__()
+        self.tmpdir = self.enter_context(tempfile.TemporaryDirectory())
+
+
+def measure(func, ops, repeat, min_time):
+    """Time `func`; returns per-operation statistics in microseconds."""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    times = [t / (number * ops) * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'min_us': min(times),
+        'median_us': statistics.median(times),
+        'ops_per_sec': 1e6 / min(times),
+        'number': number,
+        'repeat': repeat
+    }
+
+
+def run(names, repeat, min_time):
+    results = {}
+    for name in names:
+        with BenchmarkContext() as stack:
+            func, ops = BENCHMARKS[name](stack)
+            results[name] = measure(func, ops, repeat, min_time)
+        print(f"{name:<50} {results[name]['min_us']:>12.3f} us  (median {results[name]['median_us']:.3f})")
+    return results
+
+
+def environment():
+    """Machine and code version the results were measured on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline; returns the names that regressed.
+
+    Minimum times are compared, being the least sensitive to noise from
+    other processes.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<50} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, result in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            print(f"{name:<50} {'-':>12} {result['min_us']:>12.3f} {'new':>9}")
+            continue
+        change = result['min_us'] / previous['min_us'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<50} {previous['min_us']:>12.3f} {result['min_us']:>12.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def baseline_path(name):
+    return name if name.endswith('.json') else os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the trading bot hot paths offline')
+    parser.add_argument('-k', '--filter', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--save', metavar='BASELINE', help='Save results as a baseline name or .json path')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare with a saved baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Slowdown reported as a regression (0.15 = 15%%)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repeats per benchmark')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per repeat')
+    parser.add_argument('--list', action='store_true', help='List benchmark names and exit')
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not args.filter or args.filter in name]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+
+    # Keep log formatting out of the measurements
+    logging.disable(logging.INFO)
+    results = run(names, args.repeat, args.min_time)
+
+    if args.save:
+        path = baseline_path(args.save)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"\nBaseline saved to {path}")
+
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+        if baseline['environment'].get('machine') != platform.machine():
+            print("Warning: baseline was recorded on a different machine type")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import itertools
+import json
+import numpy as np
+
+MS_PER_HOUR = 60 * 60 * 1000
+START_TIME = 1700000000000 - 1700000000000 % MS_PER_HOUR
+
+# executionReport in the layout of a recorded user data stream frame
+EXECUTION_REPORT = {
+    'e': 'executionReport', 'E': 1700000000100, 's': 'BTCUSDT', 'c': 'web_6b4cd2e1a3f04c7e9d51',
+    'S': 'BUY', 'o': 'LIMIT', 'f': 'GTC', 'q': '0.01000000', 'p': '37250.00000000',
+    'P': '0.00000000', 'F': '0.00000000', 'g': -1, 'C': '', 'x': 'TRADE',
+    'X': 'PARTIALLY_FILLED', 'r': 'NONE', 'i': 0, 'l': '0.00100000', 'z': '0.00400000',
+    'L': '37250.00000000', 'n': '0.00000100', 'N': 'BTC', 'T': 1700000000099, 't': 281734,
+    'v': 0, 'I': 5821930, 'w': False, 'm': False, 'M': True, 'O': 1700000000000,
+    'Z': '149.00000000', 'Y': '37.25000000', 'Q': '0.00000000', 'W': 1700000000000, 'V': 'EXPIRE_MAKER'
+}
+
+
+def random_walk(size, seed=0, start=30000.0):
+    """Deterministic close prices for benchmark inputs."""
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, 0.004, size)))
+
+
+def raw_kline(open_time, close):
+    """One kline in the GET /v3/klines response layout."""
+    return [
+        open_time, f"{close * 0.999:.2f}", f"{close * 1.002:.2f}", f"{close * 0.997:.2f}",
+        f"{close:.2f}", "12.50000000", open_time + MS_PER_HOUR - 1, f"{close * 12.5:.2f}",
+        1250, "6.25000000", f"{close * 6.25:.2f}", "0"
+    ]
+
+
+def raw_klines(size, seed=0):
+    closes = random_walk(size, seed)
+    return [raw_kline(START_TIME + i * MS_PER_HOUR, close) for i, close in enumerate(closes)]
+
+
+def execution_report_frames(order_ids, count):
+    """Raw executionReport frames cycling over `order_ids`."""
+    frames = []
+    for order_id, trade_id in zip(itertools.cycle(order_ids), range(count)):
+        frames.append(json.dumps(dict(EXECUTION_REPORT, i=order_id, t=trade_id)))
+    return frames
+
+
+def symbol_info(symbol):
+    """exchangeInfo entry with the filters OrderManager relies on."""
+    return {
+        'symbol': symbol, 'status': 'TRADING', 'baseAsset': symbol[:-4], 'quoteAsset': 'USDT',
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'minPrice': '0.01000000', 'maxPrice': '1000000.00000000',
+             'tickSize': '0.01000000'},
+            {'filterType': 'LOT_SIZE', 'minQty': '0.00001000', 'maxQty': '9000.00000000',
+             'stepSize': '0.00001000'},
+            {'filterType': 'NOTIONAL', 'minNotional': '5.00000000'}
+        ]
+    }
+
+
+class StubBinanceClient:
+    def __init__(self, symbols, history=1000):
+        """In-memory stand-in for BinanceClient.
+
+        Every get_klines call for a symbol advances its market by one closed
+        candle, so each trading cycle sees the steady state of a bot woken
+        on candle close. Orders are acknowledged immediately.
+
+        Args:
+            symbols: Symbols with kline data and exchange rules
+            history: Candles available before the first call
+        """
+        self.symbols = list(symbols)
+        self.closes = {
+            symbol: list(random_walk(history, seed)) for seed, symbol in enumerate(self.symbols)
+        }
+        self.rng = np.random.default_rng(len(self.symbols))
+        self.order_ids = itertools.count(1)
+
+    def get_klines(self, symbol, interval, limit=500, start_time=None):
+        closes = self.closes[symbol]
+        closes.append(closes[-1] * float(np.exp(self.rng.normal(0, 0.004))))
+        first = 0 if start_time is None else (start_time - START_TIME) // MS_PER_HOUR
+        first = max(first, len(closes) - limit)
+        return [raw_kline(START_TIME + i * MS_PER_HOUR, closes[i]) for i in range(first, len(closes))]
+
+    def get_symbol_price(self, symbol):
+        return self.closes[symbol][-1]
+
+    def get_exchange_info(self):
+        return {'symbols': [symbol_info(symbol) for symbol in self.symbols]}
+
+    def get_account_info(self):
+        return {'balances': [], 'updateTime': 0}
+
+    def create_order(self, symbol, side, order_type, quantity=None, price=None, time_in_force=None,
+                     client_order_id=None):
+        return {'symbol': symbol, 'orderId': next(self.order_ids), 'clientOrderId': client_order_id,
+                'status': 'FILLED'}
+
+    def cancel_order(self, symbol, order_id):
+        return {'symbol': symbol, 'orderId': order_id, 'status': 'CANCELED'}
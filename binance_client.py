@@ -6,11 +6,18 @@ from urllib.parse import urlencode
 from requests.exceptions import RequestException
 from config import API_KEY, SECRET_KEY, REST_BASE_URL, TESTNET
 from logger_setup import get_logger
+from metrics import metrics
+from clock_sync import shared_server_clock, is_timestamp_error
+from rate_limiter import (
+    shared_rate_limiter, request_weight, request_priority, is_new_order, RATE_LIMIT_STATUSES
+)
 
 logger = get_logger('binance_client')
 
 class BinanceClient:
-    def __init__(self):
+    def __init__(self, rate_limiter=None, server_clock=None):
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.server_clock = server_clock or shared_server_clock
         self.api_key = API_KEY
         self.api_secret = SECRET_KEY
         self.base_url = REST_BASE_URL
@@ -29,35 +36,69 @@ class BinanceClient:
         ).hexdigest()
         return signature
 
+    def _sign(self, params):
+        """Stamp params with the server time estimate and recvWindow, then sign them."""
+        params.pop('signature', None)
+        params['timestamp'] = self.server_clock.timestamp()
+        params['recvWindow'] = self.server_clock.recv_window
+        params['signature'] = self._generate_signature(params)
+
     def _make_request(self, method, endpoint, params=None, signed=False, retry_count=3):
         """Make an HTTP request to the Binance API with retry logic."""
         if params is None:
             params = {}
 
-        if signed:
-            params['timestamp'] = int(time.time() * 1000)
-            params['signature'] = self._generate_signature(params)
-
         url = f"{self.base_url}{endpoint}"
+        weight = request_weight(method, endpoint, params)
+        priority = request_priority(endpoint)
+        orders = 1 if is_new_order(method, endpoint) else 0
         
         for attempt in range(retry_count):
+            self.rate_limiter.acquire(weight, priority, orders)
+            if attempt:
+                metrics.inc('rest_retries_total', endpoint=endpoint)
+            if signed:
+                self._sign(params)
+            started = time.perf_counter()
             try:
-                response = self.session.request(
-                    method,
-                    url,
-                    params=params if method == 'GET' else None,
-                    json=params if method == 'POST' else None
-                )
+                # Binance reads parameters from the query string (or a form body), never JSON
+                response = self.session.request(method, url, params=params)
+                metrics.observe('rest_request_seconds', time.perf_counter() - started,
+                                method=method, endpoint=endpoint)
+                metrics.inc('rest_requests_total', endpoint=endpoint, status=response.status_code)
+                self.rate_limiter.update_from_headers(response.headers)
                 response.raise_for_status()
                 return response.json()
             except RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                metrics.inc('rest_errors_total', endpoint=endpoint, status=status or 'network')
+                if status in RATE_LIMIT_STATUSES:
+                    # The limiter now holds every request until Retry-After
+                    self.rate_limiter.on_rate_limited(status, e.response.headers.get('Retry-After'))
+                    if status == 418 or attempt == retry_count - 1:
+                        logger.error("Request rejected by rate limit (%s): %s", status, e)
+                        raise
+                    continue
+                if signed and status == 400 and attempt < retry_count - 1 \
+                        and is_timestamp_error(self._error_body(e.response)):
+                    # Clock drift: resync and resend at once with a fresh timestamp
+                    logger.warning("Request timestamp rejected, resyncing server time: %s", e)
+                    self.server_clock.sync('rejected')
+                    continue
                 if attempt == retry_count - 1:
-                    logger.error(f"Request failed after {retry_count} attempts: {e}")
+                    logger.error("Request failed after %s attempts: %s", retry_count, e)
                     raise
                 wait_time = 2 ** attempt
-                logger.warning(f"Request failed, retrying in {wait_time} seconds...")
+                logger.warning("Request failed, retrying in %s seconds...", wait_time)
                 time.sleep(wait_time)
 
+    @staticmethod
+    def _error_body(response):
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
     def get_listen_key(self):
         """Create a listen key for user data stream."""
         try:
@@ -69,7 +110,7 @@ class BinanceClient:
             logger.info("Successfully obtained listen key")
             return listen_key
         except Exception as e:
-            logger.error(f"Failed to get listen key: {e}")
+            logger.error("Failed to get listen key: %s", e)
             raise
 
     def keep_alive_listen_key(self, listen_key):
@@ -81,7 +122,7 @@ class BinanceClient:
             logger.debug("Successfully renewed listen key")
             return True
         except Exception as e:
-            logger.error(f"Failed to keep listen key alive: {e}")
+            logger.error("Failed to keep listen key alive: %s", e)
             return False
 
     def get_account_info(self):
@@ -90,10 +131,11 @@ class BinanceClient:
             endpoint = '/v3/account'
             return self._make_request('GET', endpoint, signed=True)
         except Exception as e:
-            logger.error(f"Failed to get account info: {e}")
+            logger.error("Failed to get account info: %s", e)
             raise
 
-    def create_order(self, symbol, side, order_type, quantity=None, price=None):
+    def create_order(self, symbol, side, order_type, quantity=None, price=None, time_in_force=None,
+                     client_order_id=None):
         """Create a new order."""
         try:
             endpoint = '/v3/order'
@@ -107,12 +149,16 @@ class BinanceClient:
                 params['quantity'] = quantity
             if price and order_type != 'MARKET':
                 params['price'] = price
+            if time_in_force:
+                params['timeInForce'] = time_in_force
+            if client_order_id:
+                params['newClientOrderId'] = client_order_id
             
             response = self._make_request('POST', endpoint, params, signed=True)
-            logger.info(f"Successfully created {order_type} {side} order for {symbol}")
+            logger.info("Successfully created %s %s order for %s", order_type, side, symbol)
             return response
         except Exception as e:
-            logger.error(f"Failed to create order: {e}")
+            logger.error("Failed to create order: %s", e)
             raise
 
     def get_order_status(self, symbol, order_id):
@@ -125,7 +171,7 @@ class BinanceClient:
             }
             return self._make_request('GET', endpoint, params, signed=True)
         except Exception as e:
-            logger.error(f"Failed to get order status: {e}")
+            logger.error("Failed to get order status: %s", e)
             raise
 
     def cancel_order(self, symbol, order_id):
@@ -137,10 +183,20 @@ class BinanceClient:
                 'orderId': order_id
             }
             response = self._make_request('DELETE', endpoint, params, signed=True)
-            logger.info(f"Successfully cancelled order {order_id} for {symbol}")
+            logger.info("Successfully cancelled order %s for %s", order_id, symbol)
             return response
         except Exception as e:
-            logger.error(f"Failed to cancel order: {e}")
+            logger.error("Failed to cancel order: %s", e)
+            raise
+
+    def get_open_orders(self, symbol=None):
+        """Get open orders of one symbol, or of all symbols in a single request."""
+        try:
+            endpoint = '/v3/openOrders'
+            params = {'symbol': symbol} if symbol else {}
+            return self._make_request('GET', endpoint, params, signed=True)
+        except Exception as e:
+            logger.error("Failed to get open orders: %s", e)
             raise
 
     def get_symbol_price(self, symbol):
@@ -150,7 +206,31 @@ class BinanceClient:
             params = {'symbol': symbol}
             return float(self._make_request('GET', endpoint, params)['price'])
         except Exception as e:
-            logger.error(f"Failed to get price for {symbol}: {e}")
+            logger.error("Failed to get price for %s: %s", symbol, e)
+            raise
+
+    def get_all_prices(self):
+        """Get current prices of every symbol in one request, as {symbol: price}."""
+        try:
+            return {
+                ticker['symbol']: float(ticker['price'])
+                for ticker in self._make_request('GET', '/v3/ticker/price')
+            }
+        except Exception as e:
+            logger.error("Failed to get prices: %s", e)
+            raise
+
+    def get_order_book(self, symbol, limit=100):
+        """Get an order book snapshot (bids and asks with lastUpdateId)."""
+        try:
+            endpoint = '/v3/depth'
+            params = {
+                'symbol': symbol,
+                'limit': limit
+            }
+            return self._make_request('GET', endpoint, params)
+        except Exception as e:
+            logger.error("Failed to get order book for %s: %s", symbol, e)
             raise
 
     def get_exchange_info(self):
@@ -159,11 +239,11 @@ class BinanceClient:
             endpoint = '/v3/exchangeInfo'
             return self._make_request('GET', endpoint)
         except Exception as e:
-            logger.error(f"Failed to get exchange info: {e}")
+            logger.error("Failed to get exchange info: %s", e)
             raise
 
-    def get_klines(self, symbol, interval, limit=500):
-        """Get kline/candlestick data."""
+    def get_klines(self, symbol, interval, limit=500, start_time=None):
+        """Get kline/candlestick data, optionally starting at an open time (ms)."""
         try:
             endpoint = '/v3/klines'
             params = {
@@ -171,7 +251,9 @@ class BinanceClient:
                 'interval': interval,
                 'limit': limit
             }
+            if start_time is not None:
+                params['startTime'] = int(start_time)
             return self._make_request('GET', endpoint, params)
         except Exception as e:
-            logger.error(f"Failed to get klines for {symbol}: {e}")
+            logger.error("Failed to get klines for %s: %s", symbol, e)
             raise
\ No newline at end of file
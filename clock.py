@@ -0,0 +1,53 @@
+import time
+from datetime import datetime
+
+
+class WallClock:
+    """The system clock."""
+
+    def timestamp(self):
+        return time.time()
+
+    def now(self):
+        return datetime.now()
+
+
+class SimulatedClock:
+    def __init__(self, start):
+        """Clock that only moves when advanced, used to replay recorded market data.
+
+        Args:
+            start: Initial time as a Unix timestamp in seconds
+        """
+        self.current = start
+
+    def timestamp(self):
+        return self.current
+
+    def now(self):
+        return datetime.fromtimestamp(self.current)
+
+    def advance_to(self, timestamp):
+        """Move the clock forward; it never moves backwards."""
+        self.current = max(self.current, timestamp)
+
+
+# Clock read by the strategy, order manager, scheduler and bot
+_clock = WallClock()
+
+
+def timestamp():
+    """Current Unix time in seconds from the active clock."""
+    return _clock.timestamp()
+
+
+def now():
+    """Current local datetime from the active clock."""
+    return _clock.now()
+
+
+def set_clock(source):
+    """Make `source` the active clock; returns the previous one."""
+    global _clock
+    previous, _clock = _clock, source
+    return previous
@@ -0,0 +1,133 @@
+import threading
+import time
+import requests
+from config import REST_BASE_URL, CLOCK_SYNC_INTERVAL, CLOCK_SYNC_SAMPLES, RECV_WINDOW
+from logger_setup import get_logger
+from metrics import metrics
+from rate_limiter import shared_rate_limiter
+
+logger = get_logger('clock_sync')
+
+# Binance error code for a timestamp outside recvWindow (or ahead of server time)
+TIMESTAMP_ERROR_CODE = -1021
+
+RTT_SMOOTHING = 0.125  # Weight of a new sample in the smoothed RTT, as in TCP
+OUTLIER_RTT_FACTOR = 2.0  # Samples slower than this many smoothed RTTs don't move the offset
+MIN_RESYNC_INTERVAL = 1.0  # Seconds; rejected requests don't resync more often than this
+
+
+def is_timestamp_error(error):
+    """Whether a decoded Binance error body is a recvWindow/timestamp rejection."""
+    return isinstance(error, dict) and error.get('code') == TIMESTAMP_ERROR_CODE
+
+
+class ServerClock:
+    def __init__(self, base_url=REST_BASE_URL, interval=CLOCK_SYNC_INTERVAL,
+                 samples=CLOCK_SYNC_SAMPLES, recv_window=RECV_WINDOW, rate_limiter=None):
+        """Estimate the offset between the local clock and Binance server time.
+
+        Each sync calls /v3/time a few times and keeps the sample with the
+        lowest round trip, assuming the server stamped its reply halfway
+        through it. A smoothed RTT tracks the connection; samples far
+        slower than it are treated as congestion and don't move the
+        offset. A background thread resyncs every `interval` seconds.
+
+        Args:
+            base_url: REST base URL
+            interval: Seconds between background resyncs
+            samples: /v3/time requests per sync
+            recv_window: recvWindow (ms) sent with signed requests
+            rate_limiter: RateLimiter to share; defaults to the process-wide one
+        """
+        self.base_url = base_url
+        self.interval = interval
+        self.samples = samples
+        self.recv_window = recv_window
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.session = requests.Session()
+        self.offset_ms = 0.0
+        self.smoothed_rtt = None
+        self.synced_at = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def timestamp(self):
+        """Current server time estimate in milliseconds, for signed requests."""
+        return int(time.time() * 1000 + self.offset_ms)
+
+    def _sample(self):
+        """One /v3/time round trip; returns (offset ms, RTT seconds)."""
+        self.rate_limiter.acquire(1)
+        sent = time.time()
+        started = time.perf_counter()
+        response = self.session.get(f"{self.base_url}/v3/time", timeout=5)
+        rtt = time.perf_counter() - started
+        response.raise_for_status()
+        server_time = response.json()['serverTime']
+        return server_time - (sent + rtt / 2) * 1000, rtt
+
+    def sync(self, reason='interval'):
+        """Measure the offset now; returns True if it was updated."""
+        with self.lock:
+            if reason != 'interval' and self.synced_at is not None \
+                    and time.monotonic() - self.synced_at < MIN_RESYNC_INTERVAL:
+                return False
+            try:
+                samples = [self._sample() for _ in range(self.samples)]
+            except Exception as e:
+                logger.error("Failed to sync server time: %s", e)
+                return False
+
+            offset, rtt = min(samples, key=lambda sample: sample[1])
+            previous_rtt = self.smoothed_rtt
+            for _, sample_rtt in samples:
+                metrics.observe('clock_sync_rtt_seconds', sample_rtt)
+                if self.smoothed_rtt is None:
+                    self.smoothed_rtt = sample_rtt
+                else:
+                    self.smoothed_rtt += RTT_SMOOTHING * (sample_rtt - self.smoothed_rtt)
+            metrics.inc('clock_syncs_total', reason=reason)
+            self.synced_at = time.monotonic()
+
+            # A rejected request means the current offset is wrong, so always take the new one
+            if previous_rtt is not None and reason == 'interval' and rtt > OUTLIER_RTT_FACTOR * previous_rtt:
+                logger.warning("Kept server time offset %.0f ms; best RTT %.0f ms is above the smoothed %.0f ms",
+                               self.offset_ms, rtt * 1000, self.smoothed_rtt * 1000)
+                return False
+
+            if abs(offset - self.offset_ms) >= 100 or reason != 'interval':
+                logger.info("Server time offset %.0f ms (RTT %.0f ms, %s)", offset, rtt * 1000, reason)
+            self.offset_ms = offset
+            if self.smoothed_rtt * 1000 > self.recv_window / 2:
+                logger.warning("Smoothed RTT %.0f ms is large for recvWindow %s ms",
+                               self.smoothed_rtt * 1000, self.recv_window)
+            return True
+
+    def start(self):
+        """Sync once, then keep resyncing in the background."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopped.clear()
+        self.sync('startup')
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.sync()
+
+    def stop(self):
+        self.stopped.set()
+
+    def get_status(self):
+        return {
+            'offset_ms': self.offset_ms,
+            'smoothed_rtt_ms': self.smoothed_rtt * 1000 if self.smoothed_rtt is not None else None,
+            'recv_window': self.recv_window
+        }
+
+
+# Process-wide server clock used to stamp signed requests
+shared_server_clock = ServerClock()
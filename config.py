@@ -13,22 +13,104 @@ TESTNET = os.getenv('TESTNET', 'True').lower() == 'true'
 if TESTNET:
     REST_BASE_URL = 'https://testnet.binance.vision/api'
     WS_BASE_URL = 'wss://testnet.binance.vision/ws'
+    WS_API_URL = 'wss://testnet.binance.vision/ws-api/v3'
 else:
     REST_BASE_URL = 'https://api.binance.us/api'
     WS_BASE_URL = 'wss://stream.binance.us:9443/ws'
+    WS_API_URL = 'wss://ws-api.binance.us:443/ws-api/v3'
+# Override to point the clients at another server, e.g. mock_exchange.py
+REST_BASE_URL = os.getenv('REST_BASE_URL', REST_BASE_URL)
+WS_BASE_URL = os.getenv('WS_BASE_URL', WS_BASE_URL)
+WS_API_URL = os.getenv('WS_API_URL', WS_API_URL)
+
+# Async HTTP client: fetch market data for all symbols concurrently
+USE_ASYNC_CLIENT = os.getenv('USE_ASYNC_CLIENT', 'False').lower() == 'true'
+ASYNC_HTTP_POOL_SIZE = int(os.getenv('ASYNC_HTTP_POOL_SIZE', '50'))
+
+# Client-side rate limits (see GET /v3/exchangeInfo rateLimits)
+RATE_LIMIT_WEIGHT_PER_MINUTE = int(os.getenv('RATE_LIMIT_WEIGHT_PER_MINUTE', '1200'))
+RATE_LIMIT_ORDERS_PER_10S = int(os.getenv('RATE_LIMIT_ORDERS_PER_10S', '50'))
+RATE_LIMIT_ORDER_RESERVE = 0.1  # Share of the weight budget reserved for orders
+
+# Signed requests: timestamps are corrected by the offset to /v3/time, resynced
+# every CLOCK_SYNC_INTERVAL seconds; the server rejects requests older than RECV_WINDOW ms
+RECV_WINDOW = int(os.getenv('RECV_WINDOW', '5000'))
+CLOCK_SYNC_INTERVAL = 60.0
+CLOCK_SYNC_SAMPLES = 5
+
+# Exchange info cache
+EXCHANGE_INFO_CACHE_FILE = 'exchange_info_cache.json'
+EXCHANGE_INFO_TTL = 6 * 60 * 60  # Refresh trading rules every 6 hours
+
+# Shared memory channel the bot publishes its state to for the dashboard
+STATE_CHANNEL_NAME = os.getenv('STATE_CHANNEL_NAME', 'trading_bot_state')
+STATE_CHANNEL_SIZE = 1024 * 1024
+STATE_PUBLISH_INTERVAL = 1.0  # Minimum seconds between snapshots driven by price ticks
+METRICS_PUBLISH_INTERVAL = 10.0  # Maximum age of the published metrics when the bot is idle
 
 # Trading Parameters
 TRADING_PAIR = 'BTCUSDT'  # Default trading pair
+# Comma-separated list of symbols to trade; defaults to TRADING_PAIR
+TRADING_PAIRS = [
+    symbol.strip().upper()
+    for symbol in os.getenv('TRADING_PAIRS', TRADING_PAIR).split(',')
+    if symbol.strip()
+]
 ORDER_SIZE = 0.001  # Default order size in BTC
 MAX_TRADES_PER_DAY = 10
-STOP_LOSS_PERCENTAGE = 2.0  # 2% stop loss
-TAKE_PROFIT_PERCENTAGE = 3.0  # 3% take profit
+STOP_LOSS_PERCENTAGE = float(os.getenv('STOP_LOSS_PERCENTAGE', '2.0'))  # 2% stop loss
+TAKE_PROFIT_PERCENTAGE = float(os.getenv('TAKE_PROFIT_PERCENTAGE', '3.0'))  # 3% take profit
+
+# Order book: keep local books from the depth stream and use them to price orders.
+# ORDER_TYPE=LIMIT sends IOC limit orders at the price the book says fills the
+# order; either way trades whose estimated slippage exceeds
+# MAX_SLIPPAGE_PERCENTAGE (or that the book cannot fill) are declined
+USE_ORDER_BOOK = os.getenv('USE_ORDER_BOOK', 'False').lower() == 'true'
+ORDER_BOOK_SNAPSHOT_LIMIT = 1000
+ORDER_TYPE = os.getenv('ORDER_TYPE', 'MARKET').upper()
+MAX_SLIPPAGE_PERCENTAGE = float(os.getenv('MAX_SLIPPAGE_PERCENTAGE', '0.5'))
+
+# Order transport: 'rest' or 'websocket' (a persistent WebSocket API connection,
+# falling back to REST while it is down)
+ORDER_TRANSPORT = os.getenv('ORDER_TRANSPORT', 'rest').lower()
+ORDER_REQUEST_TIMEOUT = 5.0  # Seconds to wait for a WebSocket API response
+
+# Strategy Parameters (param_sweep.py prints the best combination in this form)
+RSI_PERIOD = int(os.getenv('RSI_PERIOD', '14'))
+RSI_OVERBOUGHT = float(os.getenv('RSI_OVERBOUGHT', '70'))
+RSI_OVERSOLD = float(os.getenv('RSI_OVERSOLD', '30'))
+MOVING_AVERAGE_PERIOD = int(os.getenv('MOVING_AVERAGE_PERIOD', '20'))
+KLINE_INTERVAL = '1h'
+KLINE_HISTORY_SIZE = 500  # Candles kept in the local kline store
+
+# Raw user data frames buffered between the socket and the event worker
+USER_STREAM_QUEUE_SIZE = 10000
+
+# Trade journal (SQLite) used to restore orders and positions after a restart
+TRADE_JOURNAL_FILE = 'trade_journal.db'
+JOURNAL_BATCH_SIZE = 500
+JOURNAL_FLUSH_INTERVAL = 0.05  # Seconds the writer waits to batch events
+
+# Market data source: 'rest' (incremental polling) or 'websocket' (kline stream)
+MARKET_DATA_MODE = os.getenv('MARKET_DATA_MODE', 'rest').lower()
+# Record REST kline pages and WebSocket frames to this .jsonl.gz file for replay.py
+MARKET_DATA_RECORD_FILE = os.getenv('MARKET_DATA_RECORD_FILE') or None
+
+# Seconds between ticker price polls in REST mode (one request for all
+# symbols); the polled prices are checked against stop levels and
+# published to the dashboard
+PRICE_POLL_INTERVAL = float(os.getenv('PRICE_POLL_INTERVAL', '60'))
 
-# Strategy Parameters
-RSI_PERIOD = 14
-RSI_OVERBOUGHT = 70
-RSI_OVERSOLD = 30
-MOVING_AVERAGE_PERIOD = 20
+# Strategy evaluation triggers: candle_close, stop_level (streamed prices, or
+# polled every PRICE_POLL_INTERVAL in REST mode), order_update and interval
+# (fixed polling every SCHEDULER_INTERVAL)
+SCHEDULER_TRIGGERS = [
+    trigger.strip().lower()
+    for trigger in os.getenv('SCHEDULER_TRIGGERS', 'candle_close,stop_level,order_update').split(',')
+    if trigger.strip()
+]
+SCHEDULER_INTERVAL = int(os.getenv('SCHEDULER_INTERVAL', '60'))
+CANDLE_CLOSE_DELAY = 2.0  # Seconds to wait after a candle boundary for the exchange to close it
 
 # Validate required configuration
 if not API_KEY or not SECRET_KEY:
@@ -37,7 +119,19 @@ if not API_KEY or not SECRET_KEY:
 # Application Settings
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE = 'trading_bot.log'
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()  # 'text' or 'json' (JSON lines in LOG_FILE)
 
 # Dashboard Settings
 FLASK_HOST = '0.0.0.0'
-FLASK_PORT = 8000
\ No newline at end of file
+FLASK_PORT = 8000
+# Seconds each dashboard API response is shared between polling clients
+DASHBOARD_CACHE_TTLS = {
+    'market_data': 1.0,
+    'trading_status': 1.0,
+    'account_info': 5.0
+}
+# Streaming endpoint: how often the bot state is checked for changes, events
+# buffered per client, and seconds between keep-alive comments
+DASHBOARD_STREAM_POLL_INTERVAL = 0.2
+DASHBOARD_STREAM_QUEUE_SIZE = 256
+DASHBOARD_STREAM_HEARTBEAT = 15
\ No newline at end of file
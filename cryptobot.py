@@ -12,7 +12,7 @@ def run_trading_bot():
         bot = TradingBot()
         bot.start()
     except Exception as e:
-        logger.error(f"Trading bot error: {e}")
+        logger.error("Trading bot error: %s", e)
         sys.exit(1)
 
 def run_dashboard_server():
@@ -20,7 +20,7 @@ def run_dashboard_server():
     try:
         run_dashboard()
     except Exception as e:
-        logger.error(f"Dashboard error: {e}")
+        logger.error("Dashboard error: %s", e)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -44,7 +44,7 @@ if __name__ == "__main__":
         dashboard_process.terminate()
         sys.exit(0)
     except Exception as e:
-        logger.error(f"Error running application: {e}")
+        logger.error("Error running application: %s", e)
         if 'bot_process' in locals():
             bot_process.terminate()
         if 'dashboard_process' in locals():
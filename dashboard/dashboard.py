@@ -1,95 +1,162 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request, Response
 from datetime import datetime
 import os
+import queue
 import sys
 
 # Add parent directory to path to import bot modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import FLASK_HOST, FLASK_PORT, TRADING_PAIR
+from config import (
+    FLASK_HOST, FLASK_PORT, TRADING_PAIRS, DASHBOARD_CACHE_TTLS,
+    DASHBOARD_STREAM_HEARTBEAT
+)
 from logger_setup import get_logger
-from binance_client import BinanceClient
-from trading_strategy import TradingStrategy
-from order_manager import OrderManager
+from state_channel import StateChannel
+from ttl_cache import TTLCache
+from state_broadcaster import StateBroadcaster
+from metrics import render_text
 
 logger = get_logger('dashboard')
 
 app = Flask(__name__)
-binance_client = BinanceClient()
-trading_strategy = TradingStrategy(binance_client)
-order_manager = OrderManager(binance_client)
+# State published by the trading bot process; the dashboard makes no exchange calls
+state_channel = StateChannel()
+# Endpoint payloads shared by all polling clients
+response_cache = TTLCache()
+# Pushes state changes to /api/stream clients
+broadcaster = StateBroadcaster(state_channel)
+
+def bot_state():
+    """Latest state snapshot published by the bot."""
+    state = state_channel.read()
+    if state is None:
+        raise RuntimeError("Trading bot state is not available yet")
+    return state
+
+def cached(endpoint, loader, *key):
+    """Endpoint payload from the response cache, built by loader() on a miss."""
+    return response_cache.get((endpoint,) + key, loader, DASHBOARD_CACHE_TTLS[endpoint])
+
+def requested_symbol():
+    """Symbol selected by the `symbol` query parameter (defaults to the first traded pair)."""
+    symbol = request.args.get('symbol', TRADING_PAIRS[0]).upper()
+    if symbol not in TRADING_PAIRS:
+        raise ValueError(f"Symbol {symbol} is not traded")
+    return symbol
 
 @app.route('/')
 def index():
     """Render the main dashboard page."""
-    return render_template('index.html', trading_pair=TRADING_PAIR)
+    return render_template('index.html', trading_pair=TRADING_PAIRS[0], trading_pairs=TRADING_PAIRS)
 
 @app.route('/api/market_data')
 def get_market_data():
     """Get current market data."""
     try:
-        current_price = binance_client.get_symbol_price(TRADING_PAIR)
-        
-        # Get recent klines for chart
-        klines = binance_client.get_klines(
-            TRADING_PAIR,
-            interval='1h',
-            limit=24
-        )
-        
-        chart_data = [{
-            'time': datetime.fromtimestamp(k[0] / 1000).strftime('%Y-%m-%d %H:%M'),
-            'price': float(k[4])  # closing price
-        } for k in klines]
-        
-        return jsonify({
-            'success': True,
-            'current_price': current_price,
-            'chart_data': chart_data
-        })
+        symbol = requested_symbol()
+        return jsonify(cached('market_data', lambda: load_market_data(symbol), symbol))
     except Exception as e:
-        logger.error(f"Error fetching market data: {e}")
+        logger.error("Error fetching market data: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
+def load_market_data(symbol):
+    """Build the market data payload of a symbol."""
+    symbol_state = bot_state()['symbols'][symbol]
+    
+    # Recent candles for chart
+    chart_data = [{
+        'time': datetime.fromtimestamp(open_time / 1000).strftime('%Y-%m-%d %H:%M'),
+        'price': close
+    } for open_time, close in symbol_state['chart']]
+    
+    return {
+        'success': True,
+        'current_price': symbol_state['price'],
+        'indicators': symbol_state['indicators'],
+        'chart_data': chart_data
+    }
+
 @app.route('/api/trading_status')
 def get_trading_status():
     """Get current trading status."""
     try:
-        position_info = trading_strategy.get_position_info()
-        active_orders = order_manager.get_active_orders()
-        
-        return jsonify({
-            'success': True,
-            'position': position_info,
-            'active_orders': active_orders,
-            'trading_pair': TRADING_PAIR
-        })
+        symbol = requested_symbol()
+        return jsonify(cached('trading_status', lambda: load_trading_status(symbol), symbol))
     except Exception as e:
-        logger.error(f"Error fetching trading status: {e}")
+        logger.error("Error fetching trading status: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
+def load_trading_status(symbol):
+    """Build the position and active orders payload of a symbol."""
+    state = bot_state()
+    active_orders = {
+        order_id: order
+        for order_id, order in state['active_orders'].items()
+        if order['symbol'] == symbol
+    }
+    
+    return {
+        'success': True,
+        'position': state['symbols'][symbol]['position'],
+        'active_orders': active_orders,
+        'trading_pair': symbol
+    }
+
 @app.route('/api/account_info')
 def get_account_info():
     """Get account information."""
     try:
-        account_info = binance_client.get_account_info()
-        
-        # Filter and format balances
-        balances = [{
-            'asset': balance['asset'],
-            'free': float(balance['free']),
-            'locked': float(balance['locked'])
-        } for balance in account_info['balances']
-        if float(balance['free']) > 0 or float(balance['locked']) > 0]
-        
-        return jsonify({
+        # Non-zero balances, kept up to date from account events by the bot
+        return jsonify(cached('account_info', lambda: {
             'success': True,
-            'balances': balances
-        })
+            'balances': bot_state()['balances']
+        }))
     except Exception as e:
-        logger.error(f"Error fetching account info: {e}")
+        logger.error("Error fetching account info: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/stream')
+def stream():
+    """Server-Sent Events stream: a `snapshot` event, then `delta` events as the bot state changes."""
+    client = broadcaster.subscribe()
+
+    def events():
+        try:
+            while broadcaster.is_subscribed(client):
+                try:
+                    yield client.get(timeout=DASHBOARD_STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+        finally:
+            broadcaster.unsubscribe(client)
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/cache_stats')
+def get_cache_stats():
+    """Get response cache hit/miss counters."""
+    return jsonify({'success': True, 'cache': response_cache.get_stats()})
+
+@app.route('/metrics')
+def get_metrics():
+    """Bot and dashboard metrics in the Prometheus text format."""
+    try:
+        snapshot = bot_state().get('metrics', {})
+    except Exception as e:
+        logger.error("Error reading metrics: %s", e)
+        snapshot = {}
+    stats = response_cache.get_stats()
+    counters = list(snapshot.get('counters', [])) + [
+        {'name': f'dashboard_cache_{name}_total', 'labels': {}, 'value': stats[name]}
+        for name in ('hits', 'misses', 'coalesced')
+    ]
+    body = render_text({'counters': counters, 'histograms': snapshot.get('histograms', [])})
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 def run_dashboard():
     """Run the Flask dashboard application."""
     try:
@@ -99,7 +166,7 @@ def run_dashboard():
             debug=False  # Set to False in production
         )
     except Exception as e:
-        logger.error(f"Error running dashboard: {e}")
+        logger.error("Error running dashboard: %s", e)
         raise
 
 if __name__ == '__main__':
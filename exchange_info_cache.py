@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+from config import REST_BASE_URL, EXCHANGE_INFO_CACHE_FILE, EXCHANGE_INFO_TTL
+from logger_setup import get_logger
+
+logger = get_logger('exchange_info_cache')
+
+# Bump when the parsed rule layout changes so old cache files are ignored
+CACHE_VERSION = 2
+
+
+def step_precision(step):
+    """Number of decimals in a step string such as '0.00100000'."""
+    step = step.rstrip('0')
+    return len(step.split('.')[1]) if '.' in step else 0
+
+
+def step_units(step, precision):
+    """Step size as an integer number of 10**-precision units."""
+    return int(round(float(step) * 10 ** precision))
+
+
+def parse_symbol_rules(symbol_info):
+    """Extract the trading rules of one exchangeInfo symbol entry."""
+    rules = {
+        'status': symbol_info.get('status'),
+        'base_asset': symbol_info.get('baseAsset'),
+        'quote_asset': symbol_info.get('quoteAsset'),
+    }
+    for f in symbol_info.get('filters', []):
+        filter_type = f['filterType']
+        if filter_type == 'LOT_SIZE':
+            rules['min_qty'] = float(f['minQty'])
+            rules['max_qty'] = float(f['maxQty'])
+            rules['step_size'] = float(f['stepSize'])
+            # Fixed-point form used by OrderManager normalization
+            rules['qty_precision'] = step_precision(f['stepSize'])
+            rules['qty_step_units'] = step_units(f['stepSize'], rules['qty_precision'])
+        elif filter_type == 'PRICE_FILTER':
+            rules['min_price'] = float(f['minPrice'])
+            rules['max_price'] = float(f['maxPrice'])
+            rules['tick_size'] = float(f['tickSize'])
+            rules['price_precision'] = step_precision(f['tickSize'])
+            rules['price_tick_units'] = step_units(f['tickSize'], rules['price_precision'])
+        elif filter_type in ('MIN_NOTIONAL', 'NOTIONAL'):
+            rules['min_notional'] = float(f.get('minNotional', 0))
+    return rules
+
+
+class ExchangeInfoCache:
+    def __init__(self, binance_client, path=EXCHANGE_INFO_CACHE_FILE, ttl=EXCHANGE_INFO_TTL):
+        """Parsed exchange trading rules indexed by symbol.
+
+        Rules are persisted to `path` so later start-ups (and other processes
+        such as the dashboard) skip the multi-megabyte /v3/exchangeInfo
+        download. A stale file is still served while a background thread
+        refreshes it.
+
+        Args:
+            binance_client: Instance of BinanceClient
+            path: JSON file the parsed rules are persisted to
+            ttl: Seconds before cached rules are refreshed
+        """
+        self.binance_client = binance_client
+        self.path = path
+        self.ttl = ttl
+        self.rules = {}
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+        self.refresh_thread = None
+        self.running = False
+
+    def _load_file(self):
+        """Load persisted rules; returns False if missing, outdated or for another endpoint."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION or data.get('base_url') != REST_BASE_URL:
+                return False
+            self.rules = data['symbols']
+            self.fetched_at = data['fetched_at']
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning("Ignoring unreadable exchange info cache %s: %s", self.path, e)
+            return False
+
+    def _save_file(self):
+        """Persist rules atomically so readers never see a partial file."""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'version': CACHE_VERSION,
+                    'base_url': REST_BASE_URL,
+                    'fetched_at': self.fetched_at,
+                    'symbols': self.rules
+                }, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning("Failed to persist exchange info cache: %s", e)
+
+    def is_stale(self):
+        return time.time() - self.fetched_at >= self.ttl
+
+    def refresh(self):
+        """Download exchange info and rebuild the symbol index."""
+        exchange_info = self.binance_client.get_exchange_info()
+        rules = {s['symbol']: parse_symbol_rules(s) for s in exchange_info['symbols']}
+        with self.lock:
+            self.rules = rules
+            self.fetched_at = time.time()
+        self._save_file()
+        logger.info("Exchange info refreshed: %s symbols", len(rules))
+
+    def load(self):
+        """Load rules from disk, downloading them only if no cache exists."""
+        if self._load_file():
+            age = time.time() - self.fetched_at
+            logger.info("Loaded exchange info for %s symbols from cache (%.0fs old)", len(self.rules), age)
+            if self.is_stale():
+                threading.Thread(target=self._refresh_safely, daemon=True).start()
+        else:
+            self.refresh()
+        return self
+
+    def _refresh_safely(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error("Failed to refresh exchange info: %s", e)
+
+    def start_background_refresh(self):
+        """Refresh the rules every `ttl` seconds in a daemon thread."""
+        def refresh_job():
+            while self.running:
+                # Retry failed refreshes at most once a minute
+                delay = max(self.fetched_at + self.ttl - time.time(), 60)
+                time.sleep(delay)
+                if self.running and self.is_stale():
+                    self._refresh_safely()
+
+        self.running = True
+        self.refresh_thread = threading.Thread(target=refresh_job)
+        self.refresh_thread.daemon = True
+        self.refresh_thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def get(self, symbol):
+        """Trading rules of a symbol, or None if unknown."""
+        return self.rules.get(symbol)
+
+    def symbols(self):
+        return list(self.rules)
@@ -0,0 +1,367 @@
+import numpy as np
+from config import RSI_PERIOD, MOVING_AVERAGE_PERIOD
+
+
+def _output(value):
+    """Return plain floats for scalar state and arrays for batched state."""
+    if np.ndim(value) == 0:
+        return float(value)
+    return value
+
+
+def _state(value):
+    """Convert indicator state to plain Python values for snapshots."""
+    if value is None:
+        return None
+    return np.asarray(value).tolist()
+
+
+def _restore(value):
+    if value is None:
+        return None
+    return np.asarray(value, dtype=float)
+
+
+def ewm(values, alpha, initial):
+    """Exponential smoothing y[k] = (1 - alpha) * y[k-1] + alpha * x[k] along the last axis.
+
+    Evaluated in closed form over blocks, so the only Python loop is per
+    block rather than per element. Blocks are sized so the decay factors
+    stay within ~1e6 of each other, which keeps the result accurate.
+
+    Args:
+        values: Array of shape (..., n)
+        alpha: Smoothing factor in (0, 1]
+        initial: Value of y[-1], broadcastable to values[..., 0]
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.empty_like(values)
+    decay = 1.0 - alpha
+    y = np.asarray(initial, dtype=float)
+    if values.shape[-1] == 0:
+        return out
+    if decay <= 0:
+        out[...] = values
+        return out
+
+    block = int(min(max(np.log(1e6) / -np.log(decay), 1), 4096))
+    steps = np.arange(1, block + 1)
+    growth = decay ** -steps
+    shrink = decay ** steps
+
+    for start in range(0, values.shape[-1], block):
+        x = values[..., start:start + block]
+        m = x.shape[-1]
+        seg = (y[..., None] + alpha * np.cumsum(x * growth[:m], axis=-1)) * shrink[:m]
+        out[..., start:start + m] = seg
+        y = seg[..., -1]
+    return out
+
+
+def wilder_averages(prices, period=RSI_PERIOD):
+    """Wilder-smoothed average gain and loss for every close.
+
+    Returns:
+        (avg_gain, avg_loss) arrays shaped like prices; entries before
+        index `period` are NaN.
+    """
+    prices = np.asarray(prices, dtype=float)
+    avg_gain = np.full(prices.shape, np.nan)
+    avg_loss = np.full(prices.shape, np.nan)
+    if prices.shape[-1] <= period:
+        return avg_gain, avg_loss
+
+    deltas = np.diff(prices, axis=-1)
+    gains = np.maximum(deltas, 0.0)
+    losses = np.maximum(-deltas, 0.0)
+
+    avg_gain[..., period] = gains[..., :period].mean(axis=-1)
+    avg_loss[..., period] = losses[..., :period].mean(axis=-1)
+    avg_gain[..., period + 1:] = ewm(gains[..., period:], 1.0 / period, avg_gain[..., period])
+    avg_loss[..., period + 1:] = ewm(losses[..., period:], 1.0 / period, avg_loss[..., period])
+    return avg_gain, avg_loss
+
+
+def rsi_from_averages(avg_gain, avg_loss):
+    """RSI from average gain/loss; 100 where there were no losses."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, rsi)
+
+
+def rsi_series(prices, period=RSI_PERIOD):
+    """Wilder RSI for every close along the last axis (NaN during warm-up)."""
+    return rsi_from_averages(*wilder_averages(prices, period))
+
+
+def sma_series(prices, period=MOVING_AVERAGE_PERIOD):
+    """Simple moving average for every close along the last axis (NaN during warm-up)."""
+    prices = np.asarray(prices, dtype=float)
+    out = np.full(prices.shape, np.nan)
+    if prices.shape[-1] < period:
+        return out
+    sums = np.cumsum(prices, axis=-1)
+    out[..., period - 1] = sums[..., period - 1]
+    out[..., period:] = sums[..., period:] - sums[..., :-period]
+    return out / period
+
+
+def ema_series(prices, period=MOVING_AVERAGE_PERIOD):
+    """SMA-seeded exponential moving average along the last axis (NaN during warm-up)."""
+    prices = np.asarray(prices, dtype=float)
+    out = np.full(prices.shape, np.nan)
+    if prices.shape[-1] < period:
+        return out
+    out[..., period - 1] = prices[..., :period].mean(axis=-1)
+    out[..., period:] = ewm(prices[..., period:], 2.0 / (period + 1), out[..., period - 1])
+    return out
+
+
+class RSI:
+    def __init__(self, period=RSI_PERIOD):
+        """Streaming Relative Strength Index with Wilder smoothing.
+
+        State may be scalar or an array with one entry per symbol; every
+        update is constant time per element.
+
+        Args:
+            period: Smoothing period
+        """
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        """Clear all state."""
+        self.count = 0  # Number of price changes seen
+        self.last_price = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    @property
+    def ready(self):
+        return self.count >= self.period
+
+    def _next_averages(self, price):
+        delta = price - self.last_price
+        gain = np.maximum(delta, 0.0)
+        loss = np.maximum(-delta, 0.0)
+        if self.count < self.period:
+            # Warm-up: simple average of the first `period` changes
+            n = self.count + 1
+            return (self.avg_gain * self.count + gain) / n, (self.avg_loss * self.count + loss) / n
+        return (
+            (self.avg_gain * (self.period - 1) + gain) / self.period,
+            (self.avg_loss * (self.period - 1) + loss) / self.period
+        )
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        return _output(rsi_from_averages(avg_gain, avg_loss))
+
+    def update(self, price):
+        """Consume a closed price and return the new RSI (None until ready)."""
+        price = _restore(price)
+        if self.last_price is not None:
+            self.avg_gain, self.avg_loss = self._next_averages(price)
+            self.count += 1
+        self.last_price = price
+        return self.value
+
+    def peek(self, price):
+        """RSI if `price` were the next close, without changing state."""
+        if self.last_price is None or self.count + 1 < self.period:
+            return None
+        avg_gain, avg_loss = self._next_averages(_restore(price))
+        return self._rsi(avg_gain, avg_loss)
+
+    @property
+    def value(self):
+        if not self.ready:
+            return None
+        return self._rsi(self.avg_gain, self.avg_loss)
+
+    def seed(self, prices):
+        """Rebuild state from historical closes (last axis is time)."""
+        self.reset()
+        prices = np.asarray(prices, dtype=float)
+        if prices.shape[-1] <= self.period:
+            for i in range(prices.shape[-1]):
+                self.update(prices[..., i])
+            return self.value
+
+        avg_gain, avg_loss = wilder_averages(prices, self.period)
+        self.avg_gain = avg_gain[..., -1]
+        self.avg_loss = avg_loss[..., -1]
+        self.last_price = prices[..., -1]
+        self.count = prices.shape[-1] - 1
+        return self.value
+
+    def snapshot(self):
+        """Return the indicator state as plain Python values."""
+        return {
+            'period': self.period,
+            'count': self.count,
+            'last_price': _state(self.last_price),
+            'avg_gain': _state(self.avg_gain),
+            'avg_loss': _state(self.avg_loss)
+        }
+
+    def restore(self, state):
+        """Load state produced by snapshot()."""
+        self.period = state['period']
+        self.count = state['count']
+        self.last_price = _restore(state['last_price'])
+        self.avg_gain = _restore(state['avg_gain'])
+        self.avg_loss = _restore(state['avg_loss'])
+
+
+class SMA:
+    def __init__(self, period=MOVING_AVERAGE_PERIOD):
+        """Streaming Simple Moving Average using a running sum.
+
+        Args:
+            period: Window length
+        """
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        """Clear all state."""
+        self.count = 0
+        self.window = None  # Last `period` prices, indexed by count % period
+        self.total = 0.0
+
+    @property
+    def ready(self):
+        return self.count >= self.period
+
+    def _oldest(self):
+        """Price that leaves the window on the next update (0 while filling)."""
+        if self.count < self.period:
+            return 0.0
+        return self.window[self.count % self.period]
+
+    def update(self, price):
+        """Consume a closed price and return the new average (None until ready)."""
+        price = _restore(price)
+        if self.window is None:
+            self.window = np.zeros((self.period,) + np.shape(price))
+
+        index = self.count % self.period
+        self.total = self.total - self._oldest() + price
+        self.window[index] = price
+        self.count += 1
+
+        # Re-sum once per window to stop floating point drift accumulating
+        if index == self.period - 1:
+            self.total = self.window.sum(axis=0)
+
+        return self.value
+
+    def peek(self, price):
+        """Average if `price` were the next close, without changing state."""
+        if self.count + 1 < self.period:
+            return None
+        return _output((self.total - self._oldest() + _restore(price)) / self.period)
+
+    @property
+    def value(self):
+        if not self.ready:
+            return None
+        return _output(self.total / self.period)
+
+    def seed(self, prices):
+        """Rebuild state from historical closes (last axis is time)."""
+        self.reset()
+        prices = np.asarray(prices, dtype=float)
+        for i in range(max(prices.shape[-1] - self.period, 0), prices.shape[-1]):
+            self.update(prices[..., i])
+        return self.value
+
+    def snapshot(self):
+        """Return the indicator state as plain Python values."""
+        return {
+            'period': self.period,
+            'count': self.count,
+            'window': _state(self.window),
+            'total': _state(self.total)
+        }
+
+    def restore(self, state):
+        """Load state produced by snapshot()."""
+        self.period = state['period']
+        self.count = state['count']
+        self.window = _restore(state['window'])
+        self.total = _restore(state['total'])
+
+
+class EMA:
+    def __init__(self, period=MOVING_AVERAGE_PERIOD):
+        """Streaming Exponential Moving Average, seeded with an SMA.
+
+        Args:
+            period: Smoothing period
+        """
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.reset()
+
+    def reset(self):
+        """Clear all state."""
+        self.count = 0
+        self.ema = 0.0
+
+    @property
+    def ready(self):
+        return self.count >= self.period
+
+    def _next(self, price):
+        if self.count < self.period:
+            return (self.ema * self.count + price) / (self.count + 1)
+        return self.ema + self.alpha * (price - self.ema)
+
+    def update(self, price):
+        """Consume a closed price and return the new average (None until ready)."""
+        self.ema = self._next(_restore(price))
+        self.count += 1
+        return self.value
+
+    def peek(self, price):
+        """Average if `price` were the next close, without changing state."""
+        if self.count + 1 < self.period:
+            return None
+        return _output(self._next(_restore(price)))
+
+    @property
+    def value(self):
+        if not self.ready:
+            return None
+        return _output(self.ema)
+
+    def seed(self, prices):
+        """Rebuild state from historical closes (last axis is time)."""
+        self.reset()
+        prices = np.asarray(prices, dtype=float)
+        if prices.shape[-1] < self.period:
+            for i in range(prices.shape[-1]):
+                self.update(prices[..., i])
+            return self.value
+
+        self.ema = ema_series(prices, self.period)[..., -1]
+        self.count = prices.shape[-1]
+        return self.value
+
+    def snapshot(self):
+        """Return the indicator state as plain Python values."""
+        return {
+            'period': self.period,
+            'count': self.count,
+            'ema': _state(self.ema)
+        }
+
+    def restore(self, state):
+        """Load state produced by snapshot()."""
+        self.period = state['period']
+        self.alpha = 2.0 / (self.period + 1)
+        self.count = state['count']
+        self.ema = _restore(state['ema'])
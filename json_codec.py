@@ -0,0 +1,16 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Both decoders raise json.JSONDecodeError (orjson's error is a subclass)
+if orjson:
+    def decode(message):
+        """Parse a JSON message (str or bytes) with orjson."""
+        return orjson.loads(message)
+else:
+    decode = json.loads
+
+DECODER_NAME = 'orjson' if orjson else 'json'
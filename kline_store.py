@@ -0,0 +1,180 @@
+import asyncio
+import numpy as np
+from config import KLINE_HISTORY_SIZE
+from logger_setup import get_logger
+
+logger = get_logger('kline_store')
+
+# Column layout of stored candles
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+KLINE_COLUMNS = 6
+
+# Largest page that still costs the minimum request weight
+INCREMENTAL_FETCH_LIMIT = 99
+
+
+def parse_klines(klines):
+    """Parse raw REST klines into a (n, 6) float array."""
+    if not klines:
+        return np.empty((0, KLINE_COLUMNS))
+    return np.array([k[:KLINE_COLUMNS] for k in klines], dtype=float)
+
+
+class KlineSeries:
+    def __init__(self, max_candles):
+        """Candle history for one symbol and interval.
+
+        Args:
+            max_candles: Number of most recent candles to keep
+        """
+        self.max_candles = max_candles
+        self.data = np.empty((max_candles * 2, KLINE_COLUMNS))
+        self.count = 0
+
+    def last_open_time(self):
+        """Open time (ms) of the newest stored candle, or None when empty."""
+        if self.count == 0:
+            return None
+        return int(self.data[self.count - 1, OPEN_TIME])
+
+    def merge(self, rows):
+        """Patch the newest stored candle and append newer ones."""
+        if len(rows) == 0:
+            return 0
+
+        # Rows starting at or before our newest candle replace it in place
+        start = self.count
+        last_open = self.last_open_time()
+        if last_open is not None:
+            start = self.count - int(np.count_nonzero(self.data[:self.count, OPEN_TIME] >= rows[0, OPEN_TIME]))
+        new_candles = max(start + len(rows) - self.count, 0)
+
+        end = start + len(rows)
+        if end > len(self.data):
+            # Compact: keep only the candles that will survive the merge
+            keep = max(self.max_candles - len(rows), 0)
+            keep = min(keep, start)
+            self.data[:keep] = self.data[start - keep:start]
+            start, end = keep, keep + len(rows)
+            if end > len(self.data):
+                rows = rows[-len(self.data):]
+                start, end = 0, len(rows)
+
+        self.data[start:end] = rows
+        self.count = end
+        return new_candles
+
+    def candles(self, limit=None):
+        """Return a view of the newest candles, oldest first."""
+        size = min(self.count, self.max_candles)
+        if limit is not None:
+            size = min(size, limit)
+        return self.data[self.count - size:self.count]
+
+
+class KlineStore:
+    def __init__(self, binance_client, max_candles=KLINE_HISTORY_SIZE, async_client=None, recorder=None):
+        """Initialize the local kline store.
+
+        Args:
+            binance_client: Instance of BinanceClient
+            max_candles: Number of candles kept per symbol and interval
+            async_client: Optional started AsyncBinanceClient used by update_all()
+            recorder: Optional MarketDataRecorder capturing every fetched page
+        """
+        self.binance_client = binance_client
+        self.async_client = async_client
+        self.recorder = recorder
+        self.max_candles = max_candles
+        self.series = {}
+
+    def _get_series(self, symbol, interval):
+        key = (symbol, interval)
+        series = self.series.get(key)
+        if series is None:
+            series = KlineSeries(self.max_candles)
+            self.series[key] = series
+        return series
+
+    def _next_request(self, series):
+        """(limit, start_time) of the next request for a series.
+
+        The newest stored candle is requested again because it may still be
+        open; it is patched in place with the returned values.
+        """
+        last_open = series.last_open_time()
+        if last_open is None:
+            return self.max_candles, None
+        return INCREMENTAL_FETCH_LIMIT, last_open
+
+    def _apply(self, series, symbol, interval, klines, initial):
+        """Merge a fetched page; returns (candles added, whether to fetch again)."""
+        if self.recorder:
+            self.recorder.record_rest('/v3/klines', {'symbol': symbol, 'interval': interval}, klines)
+        rows = parse_klines(klines)
+        added = series.merge(rows)
+        if initial:
+            logger.info("Loaded %s %s candles for %s", added, interval, symbol)
+            return added, False
+        # A full page means we may still be behind (e.g. after downtime)
+        return added, added > 0 and len(rows) >= INCREMENTAL_FETCH_LIMIT
+
+    def update(self, symbol, interval):
+        """Fetch only candles newer than the stored history.
+
+        Returns:
+            Number of candles appended to the history
+        """
+        series = self._get_series(symbol, interval)
+        added = 0
+        more = True
+        while more:
+            limit, start_time = self._next_request(series)
+            klines = self.binance_client.get_klines(symbol, interval, limit=limit, start_time=start_time)
+            page_added, more = self._apply(series, symbol, interval, klines, start_time is None)
+            added += page_added
+        return added
+
+    async def update_async(self, symbol, interval):
+        """Coroutine version of update() using the async client."""
+        series = self._get_series(symbol, interval)
+        added = 0
+        more = True
+        while more:
+            limit, start_time = self._next_request(series)
+            klines = await self.async_client.get_klines(symbol, interval, limit=limit, start_time=start_time)
+            page_added, more = self._apply(series, symbol, interval, klines, start_time is None)
+            added += page_added
+        return added
+
+    async def _update_all_async(self, symbols, interval):
+        results = await asyncio.gather(
+            *(self.update_async(symbol, interval) for symbol in symbols),
+            return_exceptions=True
+        )
+        return dict(zip(symbols, results))
+
+    def update_all(self, symbols, interval):
+        """Update many symbols, concurrently when an async client is configured.
+
+        Returns:
+            {symbol: candles appended or the exception raised for that symbol}
+        """
+        if self.async_client:
+            return self.async_client.run_sync(self._update_all_async(symbols, interval))
+
+        results = {}
+        for symbol in symbols:
+            try:
+                results[symbol] = self.update(symbol, interval)
+            except Exception as e:
+                results[symbol] = e
+        return results
+
+    def get_candles(self, symbol, interval, limit=None):
+        """Get stored candles as a (n, 6) array, oldest first."""
+        return self._get_series(symbol, interval).candles(limit)
+
+    def get_closes(self, symbol, interval, limit=None):
+        """Get stored closing prices, oldest first."""
+        return self.get_candles(symbol, interval, limit)[:, CLOSE]
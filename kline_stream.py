@@ -0,0 +1,228 @@
+import json
+import threading
+import time
+import numpy as np
+import websocket
+import json_codec
+from config import WS_BASE_URL, KLINE_HISTORY_SIZE
+from logger_setup import get_logger
+from metrics import metrics
+from kline_store import OPEN_TIME, CLOSE, KLINE_COLUMNS, parse_klines
+
+logger = get_logger('kline_stream')
+
+
+class KlineRingBuffer:
+    def __init__(self, capacity):
+        """Fixed-size candle buffer.
+
+        Every row is written twice (at i and i + capacity) so the newest
+        candles are always available as one contiguous slice.
+
+        Args:
+            capacity: Maximum number of candles kept
+        """
+        self.capacity = capacity
+        self.data = np.zeros((capacity * 2, KLINE_COLUMNS))
+        self.head = 0  # Index of the newest row
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def _write(self, index, row):
+        self.data[index] = row
+        self.data[index + self.capacity] = row
+
+    def push(self, row):
+        """Insert a candle, overwriting the newest one if it has the same open time.
+
+        Returns:
+            True if a new candle was appended
+        """
+        with self.lock:
+            if self.count:
+                last_open = self.data[self.head, OPEN_TIME]
+                if row[OPEN_TIME] == last_open:
+                    self._write(self.head, row)
+                    return False
+                if row[OPEN_TIME] < last_open:
+                    return False
+                self.head = (self.head + 1) % self.capacity
+            self._write(self.head, row)
+            self.count = min(self.count + 1, self.capacity)
+            return True
+
+    def extend(self, rows):
+        """Insert several candles, oldest first."""
+        for row in rows:
+            self.push(row)
+
+    def last_open_time(self):
+        """Open time (ms) of the newest candle, or None when empty."""
+        with self.lock:
+            if self.count == 0:
+                return None
+            return int(self.data[self.head, OPEN_TIME])
+
+    def candles(self, limit=None):
+        """Return a copy of the newest candles, oldest first."""
+        with self.lock:
+            size = self.count if limit is None else min(self.count, limit)
+            end = self.head + self.capacity + 1
+            return self.data[end - size:end].copy()
+
+
+class KlineStream:
+    def __init__(self, binance_client, streams, capacity=KLINE_HISTORY_SIZE, on_candle_close=None,
+                 on_price=None, recorder=None):
+        """Push-fed kline source backed by <symbol>@kline_<interval> streams.
+
+        Exposes the same update/get_candles/get_closes interface as KlineStore
+        so TradingStrategy can use either.
+
+        Args:
+            binance_client: Instance of BinanceClient, used to seed history
+            streams: Iterable of (symbol, interval) pairs
+            capacity: Number of candles kept per stream
+            on_candle_close: Callback(symbol, interval, row) fired when a candle closes
+            on_price: Callback(symbol, price) fired on every kline update
+            recorder: Optional MarketDataRecorder capturing the seed pages and raw frames
+        """
+        self.binance_client = binance_client
+        self.streams = [(symbol.upper(), interval) for symbol, interval in streams]
+        self.capacity = capacity
+        self.on_candle_close = on_candle_close
+        self.on_price = on_price
+        self.recorder = recorder
+        self.buffers = {key: KlineRingBuffer(capacity) for key in self.streams}
+        self.ws = None
+        self.ws_url = WS_BASE_URL
+        self.running = False
+        self.reconnect_delay = 1
+        self.max_reconnect_delay = 300
+        self.message_count = metrics.counter('ws_messages_total', stream='kline')
+        self.handler_time = metrics.histogram('ws_handler_seconds', stream='kline')
+
+    def _seed(self):
+        """Backfill history over REST so indicators are usable immediately."""
+        for symbol, interval in self.streams:
+            try:
+                klines = self.binance_client.get_klines(symbol, interval, limit=self.capacity)
+                if self.recorder:
+                    self.recorder.record_rest('/v3/klines', {'symbol': symbol, 'interval': interval}, klines)
+                self.buffers[(symbol, interval)].extend(parse_klines(klines))
+                logger.info("Seeded %s %s candles for %s", len(klines), interval, symbol)
+            except Exception as e:
+                logger.error("Failed to seed klines for %s: %s", symbol, e)
+
+    def _on_message(self, ws, message):
+        """Handle incoming kline events."""
+        self.message_count.inc()
+        if self.recorder:
+            self.recorder.record_frame('kline', message)
+        started = time.perf_counter()
+        try:
+            data = json_codec.decode(message)
+            if data.get('e') != 'kline':
+                return
+
+            k = data['k']
+            key = (k['s'], k['i'])
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                return
+
+            row = (
+                float(k['t']), float(k['o']), float(k['h']),
+                float(k['l']), float(k['c']), float(k['v'])
+            )
+            buffer.push(row)
+
+            if self.on_price:
+                self.on_price(key[0], row[CLOSE])
+            if k['x'] and self.on_candle_close:
+                self.on_candle_close(key[0], key[1], row)
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse kline message: %s", e)
+        except Exception as e:
+            logger.error("Error processing kline message: %s", e)
+        finally:
+            self.handler_time.observe(time.perf_counter() - started)
+
+    def _on_error(self, ws, error):
+        """Handle WebSocket errors; the following close reconnects."""
+        logger.error("Kline stream error: %s", error)
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        """Handle WebSocket connection close and reconnect."""
+        logger.warning("Kline stream closed: %s - %s", close_status_code, close_msg)
+        self._schedule_reconnect()
+
+    def _on_open(self, ws):
+        """Subscribe to all kline streams once connected."""
+        logger.info("Kline stream connection established")
+        self.reconnect_delay = 1
+        ws.send(json.dumps({
+            'method': 'SUBSCRIBE',
+            'params': [f"{symbol.lower()}@kline_{interval}" for symbol, interval in self.streams],
+            'id': 1
+        }))
+
+    def _schedule_reconnect(self):
+        """Schedule a reconnection attempt with exponential backoff."""
+        if self.running:
+            logger.info("Reconnecting kline stream in %s seconds...", self.reconnect_delay)
+            time.sleep(self.reconnect_delay)
+            self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
+            self.connect()
+
+    def connect(self):
+        """Seed history and start the WebSocket connection."""
+        try:
+            # Re-seeding on reconnect fills any candles missed while offline
+            self._seed()
+
+            self.ws = websocket.WebSocketApp(
+                self.ws_url,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+                on_open=self._on_open
+            )
+
+            self.running = True
+
+            ws_thread = threading.Thread(target=self.ws.run_forever)
+            ws_thread.daemon = True
+            ws_thread.start()
+
+            logger.info("Kline stream started")
+
+        except Exception as e:
+            logger.error("Failed to start kline stream: %s", e)
+            self._schedule_reconnect()
+
+    def disconnect(self):
+        """Close WebSocket connection."""
+        self.running = False
+        if self.ws:
+            self.ws.close()
+        logger.info("Kline stream closed")
+
+    def update(self, symbol, interval):
+        """No-op: candles are pushed by the stream."""
+        return 0
+
+    def update_all(self, symbols, interval):
+        """No-op: candles are pushed by the stream."""
+        return {symbol: 0 for symbol in symbols}
+
+    def get_candles(self, symbol, interval, limit=None):
+        """Get buffered candles as a (n, 6) array, oldest first."""
+        buffer = self.buffers.get((symbol.upper(), interval))
+        if buffer is None:
+            return np.empty((0, KLINE_COLUMNS))
+        return buffer.candles(limit)
+
+    def get_closes(self, symbol, interval, limit=None):
+        """Get buffered closing prices, oldest first."""
+        return self.get_candles(symbol, interval, limit)[:, CLOSE]
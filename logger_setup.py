@@ -1,27 +1,64 @@
+import json
 import logging
+import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
-from config import LOG_LEVEL, LOG_FILE
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from multiprocessing.util import Finalize
+from config import LOG_LEVEL, LOG_FILE, LOG_FORMAT
 
-def setup_logger(name='crypto_trading_bot'):
-    """Configure and return a logger instance with both file and console handlers."""
-    
-    # Create logger
-    logger = logging.getLogger(name)
-    logger.setLevel(LOG_LEVEL)
-    
-    # Prevent duplicate handlers
-    if logger.handlers:
-        return logger
-    
-    # Create formatters
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as compact one-line JSON objects."""
+
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'))
+
+class ProcessQueueHandler(QueueHandler):
+    """Hand records to the logging thread of the current process.
+
+    Records below the logger level are dropped before their arguments are
+    interpolated. The message of an emitted record is interpolated on the
+    calling thread, since arguments such as order dicts can change after
+    the call; formatting and disk I/O happen on the listener thread. The
+    queue and listener are created per process so loggers configured
+    before a fork keep working in the child.
+    """
+
+    def __init__(self):
+        super().__init__(None)
+
+    def prepare(self, record):
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        get_log_queue().put_nowait(record)
+
+_pipeline = {'pid': None, 'queue': None, 'listener': None}
+# Serializes creating the pipeline so concurrent first log calls start one listener
+_pipeline_lock = threading.Lock()
+
+def create_handlers():
+    """Create the file and console handlers run by the listener thread."""
     detailed_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     console_formatter = logging.Formatter(
         '%(asctime)s - %(levelname)s - %(message)s'
     )
-    
+    handlers = []
+
     try:
         # File handler (with rotation)
         file_handler = RotatingFileHandler(
@@ -29,16 +66,54 @@ def setup_logger(name='crypto_trading_bot'):
             maxBytes=10*1024*1024,  # 10MB
             backupCount=5
         )
-        file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(
+            JsonLinesFormatter() if LOG_FORMAT == 'json' else detailed_formatter
+        )
+        handlers.append(file_handler)
     except Exception as e:
         print(f"Warning: Could not set up file logging: {e}")
-    
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
-    
+    handlers.append(console_handler)
+    return handlers
+
+def get_log_queue():
+    """Queue of this process's logging thread, starting the thread on first use."""
+    if _pipeline['pid'] != os.getpid():
+        with _pipeline_lock:
+            if _pipeline['pid'] != os.getpid():
+                log_queue = queue.SimpleQueue()
+                listener = QueueListener(log_queue, *create_handlers(), respect_handler_level=True)
+                listener.start()
+                # Drain the queue at exit, including in multiprocessing children
+                Finalize(listener, listener.stop, exitpriority=0)
+                _pipeline.update(pid=os.getpid(), queue=log_queue, listener=listener)
+    return _pipeline['queue']
+
+def _reset_pipeline_lock():
+    """Replace the lock in a forked child, where another thread may have held it."""
+    global _pipeline_lock
+    _pipeline_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pipeline_lock)
+
+_queue_handler = ProcessQueueHandler()
+
+def setup_logger(name='crypto_trading_bot'):
+    """Configure and return a logger instance writing through the background logging thread."""
+
+    # Create logger
+    logger = logging.getLogger(name)
+
+    # Prevent duplicate handlers
+    if logger.handlers:
+        return logger
+
+    logger.addHandler(_queue_handler)
+
     # Set logging level
     try:
         numeric_level = getattr(logging, LOG_LEVEL.upper())
@@ -46,7 +121,7 @@ def setup_logger(name='crypto_trading_bot'):
     except (AttributeError, TypeError) as e:
         print(f"Warning: Invalid log level {LOG_LEVEL}, defaulting to INFO")
         logger.setLevel(logging.INFO)
-    
+
     return logger
 
 # Create a default logger instance
@@ -56,4 +131,4 @@ def get_logger(name=None):
     """Get a logger instance with the specified name."""
     if name:
         return setup_logger(name)
-    return logger
\ No newline at end of file
+    return logger
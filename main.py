@@ -1,13 +1,27 @@
 import signal
 import sys
-import time
-from datetime import datetime
-from config import TRADING_PAIR, MAX_TRADES_PER_DAY
+import threading
+import clock
+from config import (
+    TRADING_PAIRS, MAX_TRADES_PER_DAY, KLINE_INTERVAL, MARKET_DATA_MODE, USE_ASYNC_CLIENT,
+    STATE_PUBLISH_INTERVAL, METRICS_PUBLISH_INTERVAL, USE_ORDER_BOOK, MARKET_DATA_RECORD_FILE,
+    ORDER_TRANSPORT, PRICE_POLL_INTERVAL
+)
 from logger_setup import get_logger
 from binance_client import BinanceClient
 from user_data_stream import UserDataStream
-from trading_strategy import TradingStrategy
+from trading_strategy import Signal
 from order_manager import OrderManager
+from scanner import MarketScanner
+from kline_store import KlineStore, OPEN_TIME, CLOSE
+from kline_stream import KlineStream
+from order_book import OrderBookStream
+from trade_journal import TradeJournal
+from balance_ledger import BalanceLedger
+from scheduler import EventScheduler
+from state_channel import StateChannel
+from metrics import metrics
+from market_recorder import MarketDataRecorder
 
 logger = get_logger('main')
 
@@ -15,11 +29,26 @@ class TradingBot:
     def __init__(self):
         self.running = False
         self.binance_client = None
+        self.async_client = None
+        self.order_client = None
         self.user_stream = None
+        self.kline_stream = None
+        self.order_book_stream = None
+        self.journal = None
+        self.recorder = None
+        self.scanner = None
         self.strategy = None
         self.order_manager = None
+        self.scheduler = None
+        self.state_channel = None
+        self.balance_ledger = None
+        self.seed_thread = None
+        self.last_publish_time = 0.0
+        # Held while the trading cycle updates candles and while a snapshot is built
+        self.state_lock = threading.RLock()
+        self.last_prices = {}  # symbol -> latest streamed or polled price
         self.last_check_time = None
-        self.check_interval = 60  # Time in seconds between trading checks
+        self.stopped = threading.Event()
 
     def initialize(self):
         """Initialize all components of the trading bot."""
@@ -29,67 +58,266 @@ class TradingBot:
             # Initialize Binance client
             self.binance_client = BinanceClient()
             logger.info("Binance client initialized")
+
+            # Correct signed request timestamps for local clock drift
+            self.binance_client.server_clock.start()
             
-            # Initialize trading strategy
-            self.strategy = TradingStrategy(self.binance_client)
-            logger.info("Trading strategy initialized")
+            # Initialize async client for concurrent market data requests
+            if USE_ASYNC_CLIENT:
+                from async_binance_client import AsyncBinanceClient
+                self.async_client = AsyncBinanceClient()
+                self.async_client.start()
+                logger.info("Async Binance client initialized")
+
+            # Record market data for replay.py
+            if MARKET_DATA_RECORD_FILE:
+                self.recorder = MarketDataRecorder(MARKET_DATA_RECORD_FILE)
+                self.recorder.start()
+
+            # Initialize evaluation scheduler; without a kline stream candle
+            # closes are timed from the clock
+            self.scheduler = EventScheduler(
+                self.handle_scheduled_evaluation,
+                candle_timer=MARKET_DATA_MODE != 'websocket'
+            )
+
+            # Initialize market data source
+            if MARKET_DATA_MODE == 'websocket':
+                kline_source = self.kline_stream = KlineStream(
+                    self.binance_client,
+                    [(symbol, KLINE_INTERVAL) for symbol in TRADING_PAIRS],
+                    on_candle_close=self.handle_candle_close,
+                    on_price=self.handle_price,
+                    recorder=self.recorder
+                )
+                logger.info("Kline stream initialized")
+            else:
+                kline_source = KlineStore(self.binance_client, async_client=self.async_client,
+                                          recorder=self.recorder)
+
+            # Initialize per-symbol trading strategies
+            self.scanner = MarketScanner(
+                self.binance_client,
+                TRADING_PAIRS,
+                kline_store=kline_source
+            )
+            self.strategy = self.scanner.strategies[TRADING_PAIRS[0]]
+            logger.info("Trading strategies initialized for %s symbols", len(TRADING_PAIRS))
             
+            # Initialize local order books used to price orders
+            if USE_ORDER_BOOK:
+                self.order_book_stream = OrderBookStream(self.binance_client, TRADING_PAIRS,
+                                                         recorder=self.recorder)
+                logger.info("Order book stream initialized")
+
+            # Initialize balance ledger, seeded once the user data stream is connected
+            self.balance_ledger = BalanceLedger(self.binance_client)
+
+            # Send orders over a persistent WebSocket API connection
+            if ORDER_TRANSPORT == 'websocket':
+                from ws_order_client import WebSocketOrderClient
+                self.order_client = WebSocketOrderClient(self.binance_client)
+                self.order_client.connect()
+                logger.info("WebSocket order client initialized")
+
+            # Initialize trade journal
+            self.journal = TradeJournal()
+            self.journal.start()
+            logger.info("Trade journal initialized")
+
             # Initialize order manager
-            self.order_manager = OrderManager(self.binance_client)
+            self.order_manager = OrderManager(
+                self.binance_client,
+                TRADING_PAIRS,
+                order_book=self.order_book_stream,
+                journal=self.journal,
+                balance_ledger=self.balance_ledger,
+                order_client=self.order_client
+            )
+            self.order_manager.exchange_info.start_background_refresh()
+            if self.recorder:
+                self.recorder.record_rules({s: self.order_manager.get_rules(s) for s in TRADING_PAIRS})
             logger.info("Order manager initialized")
+
+            # Restore positions and orders from before a restart
+            self.order_manager.restore_state(self.journal.load_state(), self.scanner.strategies)
+            self.order_manager.reconcile(self.scanner.strategies)
             
             # Initialize user data stream
             self.user_stream = UserDataStream(
                 self.binance_client,
-                message_handler=self.handle_user_data_message
+                handlers={
+                    'executionReport': self.handle_execution_report,
+                    'outboundAccountPosition': self.handle_account_position,
+                    'balanceUpdate': self.handle_balance_update
+                },
+                recorder=self.recorder,
+                on_connect=self.handle_user_stream_connect
             )
             logger.info("User data stream initialized")
+
+            # Initialize state channel read by the dashboard
+            self.state_channel = StateChannel(create=True)
+            self.publish_state()
+            logger.info("State channel initialized")
             
             return True
             
         except Exception as e:
-            logger.error(f"Failed to initialize trading bot: {e}")
+            logger.error("Failed to initialize trading bot: %s", e)
             return False
 
-    def handle_user_data_message(self, message):
-        """Handle incoming WebSocket messages."""
+    def handle_execution_report(self, message):
+        """Handle order updates from the user data stream."""
+        logger.info("Order update received: %s - %s", message['s'], message['X'])
+        self.order_manager.update_order_status(message)
+        self.scheduler.on_order_update(message)
+        self.publish_state()
+
+    def handle_account_position(self, message):
+        """Handle account position updates from the user data stream."""
+        logger.debug("Account position update received")
+        self.balance_ledger.apply_account_position(message)
+        self.publish_state()
+
+    def handle_balance_update(self, message):
+        """Handle deposits, withdrawals and transfers from the user data stream."""
+        logger.info("Balance update received: %s - %s", message['a'], message['d'])
+        self.balance_ledger.apply_balance_update(message)
+        self.publish_state()
+
+    def handle_user_stream_connect(self):
+        """(Re)seed balances once subscribed, so no account event is missed."""
+        if self.seed_thread and self.seed_thread.is_alive():
+            return
+        self.seed_thread = threading.Thread(target=self._seed_balances)
+        self.seed_thread.daemon = True
+        self.seed_thread.start()
+
+    def _seed_balances(self):
+        """Seed the balance ledger, retrying with backoff until it succeeds."""
+        delay = 1
+        while self.running:
+            try:
+                self.balance_ledger.seed()
+                self.publish_state()
+                return
+            except Exception as e:
+                logger.error("Failed to seed balance ledger, retrying in %ss: %s", delay, e)
+            if self.stopped.wait(delay):
+                return
+            delay = min(delay * 2, 60)
+
+    def handle_candle_close(self, symbol, interval, candle):
+        """Request an immediate trading cycle when a streamed candle closes."""
+        logger.debug("%s candle closed for %s", interval, symbol)
+        self.scheduler.on_candle_close(symbol, interval, candle)
+
+    def handle_price(self, symbol, price):
+        """Check stop levels on every price and publish state at most once per interval."""
+        self.last_prices[symbol] = price
+        self.scheduler.on_price(symbol, price)
+        if clock.timestamp() - self.last_publish_time >= STATE_PUBLISH_INTERVAL:
+            # Never stall the price feed behind a trading cycle; its end publishes anyway
+            self.publish_state(blocking=False)
+
+    def handle_scheduled_evaluation(self, triggers):
+        """Run a trading cycle for the scheduler and re-arm stop levels."""
+        logger.debug("Evaluation triggered by: %s", ', '.join(sorted(triggers)))
+        with self.state_lock:
+            self.execute_trading_cycle()
+
+            for symbol, strategy in self.scanner.strategies.items():
+                levels = strategy.stop_levels()
+                if levels:
+                    self.scheduler.set_stop_levels(symbol, *levels)
+                else:
+                    self.scheduler.clear_stop_levels(symbol)
+
+            self.publish_state()
+
+    def build_state(self):
+        """Snapshot of the bot state for the dashboard."""
+        kline_source = self.scanner.kline_store
+        symbols = {}
+        for symbol, strategy in self.scanner.strategies.items():
+            candles = kline_source.get_candles(symbol, KLINE_INTERVAL, limit=24)
+            price = self.last_prices.get(symbol)
+            if price is None and len(candles):
+                price = float(candles[-1, CLOSE])
+            symbols[symbol] = {
+                'price': price,
+                'chart': [[int(c[OPEN_TIME]), float(c[CLOSE])] for c in candles],
+                'position': strategy.get_position_info(),
+                'indicators': self.scanner.last_indicators.get(symbol)
+            }
+        return {
+            'updated_at': clock.timestamp(),
+            'running': self.running,
+            'last_check_time': self.last_check_time,
+            'symbols': symbols,
+            'active_orders': self.order_manager.get_active_orders(),
+            'balances': self.balance_ledger.non_zero(),
+            'metrics': metrics.snapshot()
+        }
+
+    def publish_state(self, blocking=True):
+        """Publish the current state to the dashboard channel.
+
+        Publishers run on several threads; the snapshot is built under
+        state_lock so it never sees candles mid-update. With blocking=False
+        the publish is skipped while a trading cycle holds the lock.
+        """
+        if not self.state_channel:
+            return
+        if not self.state_lock.acquire(blocking=blocking):
+            return
         try:
-            if 'e' in message:  # Check if message has an event type
-                event_type = message['e']
-                
-                if event_type == 'executionReport':
-                    # Update order status
-                    self.order_manager.update_order_status(message)
-                    
-                elif event_type == 'outboundAccountPosition':
-                    # Handle account updates
-                    logger.info("Account position update received")
-                    
-                elif event_type == 'balanceUpdate':
-                    # Handle balance updates
-                    logger.info("Balance update received")
-                    
+            self.last_publish_time = clock.timestamp()
+            self.state_channel.publish(self.build_state())
         except Exception as e:
-            logger.error(f"Error handling user data message: {e}")
+            logger.error("Failed to publish state: %s", e)
+        finally:
+            self.state_lock.release()
+
+    def _refresh_metrics(self):
+        """Republish the state while no event does, so exported metrics stay current."""
+        while not self.stopped.wait(METRICS_PUBLISH_INTERVAL):
+            if clock.timestamp() - self.last_publish_time >= METRICS_PUBLISH_INTERVAL:
+                self.publish_state(blocking=False)
+
+    def _poll_prices(self):
+        """Without a price stream, poll all prices in one request for stop levels and the dashboard."""
+        while not self.stopped.wait(PRICE_POLL_INTERVAL):
+            try:
+                prices = self.binance_client.get_all_prices()
+            except Exception as e:
+                logger.error("Failed to poll prices: %s", e)
+                continue
+            for symbol in TRADING_PAIRS:
+                if symbol in prices:
+                    self.handle_price(symbol, prices[symbol])
 
     def execute_trading_cycle(self):
         """Execute one trading cycle."""
         try:
-            # Generate trading signal
-            signal = self.strategy.generate_signal()
-            logger.info(f"Generated signal: {signal}")
+            # Generate trading signals for all symbols
+            signals = self.scanner.scan()
             
-            # Execute order based on signal
-            if signal != "HOLD":
-                order = self.order_manager.execute_order(signal, self.strategy)
+            # Execute orders based on signals
+            for symbol, signal in signals.items():
+                if signal == Signal.HOLD:
+                    continue
+                logger.info("Generated signal for %s: %s", symbol, signal)
+                order = self.order_manager.execute_order(signal, self.scanner.strategies[symbol])
                 if order:
-                    logger.info(f"Order executed: {order}")
+                    logger.info("Order executed: %s", order)
                     
             # Update last check time
-            self.last_check_time = datetime.now()
+            self.last_check_time = clock.now()
             
         except Exception as e:
-            logger.error(f"Error in trading cycle: {e}")
+            logger.error("Error in trading cycle: %s", e)
 
     def start(self):
         """Start the trading bot."""
@@ -100,29 +328,34 @@ class TradingBot:
             
             self.running = True
             
-            # Connect to user data stream
+            # Connect to user data stream; balances are seeded once it is open
             self.user_stream.connect()
+
+            if self.kline_stream:
+                self.kline_stream.connect()
+            else:
+                price_thread = threading.Thread(target=self._poll_prices)
+                price_thread.daemon = True
+                price_thread.start()
+
+            if self.order_book_stream:
+                self.order_book_stream.connect()
+
+            metrics_thread = threading.Thread(target=self._refresh_metrics)
+            metrics_thread.daemon = True
+            metrics_thread.start()
             
-            logger.info(f"Trading bot started. Trading pair: {TRADING_PAIR}")
-            logger.info(f"Maximum trades per day: {MAX_TRADES_PER_DAY}")
+            logger.info("Trading bot started. Trading pairs: %s", ', '.join(TRADING_PAIRS))
+            logger.info("Maximum trades per day: %s", MAX_TRADES_PER_DAY)
             
-            # Main trading loop
-            while self.running:
-                current_time = datetime.now()
-                
-                # Check if it's time to execute trading cycle
-                if (not self.last_check_time or 
-                    (current_time - self.last_check_time).seconds >= self.check_interval):
-                    self.execute_trading_cycle()
-                
-                # Sleep to prevent excessive CPU usage
-                time.sleep(1)
+            # Block until stop(), evaluating only when a trigger fires
+            self.scheduler.run()
                 
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt")
             self.stop()
         except Exception as e:
-            logger.error(f"Error in main trading loop: {e}")
+            logger.error("Error in main trading loop: %s", e)
             self.stop()
 
     def stop(self):
@@ -130,24 +363,55 @@ class TradingBot:
         try:
             logger.info("Stopping trading bot...")
             self.running = False
+            self.stopped.set()
+
+            if self.scheduler:
+                self.scheduler.stop()
             
             # Disconnect user data stream
             if self.user_stream:
                 self.user_stream.disconnect()
+
+            if self.kline_stream:
+                self.kline_stream.disconnect()
+
+            if self.order_book_stream:
+                self.order_book_stream.disconnect()
             
             # Cancel any active orders
             active_orders = self.order_manager.get_active_orders()
-            for order_id in active_orders:
+            for order_id in list(active_orders):
                 self.order_manager.cancel_order(order_id)
+
+            if self.order_client:
+                self.order_client.disconnect()
+
+            if self.journal:
+                self.journal.close()
+
+            if self.recorder:
+                self.recorder.close()
+            
+            self.order_manager.exchange_info.stop()
+            
+            if self.async_client:
+                self.async_client.stop()
+
+            if self.binance_client:
+                self.binance_client.server_clock.stop()
+
+            if self.state_channel:
+                self.publish_state()
+                self.state_channel.close()
             
             logger.info("Trading bot stopped")
             
         except Exception as e:
-            logger.error(f"Error stopping trading bot: {e}")
+            logger.error("Error stopping trading bot: %s", e)
 
 def signal_handler(signum, frame):
     """Handle system signals."""
-    logger.info(f"Received signal {signum}")
+    logger.info("Received signal %s", signum)
     if trading_bot:
         trading_bot.stop()
     sys.exit(0)
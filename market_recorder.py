@@ -0,0 +1,81 @@
+import gzip
+import json
+import queue
+import threading
+import time
+from logger_setup import get_logger
+
+logger = get_logger('market_recorder')
+
+# Record types
+REST = 'rest'
+FRAME = 'frame'
+RULES = 'rules'
+
+COMPRESS_LEVEL = 6
+
+
+def read_records(path):
+    """Iterate the records of a recording in the order they were written."""
+    with gzip.open(path, 'rt') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+class MarketDataRecorder:
+    def __init__(self, path):
+        """Capture REST responses and raw WebSocket frames for replay.py.
+
+        Records are gzip-compressed JSON lines stamped with the wall time
+        they were received at. Callers only enqueue; a background thread
+        serializes and compresses.
+
+        Args:
+            path: Output file, conventionally *.jsonl.gz
+        """
+        self.path = path
+        self.records = queue.Queue()
+        self.writer = None
+
+    def start(self):
+        """Start the background writer."""
+        if self.writer and self.writer.is_alive():
+            return
+        self.writer = threading.Thread(target=self._write_loop)
+        self.writer.daemon = True
+        self.writer.start()
+        logger.info("Recording market data to %s", self.path)
+
+    def _write_loop(self):
+        count = 0
+        with gzip.open(self.path, 'wt', compresslevel=COMPRESS_LEVEL) as f:
+            while True:
+                record = self.records.get()
+                if record is None:
+                    break
+                try:
+                    f.write(json.dumps(record, default=str))
+                    f.write('\n')
+                    count += 1
+                except Exception as e:
+                    logger.error("Failed to record %s: %s", record.get('type'), e)
+        logger.info("Recorded %s records to %s", count, self.path)
+
+    def record_rest(self, endpoint, params, response):
+        """Record a REST response, e.g. a /v3/klines page."""
+        self.records.put_nowait({'t': time.time(), 'type': REST, 'endpoint': endpoint,
+                                 'params': params, 'data': response})
+
+    def record_frame(self, stream, message):
+        """Record a raw WebSocket frame of a stream ('kline', 'depth' or 'user_data')."""
+        self.records.put_nowait({'t': time.time(), 'type': FRAME, 'stream': stream, 'data': message})
+
+    def record_rules(self, rules):
+        """Record the parsed trading rules of the traded symbols."""
+        self.records.put_nowait({'t': time.time(), 'type': RULES, 'data': rules})
+
+    def close(self):
+        """Write all queued records and close the file."""
+        if self.writer and self.writer.is_alive():
+            self.records.put(None)
+            self.writer.join(timeout=10)
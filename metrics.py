@@ -0,0 +1,130 @@
+import bisect
+import threading
+
+# Upper bounds (seconds) of latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    def __init__(self):
+        """Monotonically increasing count."""
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Fixed-bucket histogram; observing is a bisect and two additions."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot: above the largest bound
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'buckets': list(self.buckets),
+                'counts': list(self.counts),
+                'sum': self.sum,
+                'count': self.count
+            }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Process-wide collection of labelled counters and histograms."""
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def _get(self, metrics, factory, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = metrics.setdefault(key, factory())
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(self.counters, Counter, name, labels)
+
+    def histogram(self, name, **labels):
+        return self._get(self.histograms, Histogram, name, labels)
+
+    def inc(self, name, amount=1, **labels):
+        """Increment a counter."""
+        self.counter(name, **labels).inc(amount)
+
+    def observe(self, name, value, **labels):
+        """Record a value (seconds for latencies) in a histogram."""
+        self.histogram(name, **labels).observe(value)
+
+    def snapshot(self):
+        """JSON-serializable copy of every metric, e.g. for the state channel."""
+        with self.lock:
+            counters = list(self.counters.items())
+            histograms = list(self.histograms.items())
+        return {
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': metric.snapshot()}
+                for (name, labels), metric in counters
+            ],
+            'histograms': [
+                dict(metric.snapshot(), name=name, labels=dict(labels))
+                for (name, labels), metric in histograms
+            ]
+        }
+
+
+def _format_labels(labels, **extra):
+    labels = dict(labels, **extra)
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return '{' + pairs + '}'
+
+
+def render_text(snapshot):
+    """Render a metrics snapshot in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+    for counter in sorted(snapshot.get('counters', []), key=lambda m: m['name']):
+        name = counter['name']
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(counter['labels'])} {counter['value']}")
+
+    for histogram in sorted(snapshot.get('histograms', []), key=lambda m: m['name']):
+        name = histogram['name']
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(histogram['buckets'], histogram['counts']):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(histogram['labels'], le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(histogram['labels'], le='+Inf')} {histogram['count']}")
+        lines.append(f"{name}_sum{_format_labels(histogram['labels'])} {histogram['sum']}")
+        lines.append(f"{name}_count{_format_labels(histogram['labels'])} {histogram['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+# Registry shared by all components in this process
+metrics = MetricsRegistry()
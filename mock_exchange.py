@@ -0,0 +1,785 @@
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from aiohttp import web, WSMsgType
+from config import KLINE_INTERVAL, TRADING_PAIRS
+from logger_setup import get_logger
+from rate_limiter import request_weight, is_new_order
+from scheduler import interval_seconds
+
+logger = get_logger('mock_exchange')
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8900
+HISTORY_CANDLES = 1000
+MAX_KLINES_LIMIT = 1000
+ORDER_HISTORY_SIZE = 100000  # Finished orders kept for GET /v3/order
+QUOTE_ASSET = 'USDT'
+INITIAL_QUOTE_BALANCE = 1000000.0
+INITIAL_BASE_BALANCE = 100.0
+TICK_SIZE = 0.01
+STEP_SIZE = 0.00001
+
+ERRORS = {
+    400: (-1100, 'Illegal characters found in parameter.'),
+    429: (-1003, 'Too many requests; current limit is exceeded.'),
+    500: (-1001, 'Internal error; unable to process your request. Please try again.'),
+    503: (-1001, 'Service unavailable.'),
+}
+
+# WebSocket API method -> (HTTP method, REST endpoint, MockExchange handler) of the same operation
+WS_API_METHODS = {
+    'order.place': ('POST', '/v3/order', 'handle_new_order'),
+    'order.cancel': ('DELETE', '/v3/order', 'handle_cancel_order'),
+    'order.status': ('GET', '/v3/order', 'handle_get_order'),
+    'openOrders.status': ('GET', '/v3/openOrders', 'handle_open_orders'),
+}
+
+
+def api_error(status, code, msg, headers=None):
+    return web.json_response({'code': code, 'msg': msg}, status=status, headers=headers)
+
+
+def fmt(value):
+    return f"{value:.8f}"
+
+
+class MockMarket:
+    def __init__(self, symbols, interval, seed=None):
+        """Random-walk prices with candle history for each symbol.
+
+        Args:
+            symbols: Symbols to simulate
+            interval: Kline interval of the served candles
+            seed: Random seed for reproducible prices
+        """
+        self.rng = random.Random(seed)
+        self.interval = interval
+        self.interval_ms = interval_seconds(interval) * 1000
+        self.candles = {}  # symbol -> [[open_time, open, high, low, close, volume], ...]
+
+        now = int(time.time() * 1000)
+        current_open = now - now % self.interval_ms
+        for symbol in symbols:
+            price = self.rng.uniform(10, 50000)
+            candles = []
+            for i in range(HISTORY_CANDLES, -1, -1):
+                open_price = price
+                price *= math.exp(self.rng.gauss(0, 0.01))
+                candles.append([
+                    current_open - i * self.interval_ms, open_price,
+                    max(open_price, price) * 1.002, min(open_price, price) * 0.998,
+                    price, self.rng.uniform(10, 1000)
+                ])
+            self.candles[symbol] = candles
+
+    def price(self, symbol):
+        return self.candles[symbol][-1][4]
+
+    def tick(self):
+        """Move every price; returns [(symbol, candle, closed)] for candles that changed."""
+        now = int(time.time() * 1000)
+        updates = []
+        for symbol, candles in self.candles.items():
+            candle = candles[-1]
+            if now >= candle[0] + self.interval_ms:
+                updates.append((symbol, candle, True))
+                price = candle[4]
+                candle = [candle[0] + self.interval_ms, price, price, price, price, 0.0]
+                candles.append(candle)
+                if len(candles) > 2 * HISTORY_CANDLES:
+                    del candles[:HISTORY_CANDLES]
+            price = candle[4] * math.exp(self.rng.gauss(0, 0.0005))
+            candle[2] = max(candle[2], price)
+            candle[3] = min(candle[3], price)
+            candle[4] = price
+            candle[5] += self.rng.uniform(0, 1)
+            updates.append((symbol, candle, False))
+        return updates
+
+    def klines(self, symbol, limit=500, start_time=None, end_time=None):
+        """Candles in the GET /v3/klines response layout."""
+        rows = []
+        for open_time, open_price, high, low, close, volume in self.candles[symbol]:
+            if start_time is not None and open_time < start_time:
+                continue
+            if end_time is not None and open_time > end_time:
+                break
+            rows.append([
+                open_time, fmt(open_price), fmt(high), fmt(low), fmt(close), fmt(volume),
+                open_time + self.interval_ms - 1, fmt(volume * close), 100,
+                fmt(volume / 2), fmt(volume * close / 2), '0'
+            ])
+        if start_time is not None:
+            return rows[:limit]
+        return rows[-limit:]
+
+    def kline_event(self, symbol, candle, closed):
+        """Kline stream event for a candle."""
+        open_time, open_price, high, low, close, volume = candle
+        return {
+            'e': 'kline', 'E': int(time.time() * 1000), 's': symbol,
+            'k': {
+                't': open_time, 'T': open_time + self.interval_ms - 1, 's': symbol, 'i': self.interval,
+                'o': fmt(open_price), 'h': fmt(high), 'l': fmt(low), 'c': fmt(close), 'v': fmt(volume),
+                'x': closed
+            }
+        }
+
+
+class Subscriber:
+    def __init__(self, ws):
+        """WebSocket client with an ordered send queue drained by its own task."""
+        self.ws = ws
+        self.queue = asyncio.Queue()
+        self.streams = set()
+        self.task = asyncio.ensure_future(self._send_loop())
+
+    async def _send_loop(self):
+        while True:
+            frame = await self.queue.get()
+            if frame is None:
+                break
+            try:
+                await self.ws.send_str(frame)
+            except Exception:
+                break
+
+    def send(self, frame):
+        self.queue.put_nowait(frame)
+
+    def close(self):
+        self.queue.put_nowait(None)
+
+
+class MockExchange:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, symbols=TRADING_PAIRS, interval=KLINE_INTERVAL,
+                 latency=0.0, jitter=0.0, error_rate=0.0, error_statuses=(500,), event_latency=0.0,
+                 tick_interval=0.25, clock_skew=0.0, seed=None):
+        """Local stand-in for the Binance spot REST API and user data stream.
+
+        Serves the endpoints used by BinanceClient under /api, a user data
+        WebSocket at /ws/<listenKey> emitting executionReport and
+        outboundAccountPosition events, a market stream at /ws that
+        accepts kline SUBSCRIBE requests, and the order methods of the
+        WebSocket API at /ws-api/v3. Orders fill against a random-walk
+        price: market and marketable limit orders fill at once, other limit
+        orders rest until the price crosses them (or expire if IOC/FOK).
+        Signatures are not checked, but signed request timestamps are:
+        like Binance, they must be within recvWindow (default 5000 ms) of
+        the server time and no more than 1000 ms ahead of it.
+
+        Args:
+            host: Interface to listen on
+            port: TCP port (0 picks a free one)
+            symbols: Tradable symbols, all quoted in USDT
+            interval: Kline interval of served candles
+            latency: Seconds added to every REST response
+            jitter: Maximum random seconds added on top of `latency`
+            error_rate: Share of REST requests answered with an injected error
+            error_statuses: HTTP statuses injected errors are drawn from
+            event_latency: Seconds between an order change and its user data events
+            tick_interval: Seconds between price updates
+            clock_skew: Seconds the server clock runs ahead of the host clock
+            seed: Random seed for reproducible prices and injected errors
+        """
+        self.host = host
+        self.port = port
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.event_latency = event_latency
+        self.tick_interval = tick_interval
+        self.clock_skew = clock_skew
+        self.rng = random.Random(seed)
+        self.market = MockMarket(self.symbols, interval, seed)
+
+        self.balances = {QUOTE_ASSET: [INITIAL_QUOTE_BALANCE, 0.0]}
+        for symbol in self.symbols:
+            self.balances[self.base_asset(symbol)] = [INITIAL_BASE_BALANCE, 0.0]
+        self.orders = collections.OrderedDict()  # orderId -> order, oldest first
+        self.open_orders = {}  # orderId -> order
+        self.order_ids = itertools.count(1)
+        self.trade_ids = itertools.count(1)
+        self.listen_keys = set()
+        self.user_subscribers = set()
+        self.market_subscribers = set()
+
+        self.stats = collections.Counter()
+        self.weight_window = (0, 0)  # (minute, weight used)
+        self.order_window = (0, 0)  # (10s window, orders placed)
+        self.started_at = None
+        self.loop = None
+        self.loop_thread = None
+        self.runner = None
+
+    def server_time(self):
+        """Server time in milliseconds, including the injected clock skew."""
+        return int((time.time() + self.clock_skew) * 1000)
+
+    @staticmethod
+    def base_asset(symbol):
+        return symbol[:-len(QUOTE_ASSET)]
+
+    @property
+    def base_url(self):
+        """REST base URL to configure the clients with (REST_BASE_URL)."""
+        return f"http://{self.host}:{self.port}/api"
+
+    @property
+    def ws_url(self):
+        """WebSocket base URL to configure the streams with (WS_BASE_URL)."""
+        return f"ws://{self.host}:{self.port}/ws"
+
+    @property
+    def ws_api_url(self):
+        """WebSocket API URL to configure the order client with (WS_API_URL)."""
+        return f"ws://{self.host}:{self.port}/ws-api/v3"
+
+    def build_app(self):
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get('/api/v3/ping', self.handle_ping)
+        app.router.add_get('/api/v3/time', self.handle_time)
+        app.router.add_get('/api/v3/exchangeInfo', self.handle_exchange_info)
+        app.router.add_get('/api/v3/klines', self.handle_klines)
+        app.router.add_get('/api/v3/ticker/price', self.handle_ticker_price)
+        app.router.add_get('/api/v3/depth', self.handle_depth)
+        app.router.add_get('/api/v3/account', self.handle_account)
+        app.router.add_post('/api/v3/order', self.handle_new_order)
+        app.router.add_get('/api/v3/order', self.handle_get_order)
+        app.router.add_delete('/api/v3/order', self.handle_cancel_order)
+        app.router.add_get('/api/v3/openOrders', self.handle_open_orders)
+        app.router.add_post('/api/v3/userDataStream', self.handle_new_listen_key)
+        app.router.add_put('/api/v3/userDataStream', self.handle_keepalive_listen_key)
+        app.router.add_delete('/api/v3/userDataStream', self.handle_close_listen_key)
+        app.router.add_get('/ws', self.handle_market_stream)
+        app.router.add_get('/ws/{listen_key}', self.handle_user_stream)
+        app.router.add_get('/ws-api/v3', self.handle_ws_api)
+        app.router.add_get('/mock/stats', self.handle_stats)
+        app.on_startup.append(self._on_startup)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        """Count requests, then inject latency, errors and rate limit headers on /api."""
+        if not request.path.startswith('/api/'):
+            return await handler(request)
+
+        self.stats['requests'] += 1
+        injected = await self._inject_latency_and_errors()
+        if injected:
+            return injected
+
+        endpoint = request.path[len('/api'):]
+        params = await self._params(request)
+        request['params'] = params
+        try:
+            if 'timestamp' in params:
+                response = self._check_timestamp(params) or await handler(request)
+            else:
+                response = await handler(request)
+        except (KeyError, ValueError) as e:
+            response = api_error(400, -1102, f"Mandatory parameter missing or malformed: {e}")
+        return self._with_usage_headers(response, request.method, endpoint, params)
+
+    async def _inject_latency_and_errors(self):
+        """Sleep for the configured latency; returns an injected error response or None."""
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.rng.uniform(0, self.jitter))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            status = self.rng.choice(self.error_statuses)
+            self.stats['injected_errors'] += 1
+            code, msg = ERRORS.get(status, ERRORS[500])
+            return api_error(status, code, msg, {'Retry-After': '1'} if status in (418, 429) else None)
+        return None
+
+    def _check_timestamp(self, params):
+        """Reject signed requests stamped outside recvWindow, as Binance does."""
+        server_time = self.server_time()
+        timestamp = int(params['timestamp'])
+        if timestamp >= server_time + 1000:
+            self.stats['timestamp_errors'] += 1
+            return api_error(400, -1021, "Timestamp for this request was 1000ms ahead of the server's time.")
+        if server_time - timestamp > int(params.get('recvWindow', 5000)):
+            self.stats['timestamp_errors'] += 1
+            return api_error(400, -1021, 'Timestamp for this request is outside of the recvWindow.')
+        return None
+
+    def _with_usage_headers(self, response, method, endpoint, params):
+        now = time.time()
+        minute, used = self.weight_window
+        if int(now // 60) != minute:
+            minute, used = int(now // 60), 0
+        used += request_weight(method, endpoint, params)
+        self.weight_window = (minute, used)
+        response.headers['X-MBX-USED-WEIGHT-1M'] = str(used)
+
+        if is_new_order(method, endpoint):
+            window, placed = self.order_window
+            if int(now // 10) != window:
+                window, placed = int(now // 10), 0
+            placed += 1
+            self.order_window = (window, placed)
+            response.headers['X-MBX-ORDER-COUNT-10S'] = str(placed)
+        return response
+
+    async def _params(self, request):
+        """Request parameters from the query string or a form body.
+
+        Like Binance, other bodies (e.g. JSON) are ignored, so their
+        parameters are reported missing.
+        """
+        params = dict(request.query)
+        if request.can_read_body and request.content_type == 'application/x-www-form-urlencoded':
+            params.update(await request.post())
+        return params
+
+    async def _on_startup(self, app):
+        self.started_at = time.monotonic()
+        asyncio.ensure_future(self._tick_loop())
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                self._tick()
+            except Exception as e:
+                logger.error("Mock market tick failed: %s", e)
+
+    def _tick(self):
+        for symbol, candle, closed in self.market.tick():
+            stream = f"{symbol.lower()}@kline_{self.market.interval}"
+            frame = None
+            for subscriber in self.market_subscribers:
+                if stream in subscriber.streams:
+                    frame = frame or json.dumps(self.market.kline_event(symbol, candle, closed))
+                    subscriber.send(frame)
+        # Resting limit orders fill once the price crosses them
+        for order in list(self.open_orders.values()):
+            if self._is_marketable(order['side'], order['price'], self.market.price(order['symbol'])):
+                self._fill(order, order['price'])
+
+    # Public market data
+
+    async def handle_ping(self, request):
+        return web.json_response({})
+
+    async def handle_time(self, request):
+        return web.json_response({'serverTime': self.server_time()})
+
+    async def handle_exchange_info(self, request):
+        return web.json_response({
+            'timezone': 'UTC',
+            'serverTime': self.server_time(),
+            'rateLimits': [
+                {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 6000},
+                {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 100000}
+            ],
+            'symbols': [{
+                'symbol': symbol, 'status': 'TRADING',
+                'baseAsset': self.base_asset(symbol), 'quoteAsset': QUOTE_ASSET,
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': fmt(TICK_SIZE), 'maxPrice': '1000000.00000000',
+                     'tickSize': fmt(TICK_SIZE)},
+                    {'filterType': 'LOT_SIZE', 'minQty': fmt(STEP_SIZE), 'maxQty': '9000.00000000',
+                     'stepSize': fmt(STEP_SIZE)},
+                    {'filterType': 'NOTIONAL', 'minNotional': '5.00000000'}
+                ]
+            } for symbol in self.symbols]
+        })
+
+    def _symbol(self, params):
+        symbol = params['symbol'].upper()
+        if symbol not in self.market.candles:
+            raise ValueError(f"invalid symbol {symbol}")
+        return symbol
+
+    async def handle_klines(self, request):
+        params = request['params']
+        start_time = params.get('startTime')
+        end_time = params.get('endTime')
+        return web.json_response(self.market.klines(
+            self._symbol(params),
+            limit=min(int(params.get('limit', 500)), MAX_KLINES_LIMIT),
+            start_time=int(start_time) if start_time else None,
+            end_time=int(end_time) if end_time else None
+        ))
+
+    async def handle_ticker_price(self, request):
+        params = request['params']
+        if 'symbol' in params:
+            symbol = self._symbol(params)
+            return web.json_response({'symbol': symbol, 'price': fmt(self.market.price(symbol))})
+        return web.json_response([
+            {'symbol': symbol, 'price': fmt(self.market.price(symbol))} for symbol in self.symbols
+        ])
+
+    async def handle_depth(self, request):
+        params = request['params']
+        symbol = self._symbol(params)
+        limit = int(params.get('limit', 100))
+        price = self.market.price(symbol)
+        return web.json_response({
+            'lastUpdateId': self.stats['requests'],
+            'bids': [[fmt(price - (i + 1) * TICK_SIZE), fmt(self.rng.uniform(0.01, 5))] for i in range(limit)],
+            'asks': [[fmt(price + (i + 1) * TICK_SIZE), fmt(self.rng.uniform(0.01, 5))] for i in range(limit)]
+        })
+
+    # Account and orders
+
+    def _account_balances(self, assets=None):
+        return [
+            {'asset': asset, 'free': fmt(free), 'locked': fmt(locked)}
+            for asset, (free, locked) in self.balances.items()
+            if assets is None or asset in assets
+        ]
+
+    async def handle_account(self, request):
+        return web.json_response({
+            'canTrade': True, 'canWithdraw': True, 'canDeposit': True,
+            'updateTime': int(time.time() * 1000), 'accountType': 'SPOT',
+            'balances': self._account_balances()
+        })
+
+    @staticmethod
+    def _is_marketable(side, limit_price, market_price):
+        return market_price <= limit_price if side == 'BUY' else market_price >= limit_price
+
+    def _order_response(self, order):
+        return {
+            'symbol': order['symbol'], 'orderId': order['orderId'], 'orderListId': -1,
+            'clientOrderId': order['clientOrderId'], 'transactTime': order['updateTime'],
+            'price': fmt(order['price'] or 0), 'origQty': fmt(order['quantity']),
+            'executedQty': fmt(order['executed']), 'cummulativeQuoteQty': fmt(order['quote']),
+            'status': order['status'], 'timeInForce': order['timeInForce'], 'type': order['type'],
+            'side': order['side'], 'time': order['time'], 'updateTime': order['updateTime'],
+            'fills': order['fills']
+        }
+
+    async def handle_new_order(self, request):
+        params = request['params']
+        symbol = self._symbol(params)
+        side = params['side'].upper()
+        order_type = params['type'].upper()
+        quantity = float(params['quantity'])
+        price = float(params['price']) if order_type == 'LIMIT' else None
+        if side not in ('BUY', 'SELL') or order_type not in ('MARKET', 'LIMIT') or quantity <= 0:
+            return api_error(400, -1013, 'Invalid side, type or quantity.')
+        if order_type == 'LIMIT' and price is None:
+            return api_error(400, -1102, "Mandatory parameter 'price' was not sent.")
+
+        market_price = self.market.price(symbol)
+        reserve_price = price or market_price
+        base = self.base_asset(symbol)
+        if side == 'BUY':
+            asset, amount = QUOTE_ASSET, quantity * reserve_price
+        else:
+            asset, amount = base, quantity
+        if self.balances[asset][0] < amount:
+            return api_error(400, -2010, 'Account has insufficient balance for requested action.')
+
+        now = int(time.time() * 1000)
+        order = {
+            'symbol': symbol, 'orderId': next(self.order_ids),
+            'clientOrderId': params.get('newClientOrderId') or uuid.uuid4().hex[:22],
+            'side': side, 'type': order_type, 'timeInForce': params.get('timeInForce', 'GTC'),
+            'quantity': quantity, 'price': price, 'status': 'NEW', 'executed': 0.0, 'quote': 0.0,
+            'reserved': (asset, amount), 'time': now, 'updateTime': now, 'fills': []
+        }
+        self.orders[order['orderId']] = order
+        if len(self.orders) > ORDER_HISTORY_SIZE:
+            self.orders.popitem(last=False)
+        self.balances[asset][0] -= amount
+        self.balances[asset][1] += amount
+        self.stats['orders'] += 1
+        self._emit_order(order, 'NEW')
+
+        if order_type == 'MARKET' or self._is_marketable(side, price, market_price):
+            self._fill(order, market_price)
+        elif order['timeInForce'] in ('IOC', 'FOK'):
+            self._finish(order, 'EXPIRED')
+        else:
+            self.open_orders[order['orderId']] = order
+        return web.json_response(self._order_response(order))
+
+    def _fill(self, order, price):
+        """Fill the rest of an order at `price` and settle balances."""
+        quantity = order['quantity'] - order['executed']
+        order['executed'] = order['quantity']
+        order['quote'] += quantity * price
+        order['fills'].append({'price': fmt(price), 'qty': fmt(quantity), 'commission': '0.00000000',
+                               'commissionAsset': QUOTE_ASSET, 'tradeId': next(self.trade_ids)})
+        base = self.base_asset(order['symbol'])
+        if order['side'] == 'BUY':
+            self.balances[base][0] += quantity
+            self.balances[QUOTE_ASSET][0] -= quantity * price
+        else:
+            self.balances[base][0] -= quantity
+            self.balances[QUOTE_ASSET][0] += quantity * price
+        self.stats['fills'] += 1
+        self._finish(order, 'FILLED', last_quantity=quantity, last_price=price)
+
+    def _finish(self, order, status, last_quantity=0.0, last_price=0.0):
+        """Release the reservation of an order and report its final status."""
+        asset, amount = order['reserved']
+        self.balances[asset][1] -= amount
+        self.balances[asset][0] += amount
+        order['status'] = status
+        order['updateTime'] = int(time.time() * 1000)
+        self.open_orders.pop(order['orderId'], None)
+        execution_type = 'TRADE' if status == 'FILLED' else status
+        self._emit_order(order, execution_type, last_quantity, last_price)
+        self._emit_account({asset, QUOTE_ASSET, self.base_asset(order['symbol'])})
+
+    def _emit_order(self, order, execution_type, last_quantity=0.0, last_price=0.0):
+        now = int(time.time() * 1000)
+        self._emit({
+            'e': 'executionReport', 'E': now, 's': order['symbol'], 'c': order['clientOrderId'],
+            'S': order['side'], 'o': order['type'], 'f': order['timeInForce'], 'q': fmt(order['quantity']),
+            'p': fmt(order['price'] or 0), 'x': execution_type, 'X': order['status'], 'r': 'NONE',
+            'i': order['orderId'], 'l': fmt(last_quantity), 'z': fmt(order['executed']),
+            'L': fmt(last_price), 'n': '0', 'N': None, 'T': now,
+            't': order['fills'][-1]['tradeId'] if last_quantity else -1,
+            'w': order['status'] == 'NEW', 'm': False, 'O': order['time'],
+            'Z': fmt(order['quote']), 'Y': fmt(last_quantity * last_price), 'Q': '0.00000000'
+        })
+
+    def _emit_account(self, assets):
+        now = int(time.time() * 1000)
+        self._emit({
+            'e': 'outboundAccountPosition', 'E': now, 'u': now,
+            'B': [{'a': b['asset'], 'f': b['free'], 'l': b['locked']} for b in self._account_balances(assets)]
+        })
+
+    def _emit(self, event):
+        """Send a user data event to every user stream subscriber."""
+        if not self.user_subscribers:
+            return
+        frame = json.dumps(event)
+        self.stats['events'] += 1
+        if self.event_latency:
+            self.loop.call_later(self.event_latency, self._broadcast_user, frame)
+        else:
+            self._broadcast_user(frame)
+
+    def _broadcast_user(self, frame):
+        for subscriber in self.user_subscribers:
+            subscriber.send(frame)
+
+    def _find_order(self, params):
+        if 'orderId' in params:
+            return self.orders.get(int(params['orderId']))
+        client_order_id = params.get('origClientOrderId')
+        return next((o for o in self.orders.values() if o['clientOrderId'] == client_order_id), None)
+
+    async def handle_get_order(self, request):
+        order = self._find_order(request['params'])
+        if order is None:
+            return api_error(400, -2013, 'Order does not exist.')
+        return web.json_response(self._order_response(order))
+
+    async def handle_cancel_order(self, request):
+        order = self._find_order(request['params'])
+        if order is None or order['orderId'] not in self.open_orders:
+            return api_error(400, -2011, 'Unknown order sent.')
+        self._finish(order, 'CANCELED')
+        return web.json_response(self._order_response(order))
+
+    async def handle_open_orders(self, request):
+        symbol = request['params'].get('symbol')
+        return web.json_response([
+            self._order_response(order) for order in self.open_orders.values()
+            if symbol is None or order['symbol'] == symbol.upper()
+        ])
+
+    # User data stream
+
+    async def handle_new_listen_key(self, request):
+        listen_key = uuid.uuid4().hex * 2
+        self.listen_keys.add(listen_key)
+        return web.json_response({'listenKey': listen_key})
+
+    async def handle_keepalive_listen_key(self, request):
+        if request['params'].get('listenKey') not in self.listen_keys:
+            return api_error(400, -1125, 'This listenKey does not exist.')
+        return web.json_response({})
+
+    async def handle_close_listen_key(self, request):
+        self.listen_keys.discard(request['params'].get('listenKey'))
+        return web.json_response({})
+
+    async def handle_user_stream(self, request):
+        if request.match_info['listen_key'] not in self.listen_keys:
+            raise web.HTTPNotFound()
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        subscriber = Subscriber(ws)
+        self.user_subscribers.add(subscriber)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self.user_subscribers.discard(subscriber)
+            subscriber.close()
+        return ws
+
+    async def handle_market_stream(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        subscriber = Subscriber(ws)
+        self.market_subscribers.add(subscriber)
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                command = json.loads(message.data)
+                if command.get('method') == 'SUBSCRIBE':
+                    subscriber.streams.update(command.get('params', []))
+                elif command.get('method') == 'UNSUBSCRIBE':
+                    subscriber.streams.difference_update(command.get('params', []))
+                subscriber.send(json.dumps({'result': None, 'id': command.get('id')}))
+        finally:
+            self.market_subscribers.discard(subscriber)
+            subscriber.close()
+        return ws
+
+    # WebSocket API
+
+    async def handle_ws_api(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        subscriber = Subscriber(ws)
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    # Requests run concurrently; responses carry the request ID
+                    asyncio.ensure_future(self._ws_api_request(subscriber, json.loads(message.data)))
+        finally:
+            subscriber.close()
+        return ws
+
+    async def _ws_api_request(self, subscriber, command):
+        """Answer one WebSocket API request with the REST handler of the same operation."""
+        self.stats['ws_api_requests'] += 1
+        method = command.get('method')
+        params = command.get('params') or {}
+        response = await self._inject_latency_and_errors()
+        if response is None:
+            if method == 'ping':
+                response = web.json_response({})
+            elif method == 'time':
+                response = await self.handle_time(None)
+            elif method not in WS_API_METHODS:
+                response = api_error(400, -1020, 'This operation is not supported.')
+            else:
+                http_method, endpoint, handler_name = WS_API_METHODS[method]
+                handler = getattr(self, handler_name)
+                try:
+                    response = self._check_timestamp(params) or await handler({'params': params})
+                except (KeyError, ValueError) as e:
+                    response = api_error(400, -1102, f"Mandatory parameter missing or malformed: {e}")
+                response = self._with_usage_headers(response, http_method, endpoint, params)
+
+        frame = {'id': command.get('id'), 'status': response.status}
+        frame['result' if response.status == 200 else 'error'] = json.loads(response.text)
+        rate_limits = [{'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1,
+                        'limit': 6000, 'count': int(response.headers.get('X-MBX-USED-WEIGHT-1M', 0))}]
+        if 'X-MBX-ORDER-COUNT-10S' in response.headers:
+            rate_limits.append({'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10,
+                                'limit': 100, 'count': int(response.headers['X-MBX-ORDER-COUNT-10S'])})
+        frame['rateLimits'] = rate_limits
+        subscriber.send(json.dumps(frame))
+
+    async def handle_stats(self, request):
+        elapsed = time.monotonic() - self.started_at
+        return web.json_response(dict(
+            self.stats,
+            uptime=elapsed,
+            requests_per_second=self.stats['requests'] / elapsed if elapsed else 0.0,
+            orders_per_second=self.stats['orders'] / elapsed if elapsed else 0.0,
+            open_orders=len(self.open_orders),
+            user_subscribers=len(self.user_subscribers)
+        ))
+
+    # Lifecycle
+
+    async def _start_site(self):
+        self.runner = web.AppRunner(self.build_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+
+    def start(self):
+        """Serve from an event loop in a background thread; returns once listening."""
+        if self.loop_thread and self.loop_thread.is_alive():
+            return
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever)
+        self.loop_thread.daemon = True
+        self.loop_thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_site(), self.loop).result()
+        logger.info("Mock exchange listening on %s (user stream %s/<listenKey>)", self.base_url, self.ws_url)
+
+    def stop(self):
+        """Close all connections and stop the event loop thread."""
+        if not self.loop:
+            return
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(timeout=1)
+        self.loop = None
+        logger.info("Mock exchange stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local mock of the Binance spot API')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--symbols', default=','.join(TRADING_PAIRS), help='Comma-separated USDT pairs')
+    parser.add_argument('--interval', default=KLINE_INTERVAL, help='Kline interval of served candles')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latency added to REST responses')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra latency, up to this value')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of REST requests that fail')
+    parser.add_argument('--error-statuses', default='500', help='Comma-separated statuses of injected errors')
+    parser.add_argument('--event-latency-ms', type=float, default=0.0, help='Delay of user data events')
+    parser.add_argument('--clock-skew-ms', type=float, default=0.0,
+                        help='How far the server clock runs ahead of the host (negative: behind)')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    args = parser.parse_args()
+
+    exchange = MockExchange(
+        host=args.host,
+        port=args.port,
+        symbols=args.symbols.split(','),
+        interval=args.interval,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        error_statuses=[int(status) for status in args.error_statuses.split(',')],
+        event_latency=args.event_latency_ms / 1000,
+        clock_skew=args.clock_skew_ms / 1000,
+        seed=args.seed
+    )
+    exchange.start()
+    print(f"REST_BASE_URL={exchange.base_url}")
+    print(f"WS_BASE_URL={exchange.ws_url}")
+    print(f"WS_API_URL={exchange.ws_api_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        exchange.stop()
+
+
+if __name__ == '__main__':
+    main()
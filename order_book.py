@@ -0,0 +1,340 @@
+import bisect
+import json
+import threading
+import time
+import websocket
+import json_codec
+from config import WS_BASE_URL, ORDER_BOOK_SNAPSHOT_LIMIT
+from logger_setup import get_logger
+from metrics import metrics
+
+logger = get_logger('order_book')
+
+BID = 'BUY'
+ASK = 'SELL'
+
+
+class BookSide:
+    def __init__(self, descending):
+        """Price levels of one side of the book.
+
+        Prices are kept in an ascending list next to a price -> quantity
+        dict, so the best level is an index lookup and updates are a bisect.
+
+        Args:
+            descending: True for bids (best = highest price)
+        """
+        self.descending = descending
+        self.prices = []
+        self.quantities = {}
+
+    def clear(self):
+        self.prices = []
+        self.quantities = {}
+
+    def set(self, price, quantity):
+        """Set a level; a zero quantity removes it."""
+        if quantity == 0:
+            if self.quantities.pop(price, None) is not None:
+                del self.prices[bisect.bisect_left(self.prices, price)]
+            return
+        if price not in self.quantities:
+            bisect.insort(self.prices, price)
+        self.quantities[price] = quantity
+
+    def best(self):
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+
+    def levels(self):
+        """Iterate (price, quantity) from the best level outwards."""
+        prices = reversed(self.prices) if self.descending else self.prices
+        for price in prices:
+            yield price, self.quantities[price]
+
+
+class OrderBook:
+    def __init__(self, symbol):
+        """Local L2 order book of one symbol.
+
+        Loaded from a /v3/depth snapshot and kept current with depthUpdate
+        diff events. All reads and writes are serialized by `lock`.
+
+        Args:
+            symbol: Trading pair symbol
+        """
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = None
+        self.synced = False
+        self.updated_at = 0.0
+        self.lock = threading.RLock()
+
+    def _side(self, side):
+        return self.bids if side == BID else self.asks
+
+    def load_snapshot(self, snapshot):
+        """Replace the book with a REST depth snapshot."""
+        with self.lock:
+            self.bids.clear()
+            self.asks.clear()
+            for price, quantity in snapshot['bids']:
+                self.bids.set(float(price), float(quantity))
+            for price, quantity in snapshot['asks']:
+                self.asks.set(float(price), float(quantity))
+            self.last_update_id = snapshot['lastUpdateId']
+            self.updated_at = time.time()
+
+    def apply_diff(self, event):
+        """Apply a depthUpdate event.
+
+        Returns:
+            False if the event does not follow the book (an update was
+            missed), True otherwise; events already contained in the book
+            are ignored
+        """
+        with self.lock:
+            if event['u'] <= self.last_update_id:
+                return True
+            if event['U'] > self.last_update_id + 1:
+                return False
+            for price, quantity in event['b']:
+                self.bids.set(float(price), float(quantity))
+            for price, quantity in event['a']:
+                self.asks.set(float(price), float(quantity))
+            self.last_update_id = event['u']
+            self.updated_at = time.time()
+            return True
+
+    def best_bid(self):
+        with self.lock:
+            return self.bids.best()
+
+    def best_ask(self):
+        with self.lock:
+            return self.asks.best()
+
+    def mid_price(self):
+        with self.lock:
+            bid, ask = self.bids.best(), self.asks.best()
+            if bid is None or ask is None:
+                return None
+            return (bid + ask) / 2
+
+    def level_quantity(self, side, price):
+        """Quantity resting at exactly `price` on a side (BID or ASK)."""
+        with self.lock:
+            return self._side(side).quantities.get(price, 0.0)
+
+    def depth_to(self, side, price):
+        """Cumulative quantity on a side at prices as good as or better than `price`."""
+        with self.lock:
+            book_side = self._side(side)
+            if book_side.descending:
+                prices = book_side.prices[bisect.bisect_left(book_side.prices, price):]
+            else:
+                prices = book_side.prices[:bisect.bisect_right(book_side.prices, price)]
+            return sum(book_side.quantities[p] for p in prices)
+
+    def estimate_fill(self, order_side, quantity):
+        """Walk the book to estimate a market order of `quantity`.
+
+        Args:
+            order_side: 'BUY' (consumes asks) or 'SELL' (consumes bids)
+            quantity: Base asset quantity
+
+        Returns:
+            dict with avg_price, worst_price and slippage_pct (average price
+            relative to the best level), or None if the book cannot fill it
+        """
+        with self.lock:
+            levels = self.asks if order_side == 'BUY' else self.bids
+            best = levels.best()
+            if best is None:
+                return None
+
+            remaining = quantity
+            cost = 0.0
+            worst = best
+            for price, available in levels.levels():
+                take = min(available, remaining)
+                cost += take * price
+                remaining -= take
+                worst = price
+                if remaining <= 0:
+                    break
+            if remaining > 0:
+                return None
+
+            avg_price = cost / quantity
+            return {
+                'avg_price': avg_price,
+                'worst_price': worst,
+                'slippage_pct': abs(avg_price - best) / best * 100
+            }
+
+
+class OrderBookStream:
+    def __init__(self, binance_client, symbols, snapshot_limit=ORDER_BOOK_SNAPSHOT_LIMIT, recorder=None):
+        """Maintain local order books from <symbol>@depth@100ms diff streams.
+
+        Diffs received while a book is (re)loading are buffered and replayed
+        on top of the snapshot. A gap in update IDs marks the book unsynced
+        and triggers a new snapshot in a background thread, so the socket
+        thread never waits on REST.
+
+        Args:
+            binance_client: Instance of BinanceClient, used for depth snapshots
+            symbols: Symbols to maintain books for
+            snapshot_limit: Levels per side requested in snapshots
+            recorder: Optional MarketDataRecorder capturing snapshots and raw frames
+        """
+        self.binance_client = binance_client
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.snapshot_limit = snapshot_limit
+        self.recorder = recorder
+        self.books = {symbol: OrderBook(symbol) for symbol in self.symbols}
+        self.buffers = {symbol: [] for symbol in self.symbols}
+        self.resyncing = set()
+        self.ws = None
+        self.ws_url = WS_BASE_URL
+        self.running = False
+        self.reconnect_delay = 1
+        self.max_reconnect_delay = 300
+        self.message_count = metrics.counter('ws_messages_total', stream='depth')
+        self.handler_time = metrics.histogram('ws_handler_seconds', stream='depth')
+
+    def get_book(self, symbol):
+        """Order book of a symbol if it is in sync, else None."""
+        book = self.books.get(symbol)
+        return book if book and book.synced else None
+
+    def _request_resync(self, symbol):
+        """Start loading a snapshot unless one is already in progress; call with the book lock held."""
+        if symbol in self.resyncing:
+            return
+        self.resyncing.add(symbol)
+        thread = threading.Thread(target=self._resync, args=(symbol,))
+        thread.daemon = True
+        thread.start()
+
+    def _resync(self, symbol):
+        """Load a snapshot and replay the buffered diffs on top of it."""
+        book = self.books[symbol]
+        while self.running:
+            try:
+                snapshot = self.binance_client.get_order_book(symbol, limit=self.snapshot_limit)
+            except Exception as e:
+                logger.error("Failed to load order book snapshot for %s: %s", symbol, e)
+                time.sleep(self.reconnect_delay)
+                continue
+            if self.recorder:
+                self.recorder.record_rest('/v3/depth', {'symbol': symbol, 'limit': self.snapshot_limit}, snapshot)
+
+            with book.lock:
+                book.load_snapshot(snapshot)
+                buffered, self.buffers[symbol] = self.buffers[symbol], []
+                if all(book.apply_diff(event) for event in buffered):
+                    book.synced = True
+                    self.resyncing.discard(symbol)
+                    logger.info("Order book for %s synced at update %s", symbol, book.last_update_id)
+                    return
+                # The snapshot predates the buffered diffs; keep the rest and retry
+                self.buffers[symbol] = buffered
+            time.sleep(0.5)
+
+    def _on_message(self, ws, message):
+        """Handle incoming depthUpdate events."""
+        self.message_count.inc()
+        if self.recorder:
+            self.recorder.record_frame('depth', message)
+        started = time.perf_counter()
+        try:
+            data = json_codec.decode(message)
+            if data.get('e') != 'depthUpdate':
+                return
+
+            symbol = data['s']
+            book = self.books.get(symbol)
+            if book is None:
+                return
+
+            with book.lock:
+                if not book.synced:
+                    self.buffers[symbol].append(data)
+                    self._request_resync(symbol)
+                elif not book.apply_diff(data):
+                    logger.warning("Gap in %s depth updates after %s, resyncing", symbol, book.last_update_id)
+                    book.synced = False
+                    self.buffers[symbol] = [data]
+                    self._request_resync(symbol)
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse depth message: %s", e)
+        except Exception as e:
+            logger.error("Error processing depth message: %s", e)
+        finally:
+            self.handler_time.observe(time.perf_counter() - started)
+
+    def _on_error(self, ws, error):
+        """Handle WebSocket errors; the following close reconnects."""
+        logger.error("Depth stream error: %s", error)
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        """Handle WebSocket connection close and reconnect."""
+        logger.warning("Depth stream closed: %s - %s", close_status_code, close_msg)
+        self._schedule_reconnect()
+
+    def _on_open(self, ws):
+        """Subscribe to all depth streams once connected."""
+        logger.info("Depth stream connection established")
+        self.reconnect_delay = 1
+        # Diffs missed while disconnected cannot be recovered; reload every book
+        for book in self.books.values():
+            with book.lock:
+                book.synced = False
+                self.buffers[book.symbol] = []
+        ws.send(json.dumps({
+            'method': 'SUBSCRIBE',
+            'params': [f"{symbol.lower()}@depth@100ms" for symbol in self.symbols],
+            'id': 1
+        }))
+
+    def _schedule_reconnect(self):
+        """Schedule a reconnection attempt with exponential backoff."""
+        if self.running:
+            logger.info("Reconnecting depth stream in %s seconds...", self.reconnect_delay)
+            time.sleep(self.reconnect_delay)
+            self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
+            self.connect()
+
+    def connect(self):
+        """Start the WebSocket connection; books sync once diffs arrive."""
+        try:
+            self.ws = websocket.WebSocketApp(
+                self.ws_url,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+                on_open=self._on_open
+            )
+
+            self.running = True
+
+            ws_thread = threading.Thread(target=self.ws.run_forever)
+            ws_thread.daemon = True
+            ws_thread.start()
+
+            logger.info("Depth stream started")
+
+        except Exception as e:
+            logger.error("Failed to start depth stream: %s", e)
+            self._schedule_reconnect()
+
+    def disconnect(self):
+        """Close WebSocket connection."""
+        self.running = False
+        if self.ws:
+            self.ws.close()
+        logger.info("Depth stream closed")
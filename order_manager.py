@@ -1,76 +1,108 @@
+import time
+import uuid
 from datetime import datetime
-from decimal import Decimal, ROUND_DOWN
-from config import TRADING_PAIR, ORDER_SIZE
+import numpy as np
+import clock
+from config import TRADING_PAIRS, ORDER_SIZE, ORDER_TYPE, MAX_SLIPPAGE_PERCENTAGE
 from logger_setup import get_logger
+from metrics import metrics
 from trading_strategy import Signal
+from exchange_info_cache import ExchangeInfoCache
 
 logger = get_logger('order_manager')
 
+# Slack in 10**-precision units (not multiples of step_units) absorbing
+# binary representation error (e.g. 0.29 * 100 = 28.999999999999996)
+SNAP_EPSILON = 1e-6
+
+def snap_down(value, step_units, precision):
+    """Round value down to a multiple of step_units * 10**-precision.
+
+    A step of zero (filter disabled by the exchange) leaves the value unchanged.
+    """
+    if step_units == 0:
+        return value
+    scale = 10 ** precision
+    units = int(value * scale + SNAP_EPSILON)
+    return (units - units % step_units) / scale
+
+def snap_down_array(values, step_units, precision):
+    """Vectorized snap_down for arrays of values."""
+    values = np.asarray(values, dtype=float)
+    if step_units == 0:
+        return values
+    scale = 10 ** precision
+    units = np.floor(values * scale + SNAP_EPSILON)
+    return (units - units % step_units) / scale
+
 class OrderManager:
-    def __init__(self, binance_client):
+    def __init__(self, binance_client, symbols=None, exchange_info=None, order_book=None, journal=None,
+                 balance_ledger=None, order_client=None):
         self.client = binance_client
-        self.trading_pair = TRADING_PAIR
+        # Transport placing, cancelling and querying orders, e.g. a WebSocketOrderClient
+        self.order_client = order_client or binance_client
+        self.balance_ledger = balance_ledger  # Optional BalanceLedger used for pre-trade checks
+        self.journal = journal  # Optional TradeJournal recording orders and positions
+        self.order_book = order_book  # Optional OrderBookStream used to price orders
+        self.symbols = symbols or TRADING_PAIRS
+        self.trading_pair = self.symbols[0]
         self.order_size = ORDER_SIZE
         self.active_orders = {}
+        self.order_sent_at = {}  # client order ID -> perf_counter() at send, until its first report
+        self.exchange_info = exchange_info or ExchangeInfoCache(binance_client)
         self.initialize_trading_rules()
 
     def initialize_trading_rules(self):
-        """Initialize trading rules from exchange info."""
+        """Initialize trading rules from the exchange info cache for every traded symbol."""
         try:
-            exchange_info = self.client.get_exchange_info()
-            symbol_info = next(
-                (s for s in exchange_info['symbols'] if s['symbol'] == self.trading_pair),
-                None
-            )
-            
-            if not symbol_info:
-                raise ValueError(f"Trading pair {self.trading_pair} not found in exchange info")
+            if not self.exchange_info.rules:
+                self.exchange_info.load()
             
-            # Extract lot size filter
-            lot_size_filter = next(
-                (f for f in symbol_info['filters'] if f['filterType'] == 'LOT_SIZE'),
-                None
-            )
+            missing = [s for s in self.symbols if self.exchange_info.get(s) is None]
+            if missing:
+                # The cached rules may predate a new listing
+                self.exchange_info.refresh()
+                missing = [s for s in self.symbols if self.exchange_info.get(s) is None]
+            if missing:
+                raise ValueError(f"Trading pairs {', '.join(missing)} not found in exchange info")
             
-            if lot_size_filter:
-                self.min_qty = float(lot_size_filter['minQty'])
-                self.max_qty = float(lot_size_filter['maxQty'])
-                self.step_size = float(lot_size_filter['stepSize'])
-            
-            # Extract price filter
-            price_filter = next(
-                (f for f in symbol_info['filters'] if f['filterType'] == 'PRICE_FILTER'),
-                None
-            )
-            
-            if price_filter:
-                self.tick_size = float(price_filter['tickSize'])
-            
-            logger.info(f"Trading rules initialized for {self.trading_pair}")
+            logger.info("Trading rules initialized for %s", ', '.join(self.symbols))
             
         except Exception as e:
-            logger.error(f"Failed to initialize trading rules: {e}")
+            logger.error("Failed to initialize trading rules: %s", e)
             raise
 
-    def normalize_quantity(self, quantity):
+    def get_rules(self, symbol=None):
+        """Get the trading rules of a symbol (defaults to the first traded symbol)."""
+        symbol = symbol or self.trading_pair
+        rules = self.exchange_info.get(symbol)
+        if rules is None:
+            # The cached rules may predate a new listing
+            self.exchange_info.refresh()
+            rules = self.exchange_info.get(symbol)
+        if rules is None:
+            raise ValueError(f"Trading pair {symbol} not found in exchange info")
+        return rules
+
+    def normalize_quantity(self, quantity, symbol=None):
         """Normalize the quantity according to the lot size rules."""
-        step_size_str = f"{self.step_size:.8f}"
-        precision = len(step_size_str.split('.')[-1].rstrip('0'))
-        normalized = float(Decimal(str(quantity)).quantize(
-            Decimal(str(self.step_size)),
-            rounding=ROUND_DOWN
-        ))
-        return round(normalized, precision)
-
-    def normalize_price(self, price):
+        rules = self.get_rules(symbol)
+        return snap_down(quantity, rules['qty_step_units'], rules['qty_precision'])
+
+    def normalize_price(self, price, symbol=None):
         """Normalize the price according to the tick size rules."""
-        tick_size_str = f"{self.tick_size:.8f}"
-        precision = len(tick_size_str.split('.')[-1].rstrip('0'))
-        normalized = float(Decimal(str(price)).quantize(
-            Decimal(str(self.tick_size)),
-            rounding=ROUND_DOWN
-        ))
-        return round(normalized, precision)
+        rules = self.get_rules(symbol)
+        return snap_down(price, rules['price_tick_units'], rules['price_precision'])
+
+    def normalize_quantities(self, quantities, symbol=None):
+        """Normalize an array of quantities (e.g. order slices) in one pass."""
+        rules = self.get_rules(symbol)
+        return snap_down_array(quantities, rules['qty_step_units'], rules['qty_precision'])
+
+    def normalize_prices(self, prices, symbol=None):
+        """Normalize an array of prices (e.g. a limit order ladder) in one pass."""
+        rules = self.get_rules(symbol)
+        return snap_down_array(prices, rules['price_tick_units'], rules['price_precision'])
 
     def execute_order(self, signal, strategy):
         """Execute a trade based on the signal."""
@@ -78,7 +110,11 @@ class OrderManager:
             if signal == Signal.HOLD:
                 return None
 
-            current_price = self.client.get_symbol_price(self.trading_pair)
+            book = self.order_book.get_book(strategy.trading_pair) if self.order_book else None
+            if book:
+                current_price = book.mid_price()
+            else:
+                current_price = self.client.get_symbol_price(strategy.trading_pair)
             
             if signal == Signal.BUY:
                 return self._place_buy_order(current_price, strategy)
@@ -86,107 +122,292 @@ class OrderManager:
                 return self._place_sell_order(current_price, strategy)
             
         except Exception as e:
-            logger.error(f"Failed to execute {signal.value} order: {e}")
+            logger.error("Failed to execute %s order: %s", signal.value, e)
             return None
 
+    def has_funds(self, symbol, side, quantity, price):
+        """Pre-trade balance check against the ledger (passes when no ledger is configured or seeded)."""
+        if self.balance_ledger is None:
+            return True
+        if not self.balance_ledger.seeded:
+            # Unknown balances; leave the check to the exchange
+            logger.warning("Balance ledger not seeded, skipping pre-trade check for %s", symbol)
+            return True
+        rules = self.get_rules(symbol)
+        if side == 'BUY':
+            asset, required = rules['quote_asset'], quantity * price
+        else:
+            asset, required = rules['base_asset'], quantity
+        available = self.balance_ledger.free(asset)
+        if available < required:
+            logger.warning("Insufficient %s to %s %s %s: %s available, %s required",
+                           asset, side, quantity, symbol, available, required)
+            return False
+        return True
+
+    def _order_pricing(self, symbol, side, quantity, price):
+        """(order type, limit price, expected fill price) of an order, or None to decline it."""
+        book = self.order_book.get_book(symbol) if self.order_book else None
+        if book is None:
+            return 'MARKET', None, price
+
+        estimate = book.estimate_fill(side, quantity)
+        if estimate is None:
+            logger.warning("Order book for %s is too thin to %s %s", symbol, side, quantity)
+            return None
+        if estimate['slippage_pct'] > MAX_SLIPPAGE_PERCENTAGE:
+            logger.warning("Declining %s %s %s: estimated slippage %.3f%% exceeds %s%%",
+                           side, quantity, symbol, estimate['slippage_pct'], MAX_SLIPPAGE_PERCENTAGE)
+            return None
+
+        if ORDER_TYPE == 'LIMIT':
+            # Marketable limit: fills like the market order would, but never worse
+            return 'LIMIT', self.normalize_price(estimate['worst_price'], symbol), estimate['avg_price']
+        return 'MARKET', None, estimate['avg_price']
+
     def _place_buy_order(self, price, strategy):
         """Place a buy order."""
         try:
+            symbol = strategy.trading_pair
+            min_qty = self.get_rules(symbol)['min_qty']
+            
             # Calculate and normalize quantity
-            quantity = self.normalize_quantity(self.order_size)
+            quantity = self.normalize_quantity(self.order_size, symbol)
             
             # Check minimum quantity
-            if quantity < self.min_qty:
-                logger.warning(f"Order quantity {quantity} is below minimum {self.min_qty}")
+            if quantity < min_qty:
+                logger.warning("Order quantity %s is below minimum %s", quantity, min_qty)
                 return None
             
-            # Place market buy order
-            order = self.client.create_order(
-                symbol=self.trading_pair,
-                side='BUY',
-                order_type='MARKET',
-                quantity=quantity
-            )
+            pricing = self._order_pricing(symbol, 'BUY', quantity, price)
+            if pricing is None:
+                return None
+            order_type, limit_price, price = pricing
+
+            if not self.has_funds(symbol, 'BUY', quantity, price):
+                return None
+            
+            # Place buy order
+            order = self._submit_order(symbol, 'BUY', order_type, quantity, limit_price)
+            if order and self._expired_unfilled(order):
+                return None
             
             if order:
                 order_id = order['orderId']
                 self.active_orders[order_id] = {
-                    'symbol': self.trading_pair,
+                    'symbol': symbol,
                     'side': 'BUY',
                     'quantity': quantity,
                     'price': price,
-                    'timestamp': datetime.now()
+                    'timestamp': clock.now()
                 }
                 
                 # Update strategy position
                 strategy.update_position(Signal.BUY, price)
+                self._journal_placement(order_id, strategy)
                 
-                logger.info(f"Buy order placed successfully: {order_id}")
+                logger.info("Buy order placed successfully: %s", order_id)
                 return order
             
         except Exception as e:
-            logger.error(f"Failed to place buy order: {e}")
+            logger.error("Failed to place buy order: %s", e)
             return None
 
     def _place_sell_order(self, price, strategy):
         """Place a sell order."""
         try:
+            symbol = strategy.trading_pair
+            min_qty = self.get_rules(symbol)['min_qty']
+            
             # Calculate and normalize quantity
-            quantity = self.normalize_quantity(self.order_size)
+            quantity = self.normalize_quantity(self.order_size, symbol)
             
             # Check minimum quantity
-            if quantity < self.min_qty:
-                logger.warning(f"Order quantity {quantity} is below minimum {self.min_qty}")
+            if quantity < min_qty:
+                logger.warning("Order quantity %s is below minimum %s", quantity, min_qty)
                 return None
             
-            # Place market sell order
-            order = self.client.create_order(
-                symbol=self.trading_pair,
-                side='SELL',
-                order_type='MARKET',
-                quantity=quantity
-            )
+            pricing = self._order_pricing(symbol, 'SELL', quantity, price)
+            if pricing is None:
+                return None
+            order_type, limit_price, price = pricing
+
+            if not self.has_funds(symbol, 'SELL', quantity, price):
+                return None
+            
+            # Place sell order
+            order = self._submit_order(symbol, 'SELL', order_type, quantity, limit_price)
+            if order and self._expired_unfilled(order):
+                return None
             
             if order:
                 order_id = order['orderId']
                 self.active_orders[order_id] = {
-                    'symbol': self.trading_pair,
+                    'symbol': symbol,
                     'side': 'SELL',
                     'quantity': quantity,
                     'price': price,
-                    'timestamp': datetime.now()
+                    'timestamp': clock.now(),
+                    # Lets reconcile() reopen the position if the sell never fills
+                    'entry_price': strategy.entry_price
                 }
                 
                 # Update strategy position
                 strategy.update_position(Signal.SELL)
+                self._journal_placement(order_id, strategy)
                 
-                logger.info(f"Sell order placed successfully: {order_id}")
+                logger.info("Sell order placed successfully: %s", order_id)
                 return order
             
         except Exception as e:
-            logger.error(f"Failed to place sell order: {e}")
+            logger.error("Failed to place sell order: %s", e)
             return None
 
+    def _submit_order(self, symbol, side, order_type, quantity, limit_price):
+        """Send an order (IOC for limit orders) and time its acknowledgement.
+
+        The client order ID lets the first executionReport, which can arrive
+        before the REST response, be matched to the send time.
+        """
+        client_order_id = uuid.uuid4().hex
+        sent_at = time.perf_counter()
+        self.order_sent_at[client_order_id] = sent_at
+        try:
+            order = self.order_client.create_order(
+                symbol=symbol,
+                side=side,
+                order_type=order_type,
+                quantity=quantity,
+                price=limit_price,
+                time_in_force='IOC' if order_type == 'LIMIT' else None,
+                client_order_id=client_order_id
+            )
+        except Exception:
+            self.order_sent_at.pop(client_order_id, None)
+            raise
+        metrics.observe('order_ack_seconds', time.perf_counter() - sent_at, side=side, type=order_type)
+        return order
+
+    def _expired_unfilled(self, order):
+        """True for an order (e.g. an IOC limit) the exchange ended without filling any quantity."""
+        if order.get('status') in ('EXPIRED', 'CANCELED', 'REJECTED') and float(order.get('executedQty', 0)) == 0:
+            logger.warning("%s %s order %s ended %s without a fill",
+                           order.get('symbol'), order.get('side'), order.get('orderId'), order['status'])
+            return True
+        return False
+
+    def _journal_placement(self, order_id, strategy):
+        """Journal a placed order and the position change it caused."""
+        if self.journal:
+            self.journal.record_order(order_id, self.active_orders[order_id])
+            self.journal.record_position(strategy.trading_pair, strategy.get_position_info())
+
+    def restore_state(self, state, strategies):
+        """Restore active orders and positions rebuilt from the trade journal.
+
+        Args:
+            state: Result of TradeJournal.load_state()
+            strategies: {symbol: TradingStrategy}
+        """
+        self.active_orders.update(state['active_orders'])
+        for symbol, position_info in state['positions'].items():
+            if symbol in strategies:
+                strategies[symbol].restore_position(position_info)
+                if position_info.get('in_position'):
+                    logger.info("Restored open %s position entered at %s", symbol, position_info.get('entry_price'))
+
+    def reconcile(self, strategies=None):
+        """Reconcile active orders and the positions they opened or closed with the exchange.
+
+        Open orders come from one open-orders request; the final status of
+        each journaled order that is no longer open is queried, and the
+        position change of an order that ended without a fill is undone.
+
+        Args:
+            strategies: {symbol: TradingStrategy} whose positions are corrected
+        """
+        try:
+            open_orders = {
+                order['orderId']: order
+                for order in self.order_client.get_open_orders()
+                if order['symbol'] in self.symbols
+            }
+        except Exception as e:
+            logger.error("Failed to reconcile orders, keeping journal state: %s", e)
+            return
+
+        # Orders that finished while the bot was down
+        for order_id in [order_id for order_id in self.active_orders if order_id not in open_orders]:
+            order_info = self.active_orders.pop(order_id)
+            try:
+                final = self.order_client.get_order_status(symbol=order_info['symbol'], order_id=order_id)
+            except Exception as e:
+                logger.error("Failed to get final status of order %s: %s", order_id, e)
+                final = {}
+            status = final.get('status', 'RECONCILED')
+            logger.info("Order %s is no longer open on the exchange: %s", order_id, status)
+            if self.journal:
+                self.journal.record_order_update(order_info['symbol'], order_id, status, {
+                    'cumulative_quantity': final.get('executedQty')
+                })
+            strategy = (strategies or {}).get(order_info['symbol'])
+            if strategy and self._expired_unfilled(final):
+                self._revert_position(order_info, strategy)
+
+        # Orders the journal does not know about
+        for order_id, order in open_orders.items():
+            if order_id in self.active_orders:
+                continue
+            self.active_orders[order_id] = {
+                'symbol': order['symbol'],
+                'side': order['side'],
+                'quantity': float(order['origQty']),
+                'price': float(order['price']),
+                'timestamp': datetime.fromtimestamp(order['time'] / 1000)
+            }
+            logger.warning("Adopted open order %s for %s missing from the journal", order_id, order['symbol'])
+            if self.journal:
+                self.journal.record_order(order_id, self.active_orders[order_id])
+
+        logger.info("Reconciled %s active orders with the exchange", len(self.active_orders))
+
+    def _revert_position(self, order_info, strategy):
+        """Undo the position change of an order that never filled."""
+        if order_info['side'] == 'BUY':
+            strategy.position = False
+            strategy.entry_price = None
+            # The unfilled buy does not count against MAX_TRADES_PER_DAY
+            strategy.trades_today = max(strategy.trades_today - 1, 0)
+        else:
+            strategy.position = True
+            strategy.entry_price = order_info.get('entry_price')
+        logger.warning("Corrected %s position after unfilled %s order: in position %s",
+                       order_info['symbol'], order_info['side'], strategy.position)
+        if self.journal:
+            self.journal.record_position(order_info['symbol'], strategy.get_position_info())
+
     def cancel_order(self, order_id):
         """Cancel an active order."""
         try:
             if order_id in self.active_orders:
                 order_info = self.active_orders[order_id]
                 
-                response = self.client.cancel_order(
+                response = self.order_client.cancel_order(
                     symbol=order_info['symbol'],
                     order_id=order_id
                 )
                 
                 if response:
                     del self.active_orders[order_id]
-                    logger.info(f"Order {order_id} cancelled successfully")
+                    if self.journal:
+                        self.journal.record_order_update(order_info['symbol'], order_id, 'CANCELED')
+                    logger.info("Order %s cancelled successfully", order_id)
                     return True
             
             return False
             
         except Exception as e:
-            logger.error(f"Failed to cancel order {order_id}: {e}")
+            logger.error("Failed to cancel order %s: %s", order_id, e)
             return False
 
     def get_order_status(self, order_id):
@@ -195,7 +416,7 @@ class OrderManager:
             if order_id in self.active_orders:
                 order_info = self.active_orders[order_id]
                 
-                status = self.client.get_order_status(
+                status = self.order_client.get_order_status(
                     symbol=order_info['symbol'],
                     order_id=order_id
                 )
@@ -205,22 +426,35 @@ class OrderManager:
             return None
             
         except Exception as e:
-            logger.error(f"Failed to get status for order {order_id}: {e}")
+            logger.error("Failed to get status for order %s: %s", order_id, e)
             return None
 
     def get_active_orders(self):
-        """Get all active orders."""
-        return self.active_orders
+        """Get a copy of all active orders, safe to iterate while order updates arrive."""
+        return dict(self.active_orders)
 
     def update_order_status(self, order_update):
         """Update the status of an order based on WebSocket updates."""
         try:
             order_id = order_update['i']
+
+            sent_at = self.order_sent_at.pop(order_update.get('c'), None)
+            if sent_at is not None:
+                metrics.observe('order_report_seconds', time.perf_counter() - sent_at,
+                                execution_type=order_update.get('x'))
+
+            if self.journal:
+                self.journal.record_order_update(order_update['s'], order_id, order_update['X'], {
+                    'execution_type': order_update.get('x'),
+                    'last_quantity': order_update.get('l'),
+                    'last_price': order_update.get('L'),
+                    'cumulative_quantity': order_update.get('z')
+                })
             
             if order_id in self.active_orders:
                 if order_update['X'] in ['FILLED', 'CANCELED', 'REJECTED', 'EXPIRED']:
                     del self.active_orders[order_id]
-                    logger.info(f"Order {order_id} status updated to {order_update['X']}")
+                    logger.info("Order %s status updated to %s", order_id, order_update['X'])
                 
         except Exception as e:
-            logger.error(f"Failed to update order status: {e}")
\ No newline at end of file
+            logger.error("Failed to update order status: %s", e)
\ No newline at end of file
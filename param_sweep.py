@@ -0,0 +1,228 @@
+import argparse
+import csv
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from config import (
+    RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD, MOVING_AVERAGE_PERIOD,
+    STOP_LOSS_PERCENTAGE, TAKE_PROFIT_PERCENTAGE, TRADING_PAIR, KLINE_INTERVAL
+)
+from logger_setup import get_logger
+from indicators import rsi_series, sma_series
+from kline_store import CLOSE
+from backtester import Backtester, load_klines, fetch_klines, MS_PER_DAY
+
+logger = get_logger('param_sweep')
+
+# Swept parameter -> (Backtester argument, config/env name, type)
+PARAMETERS = {
+    'rsi_period': ('rsi_period', 'RSI_PERIOD', int),
+    'rsi_oversold': ('rsi_oversold', 'RSI_OVERSOLD', float),
+    'rsi_overbought': ('rsi_overbought', 'RSI_OVERBOUGHT', float),
+    'ma_period': ('ma_period', 'MOVING_AVERAGE_PERIOD', int),
+    'stop_loss': ('stop_loss_pct', 'STOP_LOSS_PERCENTAGE', float),
+    'take_profit': ('take_profit_pct', 'TAKE_PROFIT_PERCENTAGE', float),
+}
+
+# start:stop:step ranges are inclusive
+DEFAULT_GRID = {
+    'rsi_period': '7:21:7',
+    'rsi_oversold': '20:35:5',
+    'rsi_overbought': '65:80:5',
+    'ma_period': '10:50:10',
+    'stop_loss': '1:4:1',
+    'take_profit': '2:6:1',
+}
+
+METRICS = ('total_return_pct', 'total_pnl', 'win_rate', 'num_trades', 'max_drawdown_pct')
+LOWER_IS_BETTER = ('max_drawdown_pct',)
+TASK_CHUNK_SIZE = 16
+
+# Worker state, set up once per process by _init_worker
+_candles = None
+_closes = None
+_series = {}
+
+
+def parse_values(spec, cast):
+    """Parse '14', '7,14,21' or an inclusive 'start:stop:step' range."""
+    values = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if ':' in part:
+            start, stop, step = (float(x) for x in part.split(':'))
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            values.extend(cast(round(start + i * step, 10)) for i in range(count))
+        else:
+            values.append(cast(part))
+    if not values:
+        raise ValueError("No values in %r" % spec)
+    return sorted(set(values))
+
+
+def build_grid(specs):
+    """Every valid combination of the swept values, as dicts."""
+    names = list(PARAMETERS)
+    values = [parse_values(specs[name], PARAMETERS[name][2]) for name in names]
+    return [
+        dict(zip(names, combination))
+        for combination in itertools.product(*values)
+        if combination[names.index('rsi_oversold')] < combination[names.index('rsi_overbought')]
+    ]
+
+
+def _cached_series(kind, period):
+    key = (kind, period)
+    if key not in _series:
+        compute = rsi_series if kind == 'rsi' else sma_series
+        _series[key] = compute(_closes, period)
+    return _series[key]
+
+
+class SweepBacktester(Backtester):
+    """Backtester that reuses the worker's indicator series across combinations."""
+
+    def compute_indicators(self, closes):
+        return _cached_series('rsi', self.rsi_period), _cached_series('ma', self.ma_period)
+
+
+def _init_worker(path):
+    """Memory map the shared candle file once per worker process."""
+    global _candles, _closes
+    _candles = np.load(path, mmap_mode='r')
+    _closes = np.ascontiguousarray(_candles[:, CLOSE])
+    _series.clear()
+
+
+def _run_combination(task):
+    params, fee_rate = task
+    kwargs = {PARAMETERS[name][0]: value for name, value in params.items()}
+    result = SweepBacktester(fee_rate=fee_rate, **kwargs).run(_candles)
+    row = dict(params)
+    row.update((metric, result[metric]) for metric in METRICS)
+    return row
+
+
+class ParameterSweep:
+    def __init__(self, candles_path, grid, workers=None, fee_rate=0.0):
+        """Backtest every parameter combination in a process pool.
+
+        Candles are read from a .npy file that each worker memory maps, so
+        the price history is shared through the page cache instead of
+        being pickled to every process. Tasks are sorted so combinations
+        with the same RSI and MA periods land in the same chunk and reuse
+        their indicator series.
+
+        Args:
+            candles_path: (n, 6) float candle array saved with np.save
+            grid: Parameter dicts from build_grid
+            workers: Worker processes, defaults to the number of CPUs
+            fee_rate: Fraction of notional charged per fill
+        """
+        self.candles_path = candles_path
+        self.grid = sorted(grid, key=lambda p: (p['rsi_period'], p['ma_period']))
+        self.workers = workers or os.cpu_count() or 1
+        self.fee_rate = fee_rate
+
+    def run(self):
+        """Run all combinations; returns unranked result rows."""
+        started = time.perf_counter()
+        tasks = [(params, self.fee_rate) for params in self.grid]
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.candles_path,)) as executor:
+            results = list(executor.map(_run_combination, tasks, chunksize=TASK_CHUNK_SIZE))
+        elapsed = time.perf_counter() - started
+        logger.info("Evaluated %s combinations on %s workers in %.1fs (%.0f/s)",
+                    len(results), self.workers, elapsed, len(results) / elapsed if elapsed else 0)
+        return results
+
+
+def rank(results, sort_by='total_return_pct', min_trades=0):
+    """Sort results best first, dropping combinations with too few trades."""
+    eligible = [row for row in results if row['num_trades'] >= min_trades]
+    return sorted(eligible, key=lambda row: row[sort_by], reverse=sort_by not in LOWER_IS_BETTER)
+
+
+def format_table(rows):
+    columns = ['rank'] + list(PARAMETERS) + list(METRICS)
+    lines = [' '.join('%14s' % column for column in columns)]
+    for index, row in enumerate(rows, 1):
+        cells = [index] + [row[column] for column in columns[1:]]
+        lines.append(' '.join(
+            ('%14.2f' if isinstance(cell, float) else '%14s') % cell for cell in cells
+        ))
+    return '\n'.join(lines)
+
+
+def env_settings(row):
+    """Settings lines for .env that deploy a result row."""
+    return '\n'.join('%s=%s' % (PARAMETERS[name][1], row[name]) for name in PARAMETERS)
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(PARAMETERS) + list(METRICS))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep strategy parameters over historical klines')
+    parser.add_argument('--file', help='Candle file (.npy or Binance kline CSV)')
+    parser.add_argument('--symbol', default=TRADING_PAIR)
+    parser.add_argument('--interval', default=KLINE_INTERVAL)
+    parser.add_argument('--days', type=int, default=365, help='History to download when no file is given')
+    for name in PARAMETERS:
+        parser.add_argument('--' + name.replace('_', '-'), default=DEFAULT_GRID[name],
+                            help="Values: '14', '7,14,21' or start:stop:step (default %(default)s)")
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all CPUs)')
+    parser.add_argument('--fee-rate', type=float, default=0.0)
+    parser.add_argument('--sort-by', default='total_return_pct', choices=METRICS)
+    parser.add_argument('--min-trades', type=int, default=1)
+    parser.add_argument('--top', type=int, default=20, help='Rows to print')
+    parser.add_argument('--output', help='Write every ranked result to this CSV file')
+    args = parser.parse_args()
+
+    grid = build_grid({name: getattr(args, name) for name in PARAMETERS})
+    current = {'rsi_period': RSI_PERIOD, 'rsi_oversold': RSI_OVERSOLD, 'rsi_overbought': RSI_OVERBOUGHT,
+               'ma_period': MOVING_AVERAGE_PERIOD, 'stop_loss': STOP_LOSS_PERCENTAGE,
+               'take_profit': TAKE_PROFIT_PERCENTAGE}
+    logger.info("Sweeping %s combinations (current settings: %s)", len(grid), current)
+
+    workdir = tempfile.mkdtemp(prefix='param_sweep_')
+    try:
+        if args.file and args.file.endswith('.npy'):
+            candles_path = args.file
+        else:
+            if args.file:
+                candles = load_klines(args.file)
+            else:
+                from binance_client import BinanceClient
+                start_time = int(time.time() * 1000) - args.days * MS_PER_DAY
+                candles = fetch_klines(BinanceClient(), args.symbol, args.interval, start_time)
+            candles_path = os.path.join(workdir, 'candles.npy')
+            np.save(candles_path, np.asarray(candles, dtype=float))
+
+        results = ParameterSweep(candles_path, grid, args.workers, args.fee_rate).run()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    ranked = rank(results, args.sort_by, args.min_trades)
+    if args.output:
+        write_csv(args.output, ranked)
+        logger.info("Wrote %s results to %s", len(ranked), args.output)
+    if not ranked:
+        print("No combination made at least %s trades" % args.min_trades)
+        return
+    print(format_table(ranked[:args.top]))
+    print("\nBest by %s:\n%s" % (args.sort_by, env_settings(ranked[0])))
+
+
+if __name__ == '__main__':
+    main()
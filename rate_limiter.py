@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from config import (
+    RATE_LIMIT_WEIGHT_PER_MINUTE, RATE_LIMIT_ORDERS_PER_10S, RATE_LIMIT_ORDER_RESERVE
+)
+from logger_setup import get_logger
+
+logger = get_logger('rate_limiter')
+
+# Request priorities; lower values are served first
+PRIORITY_ORDER = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_MARKET_DATA = 2
+
+# Status codes the exchange uses for rate limiting (418 = IP ban)
+RATE_LIMIT_STATUSES = (429, 418)
+
+# Request weight per (method, endpoint); endpoints not listed cost 1
+ENDPOINT_WEIGHTS = {
+    ('GET', '/v3/account'): 20,
+    ('GET', '/v3/exchangeInfo'): 20,
+    ('GET', '/v3/klines'): 2,
+    ('GET', '/v3/ticker/price'): 2,
+    ('GET', '/v3/order'): 4,
+    ('POST', '/v3/order'): 1,
+    ('DELETE', '/v3/order'): 1,
+    ('GET', '/v3/openOrders'): 6,
+    ('POST', '/v3/userDataStream'): 2,
+    ('PUT', '/v3/userDataStream'): 2,
+}
+
+DEPTH_WEIGHTS = ((100, 5), (500, 25), (1000, 50), (5000, 250))
+
+
+def request_weight(method, endpoint, params=None):
+    """Request weight of a REST call."""
+    if endpoint == '/v3/depth':
+        limit = int((params or {}).get('limit', 100))
+        return next((weight for max_limit, weight in DEPTH_WEIGHTS if limit <= max_limit), 250)
+    if endpoint == '/v3/openOrders' and not (params or {}).get('symbol'):
+        return 80
+    if endpoint == '/v3/ticker/price' and not (params or {}).get('symbol'):
+        return 4
+    return ENDPOINT_WEIGHTS.get((method, endpoint), 1)
+
+
+def request_priority(endpoint):
+    """Priority class of a REST call."""
+    if endpoint == '/v3/order':
+        return PRIORITY_ORDER
+    if endpoint in ('/v3/account', '/v3/openOrders', '/v3/userDataStream'):
+        return PRIORITY_ACCOUNT
+    return PRIORITY_MARKET_DATA
+
+
+def is_new_order(method, endpoint):
+    """Whether the call counts against the order-count limit."""
+    return method == 'POST' and endpoint == '/v3/order'
+
+
+class TokenBucket:
+    def __init__(self, capacity, period):
+        """Token bucket refilled continuously at capacity/period tokens per second."""
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, floor=0.0):
+        """Seconds until `amount` tokens are available above `floor`."""
+        missing = amount + floor - self.tokens
+        return max(missing / self.rate, 0.0)
+
+    def sync_used(self, used):
+        """Lower the estimate to what the server reports as still available."""
+        self.tokens = min(self.tokens, self.capacity - used)
+
+
+class RateLimiter:
+    def __init__(self, weight_per_minute=RATE_LIMIT_WEIGHT_PER_MINUTE,
+                 orders_per_10s=RATE_LIMIT_ORDERS_PER_10S, order_reserve=RATE_LIMIT_ORDER_RESERVE):
+        """Client-side limiter for request weight and order count.
+
+        Shared by every client in the process. Market-data requests may not
+        use the share of the weight budget reserved for orders, and they
+        wait while any higher-priority request is waiting. The estimate is
+        corrected from X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* headers,
+        and 429/418 responses block all requests until Retry-After.
+
+        Args:
+            weight_per_minute: REQUEST_WEIGHT limit per minute
+            orders_per_10s: ORDERS limit per 10 seconds
+            order_reserve: Fraction of the weight budget only orders may use
+        """
+        self.weight = TokenBucket(weight_per_minute, 60.0)
+        self.orders = TokenBucket(orders_per_10s, 10.0)
+        self.reserve = weight_per_minute * order_reserve
+        self.blocked_until = 0.0
+        self.waiting = {PRIORITY_ORDER: 0, PRIORITY_ACCOUNT: 0, PRIORITY_MARKET_DATA: 0}
+        self.lock = threading.Lock()
+
+    def _try_acquire(self, weight, priority, orders):
+        """Consume tokens if allowed now; otherwise return seconds to wait."""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        self.weight.refill(now)
+        self.orders.refill(now)
+
+        # Let waiting higher-priority requests go first
+        if any(self.waiting[p] for p in self.waiting if p < priority):
+            return 0.05
+
+        floor = 0.0 if priority == PRIORITY_ORDER else self.reserve
+        wait = self.weight.wait_time(weight, floor)
+        if orders:
+            wait = max(wait, self.orders.wait_time(orders))
+        if wait > 0:
+            return wait
+
+        self.weight.tokens -= weight
+        self.orders.tokens -= orders
+        return 0.0
+
+    def acquire(self, weight=1, priority=PRIORITY_MARKET_DATA, orders=0):
+        """Block until the request may be sent."""
+        registered = False
+        try:
+            while True:
+                with self.lock:
+                    wait = self._try_acquire(weight, priority, orders)
+                    if wait == 0:
+                        return
+                    if not registered:
+                        self.waiting[priority] += 1
+                        registered = True
+                logger.debug("Rate limiter delaying request by %.2fs", wait)
+                time.sleep(wait)
+        finally:
+            if registered:
+                with self.lock:
+                    self.waiting[priority] -= 1
+
+    async def acquire_async(self, weight=1, priority=PRIORITY_MARKET_DATA, orders=0):
+        """Wait without blocking the event loop until the request may be sent."""
+        registered = False
+        try:
+            while True:
+                with self.lock:
+                    wait = self._try_acquire(weight, priority, orders)
+                    if wait == 0:
+                        return
+                    if not registered:
+                        self.waiting[priority] += 1
+                        registered = True
+                await asyncio.sleep(wait)
+        finally:
+            if registered:
+                with self.lock:
+                    self.waiting[priority] -= 1
+
+    def update_from_headers(self, headers):
+        """Sync the estimates with the usage reported by the exchange.
+
+        Args:
+            headers: Case-insensitive response headers
+        """
+        with self.lock:
+            used_weight = headers.get('X-MBX-USED-WEIGHT-1M')
+            if used_weight is not None:
+                self.weight.sync_used(int(used_weight))
+            order_count = headers.get('X-MBX-ORDER-COUNT-10S')
+            if order_count is not None:
+                self.orders.sync_used(int(order_count))
+
+    def on_rate_limited(self, status_code, retry_after=None):
+        """Block all requests after a 429/418 response.
+
+        Returns:
+            Seconds until requests are allowed again
+        """
+        delay = float(retry_after) if retry_after else 60.0
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.weight.tokens = min(self.weight.tokens, 0.0)
+        if status_code == 418:
+            logger.error("IP banned by the exchange, pausing requests for %.0fs", delay)
+        else:
+            logger.warning("Rate limit exceeded, pausing requests for %.0fs", delay)
+        return delay
+
+    def get_status(self):
+        """Current limiter state for monitoring."""
+        with self.lock:
+            now = time.monotonic()
+            self.weight.refill(now)
+            self.orders.refill(now)
+            return {
+                'weight_available': self.weight.tokens,
+                'orders_available': self.orders.tokens,
+                'blocked_for': max(self.blocked_until - now, 0.0)
+            }
+
+
+# Limiter shared by all clients in this process
+shared_rate_limiter = RateLimiter()
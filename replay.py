@@ -0,0 +1,362 @@
+import argparse
+import bisect
+import itertools
+import json
+import os
+import time
+import clock
+import json_codec
+from config import TRADING_PAIRS, KLINE_INTERVAL
+from logger_setup import get_logger
+from market_recorder import read_records, REST, FRAME, RULES
+from exchange_info_cache import ExchangeInfoCache, parse_symbol_rules
+from kline_store import KlineStore, CLOSE
+from scanner import MarketScanner
+from order_manager import OrderManager
+from balance_ledger import BalanceLedger
+from scheduler import EventScheduler
+from main import TradingBot
+
+logger = get_logger('replay')
+
+DEFAULT_QUOTE_BALANCE = 10000.0
+QUOTE_ASSETS = ('USDT', 'FDUSD', 'USDC', 'BUSD', 'BTC', 'ETH', 'BNB')
+# Evaluations chained by order updates within one instant before giving up
+MAX_CHAINED_EVALUATIONS = 100
+# Records closer together than this are applied before evaluating, like the
+# pages of one scan or a burst of frames
+BATCH_WINDOW = 1.0
+
+
+def default_rules(symbol):
+    """Trading rules used for symbols a recording has no rules for."""
+    quote = next((q for q in QUOTE_ASSETS if symbol.endswith(q) and symbol != q), 'USDT')
+    return parse_symbol_rules({
+        'symbol': symbol, 'status': 'TRADING', 'baseAsset': symbol[:-len(quote)], 'quoteAsset': quote,
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'minPrice': '0.01', 'maxPrice': '1000000', 'tickSize': '0.01'},
+            {'filterType': 'LOT_SIZE', 'minQty': '0.00001', 'maxQty': '9000', 'stepSize': '0.00001'},
+            {'filterType': 'NOTIONAL', 'minNotional': '5'}
+        ]
+    })
+
+
+class CandleTimeline:
+    def __init__(self):
+        """Latest known version of every candle of one symbol and interval."""
+        self.rows = {}  # open time -> raw kline row
+        self.open_times = []
+
+    def update(self, row):
+        """Store a candle; returns True if it starts a new candle after an existing one."""
+        open_time = int(row[0])
+        is_new = open_time not in self.rows
+        if is_new:
+            bisect.insort(self.open_times, open_time)
+        self.rows[open_time] = row
+        return is_new and len(self.open_times) > 1 and open_time == self.open_times[-1]
+
+    def klines(self, limit, start_time=None):
+        if start_time is None:
+            first = max(len(self.open_times) - limit, 0)
+        else:
+            first = bisect.bisect_left(self.open_times, start_time)
+        return [self.rows[t] for t in self.open_times[first:first + limit]]
+
+    def last(self):
+        return self.rows[self.open_times[-1]] if self.open_times else None
+
+
+class ReplayClient:
+    def __init__(self, rules, quote_balance=DEFAULT_QUOTE_BALANCE):
+        """BinanceClient stand-in serving recorded candles as of the simulated clock.
+
+        Orders fill immediately at the latest replayed close (limit orders
+        only if marketable); the resulting executionReport and
+        outboundAccountPosition events are queued in `events` for delivery.
+
+        Args:
+            rules: {symbol: trading rules}
+            quote_balance: Starting free balance of every quote asset
+        """
+        self.rules = rules
+        self.timelines = {}  # (symbol, interval) -> CandleTimeline
+        self.balances = {}
+        for symbol_rules in rules.values():
+            self.balances[symbol_rules['quote_asset']] = quote_balance
+            self.balances.setdefault(symbol_rules['base_asset'], 0.0)
+        self.initial_balances = dict(self.balances)
+        self.events = []
+        self.fills = []
+        self.order_ids = itertools.count(1)
+
+    def timeline(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self.timelines:
+            self.timelines[key] = CandleTimeline()
+        return self.timelines[key]
+
+    def _now_ms(self):
+        return int(clock.timestamp() * 1000)
+
+    def get_klines(self, symbol, interval, limit=500, start_time=None):
+        return self.timeline(symbol, interval).klines(limit, start_time)
+
+    def get_symbol_price(self, symbol):
+        for (timeline_symbol, _), timeline in self.timelines.items():
+            if timeline_symbol == symbol and timeline.last():
+                return float(timeline.last()[CLOSE])
+        raise ValueError(f"No replayed price for {symbol}")
+
+    def get_account_info(self):
+        return {
+            'updateTime': self._now_ms(),
+            'balances': [{'asset': asset, 'free': str(free), 'locked': '0'}
+                         for asset, free in self.balances.items()]
+        }
+
+    def get_open_orders(self, symbol=None):
+        return []
+
+    def create_order(self, symbol, side, order_type, quantity=None, price=None, time_in_force=None,
+                     client_order_id=None):
+        rules = self.rules[symbol]
+        market_price = self.get_symbol_price(symbol)
+        order_id = next(self.order_ids)
+        marketable = order_type == 'MARKET' or (
+            market_price <= price if side == 'BUY' else market_price >= price
+        )
+        status = 'FILLED' if marketable else 'EXPIRED'
+        if marketable:
+            sign = 1 if side == 'BUY' else -1
+            self.balances[rules['base_asset']] += sign * quantity
+            self.balances[rules['quote_asset']] -= sign * quantity * market_price
+            self.fills.append({
+                'time': clock.now().isoformat(timespec='seconds'), 'symbol': symbol, 'side': side,
+                'quantity': quantity, 'price': market_price
+            })
+
+        now = self._now_ms()
+        self.events.append({
+            'e': 'executionReport', 'E': now, 's': symbol, 'c': client_order_id, 'S': side, 'o': order_type,
+            'q': str(quantity), 'x': 'TRADE' if marketable else 'EXPIRED', 'X': status, 'i': order_id,
+            'l': str(quantity if marketable else 0), 'z': str(quantity if marketable else 0),
+            'L': str(market_price if marketable else 0), 'T': now
+        })
+        self.events.append({
+            'e': 'outboundAccountPosition', 'E': now, 'u': now,
+            'B': [{'a': asset, 'f': str(self.balances[asset]), 'l': '0'}
+                  for asset in (rules['base_asset'], rules['quote_asset'])]
+        })
+        return {'symbol': symbol, 'orderId': order_id, 'clientOrderId': client_order_id, 'status': status,
+                'executedQty': str(quantity if marketable else 0)}
+
+    def cancel_order(self, symbol, order_id):
+        return {'symbol': symbol, 'orderId': order_id, 'status': 'CANCELED'}
+
+
+class Replayer:
+    def __init__(self, path, symbols=None, interval=KLINE_INTERVAL, speed=None,
+                 quote_balance=DEFAULT_QUOTE_BALANCE):
+        """Replay a market data recording through TradingBot on a simulated clock.
+
+        Candle closes are detected from the replayed data (a kline page
+        with a new candle, or a closed kline frame) rather than timed, so
+        evaluations see the same data the recorded bot saw. Recorded
+        user data and depth frames are skipped; orders are filled by
+        ReplayClient.
+
+        Args:
+            path: Recording written by MarketDataRecorder
+            symbols: Symbols to trade; defaults to those in the recorded rules
+            interval: Kline interval evaluated
+            speed: Simulated seconds per wall second, or None for as fast as possible
+            quote_balance: Starting balance of the quote asset
+        """
+        self.path = path
+        self.symbols = symbols
+        self.interval = interval
+        self.speed = speed
+        self.quote_balance = quote_balance
+        self.rules = {}
+        self.client = None
+        self.bot = None
+        self.sim_clock = None
+        self.wall_start = None
+        self.sim_start = None
+        self.last_update_time = None
+        self.stats = {'records': 0, 'market_updates': 0, 'skipped': 0, 'evaluations': 0}
+
+    def _build_bot(self):
+        symbols = self.symbols or list(self.rules) or TRADING_PAIRS
+        rules = {symbol: self.rules.get(symbol) or default_rules(symbol) for symbol in symbols}
+        self.client = ReplayClient(rules, self.quote_balance)
+
+        bot = TradingBot()
+        bot.binance_client = self.client
+        bot.scheduler = EventScheduler(self._evaluate, interval=self.interval, candle_timer=False)
+        bot.scanner = MarketScanner(self.client, symbols, kline_store=KlineStore(self.client))
+        bot.scanner.interval = self.interval
+        for strategy in bot.scanner.strategies.values():
+            strategy.interval = self.interval
+        bot.strategy = bot.scanner.strategies[symbols[0]]
+        bot.balance_ledger = BalanceLedger(self.client)
+        bot.balance_ledger.seed()
+        exchange_info = ExchangeInfoCache(self.client, path=os.devnull)
+        exchange_info.rules = rules
+        exchange_info.fetched_at = clock.timestamp()
+        bot.order_manager = OrderManager(self.client, symbols, exchange_info=exchange_info,
+                                         balance_ledger=bot.balance_ledger)
+        bot.running = True
+        self.bot = bot
+
+    def _evaluate(self, triggers):
+        self.stats['evaluations'] += 1
+        self.bot.handle_scheduled_evaluation(triggers)
+
+    def _market_update(self, record):
+        """Apply a record to the candle timelines; returns (symbol, row, closed) or None."""
+        if record['type'] == REST and record['endpoint'] == '/v3/klines':
+            params = record['params']
+            if params['interval'] != self.interval or not record['data']:
+                return None
+            timeline = self.client.timeline(params['symbol'], self.interval)
+            closed = False
+            for row in record['data']:
+                closed = timeline.update(row) or closed
+            return params['symbol'], record['data'][-1], closed
+        if record['type'] == FRAME and record['stream'] == 'kline':
+            k = json_codec.decode(record['data']).get('k')
+            if not k or k['i'] != self.interval:
+                return None
+            row = [k['t'], k['o'], k['h'], k['l'], k['c'], k['v']]
+            self.client.timeline(k['s'], self.interval).update(row)
+            return k['s'], row, k['x']
+        return None
+
+    def _pace(self, timestamp):
+        """Hold the replay back to `speed` times real time."""
+        if self.speed:
+            delay = self.wall_start + (timestamp - self.sim_start) / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def _advance(self, timestamp):
+        """Move the simulated clock to `timestamp`, firing timers due on the way."""
+        while True:
+            deadline = self.bot.scheduler.next_deadline()
+            if deadline is None or deadline > timestamp:
+                break
+            self._pace(deadline)
+            self.sim_clock.advance_to(deadline)
+            self._run_pending()
+        self._pace(timestamp)
+        self.sim_clock.advance_to(timestamp)
+
+    def _run_pending(self):
+        """Run triggered evaluations and deliver the order events they cause."""
+        for _ in range(MAX_CHAINED_EVALUATIONS):
+            self.bot.scheduler.run_pending()
+            if not self.client.events:
+                return
+            events, self.client.events = self.client.events, []
+            for event in events:
+                if event['e'] == 'executionReport':
+                    self.bot.handle_execution_report(event)
+                else:
+                    self.bot.handle_account_position(event)
+        logger.warning("Stopped chaining evaluations at %s", self.sim_clock.now())
+
+    def run(self):
+        """Replay the whole recording; returns a summary dict."""
+        previous_clock = None
+        self.wall_start = time.perf_counter()
+        try:
+            for record in read_records(self.path):
+                self.stats['records'] += 1
+                if record['type'] == RULES:
+                    self.rules.update(record['data'])
+                    continue
+
+                if self.bot is None:
+                    if not (record['type'] == REST and record['endpoint'] == '/v3/klines'
+                            or record['type'] == FRAME and record['stream'] == 'kline'):
+                        self.stats['skipped'] += 1
+                        continue
+                    self.sim_clock = clock.SimulatedClock(record['t'])
+                    self.sim_start = record['t']
+                    previous_clock = clock.set_clock(self.sim_clock)
+                    self._build_bot()
+                    self.bot.scheduler.request_evaluation('startup')
+                elif record['t'] - self.last_update_time > BATCH_WINDOW:
+                    self._run_pending()
+
+                self._advance(record['t'])
+                update = self._market_update(record)
+                if update is None:
+                    self.stats['skipped'] += 1
+                    continue
+                self.stats['market_updates'] += 1
+                self.last_update_time = record['t']
+                symbol, row, closed = update
+                self.bot.handle_price(symbol, float(row[CLOSE]))
+                if closed:
+                    self.bot.handle_candle_close(symbol, self.interval, row)
+            if self.bot:
+                self._run_pending()
+        finally:
+            if previous_clock is not None:
+                clock.set_clock(previous_clock)
+
+        return self.summary()
+
+    def summary(self):
+        wall_seconds = time.perf_counter() - self.wall_start
+        simulated_seconds = (self.sim_clock.timestamp() - self.sim_start) if self.sim_clock else 0.0
+        result = dict(self.stats, wall_seconds=wall_seconds, simulated_seconds=simulated_seconds,
+                      speedup=simulated_seconds / wall_seconds if wall_seconds else 0.0)
+        if self.client:
+            result['fills'] = self.client.fills
+            result['initial_balances'] = self.client.initial_balances
+            result['balances'] = self.client.balances
+            result['positions'] = {
+                symbol: strategy.get_position_info() for symbol, strategy in self.bot.scanner.strategies.items()
+            }
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded market data through the trading bot')
+    parser.add_argument('recording', help='File written with MARKET_DATA_RECORD_FILE')
+    parser.add_argument('--speed', type=float, help='Simulated seconds per second (default: as fast as possible)')
+    parser.add_argument('--symbols', help='Comma-separated symbols (default: those in the recording)')
+    parser.add_argument('--interval', default=KLINE_INTERVAL)
+    parser.add_argument('--quote-balance', type=float, default=DEFAULT_QUOTE_BALANCE)
+    parser.add_argument('--output', help='Write the summary as JSON to this file')
+    args = parser.parse_args()
+
+    replayer = Replayer(
+        args.recording,
+        symbols=args.symbols.split(',') if args.symbols else None,
+        interval=args.interval,
+        speed=args.speed,
+        quote_balance=args.quote_balance
+    )
+    summary = replayer.run()
+
+    print(f"Replayed {summary['records']} records ({summary['market_updates']} market updates) "
+          f"covering {summary['simulated_seconds'] / 3600:.1f}h in {summary['wall_seconds']:.2f}s "
+          f"({summary['speedup']:.0f}x)")
+    print(f"Evaluations: {summary['evaluations']}, fills: {len(summary.get('fills', []))}")
+    for fill in summary.get('fills', []):
+        print(f"  {fill['time']} {fill['side']:<4} {fill['quantity']} {fill['symbol']} @ {fill['price']:.2f}")
+    if 'balances' in summary:
+        print("Balances: " + ', '.join(f"{asset} {amount:.8g}" for asset, amount in summary['balances'].items()))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import time
+import numpy as np
+from config import TRADING_PAIRS, KLINE_INTERVAL, RSI_PERIOD, MOVING_AVERAGE_PERIOD
+from logger_setup import get_logger
+from metrics import metrics
+from kline_store import KlineStore, OPEN_TIME, CLOSE
+from indicators import RSI, SMA
+from trading_strategy import TradingStrategy, Signal
+
+logger = get_logger('scanner')
+
+# Candles read per symbol on an incremental scan; older gaps trigger a re-seed
+RECENT_WINDOW = 16
+
+
+class MarketScanner:
+    def __init__(self, binance_client, symbols=TRADING_PAIRS, kline_store=None):
+        """Evaluate the strategy for many symbols with batched indicators.
+
+        Every symbol keeps its own TradingStrategy (position, entry price,
+        trade count), while RSI and SMA state is held as one vector over all
+        symbols and updated from a stacked (symbols x bars) close matrix.
+
+        Args:
+            binance_client: Instance of BinanceClient
+            symbols: Symbols to track
+            kline_store: Shared candle source (KlineStore or KlineStream)
+        """
+        self.binance_client = binance_client
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.interval = KLINE_INTERVAL
+        self.kline_store = kline_store or KlineStore(binance_client)
+        self.strategies = {
+            symbol: TradingStrategy(binance_client, kline_store=self.kline_store, symbol=symbol)
+            for symbol in self.symbols
+        }
+
+        self.rsi = RSI(RSI_PERIOD)
+        self.ma = SMA(MOVING_AVERAGE_PERIOD)
+        self.aligned_symbols = []
+        self.last_fed_open_time = None
+        self.last_indicators = {}
+
+    def _stack(self, symbols):
+        """Stack the newest candles of each symbol into a (symbols, bars, 6) array."""
+        candles = [self.kline_store.get_candles(symbol, self.interval) for symbol in symbols]
+        bars = min(len(c) for c in candles)
+        return np.stack([c[len(c) - bars:] for c in candles])
+
+    def _reseed(self, symbols):
+        """Rebuild the vector indicator state from the full stored history."""
+        matrix = self._stack(symbols)
+        closed = matrix[:, :-1, CLOSE]
+        self.rsi.seed(closed)
+        self.ma.seed(closed)
+        self.aligned_symbols = symbols
+        self.last_fed_open_time = matrix[0, -2, OPEN_TIME] if matrix.shape[1] > 1 else None
+        logger.info("Seeded indicators for %s symbols over %s candles", len(symbols), closed.shape[1])
+        return matrix[:, -1]
+
+    def update_indicators(self):
+        """Refresh the batched indicators.
+
+        Only symbols whose newest candle has the common latest open time are
+        evaluated; a lagging symbol is skipped for the cycle and the others
+        are re-seeded without it.
+
+        Returns:
+            (symbols, current candles, rsi, ma) for the evaluated symbols
+        """
+        recent = {
+            symbol: self.kline_store.get_candles(symbol, self.interval, RECENT_WINDOW)
+            for symbol in self.symbols
+        }
+        recent = {symbol: c for symbol, c in recent.items() if len(c) > 1}
+        if not recent:
+            return [], None, None, None
+
+        current_open = max(c[-1, OPEN_TIME] for c in recent.values())
+        symbols = [symbol for symbol, c in recent.items() if c[-1, OPEN_TIME] == current_open]
+        lagging = len(recent) - len(symbols)
+        if lagging:
+            logger.warning("%s symbols have no %s candle at %s", lagging, self.interval, int(current_open))
+
+        bars = min(len(recent[symbol]) for symbol in symbols)
+        matrix = np.stack([recent[symbol][-bars:] for symbol in symbols])
+        open_times = matrix[0, :-1, OPEN_TIME]
+
+        if (symbols != self.aligned_symbols or self.last_fed_open_time is None
+                or open_times[0] > self.last_fed_open_time):
+            current = self._reseed(symbols)
+        else:
+            for column in np.flatnonzero(open_times > self.last_fed_open_time):
+                self.rsi.update(matrix[:, column, CLOSE])
+                self.ma.update(matrix[:, column, CLOSE])
+            self.last_fed_open_time = open_times[-1]
+            current = matrix[:, -1]
+
+        prices = current[:, CLOSE]
+        return symbols, current, self.rsi.peek(prices), self.ma.peek(prices)
+
+    def scan(self):
+        """Update candles and return {symbol: Signal} for every tracked symbol."""
+        signals = {symbol: Signal.HOLD for symbol in self.symbols}
+        started = time.perf_counter()
+        try:
+            results = self.kline_store.update_all(self.symbols, self.interval)
+            for symbol, result in results.items():
+                if isinstance(result, Exception):
+                    logger.error("Failed to update klines for %s: %s", symbol, result)
+
+            symbols, current, rsi, ma = self.update_indicators()
+            if rsi is None or ma is None:
+                logger.warning("Unable to calculate indicators")
+                return signals
+
+            for i, symbol in enumerate(symbols):
+                price = current[i, CLOSE]
+                self.last_indicators[symbol] = {
+                    'price': float(price),
+                    'rsi': float(rsi[i]),
+                    'ma': float(ma[i])
+                }
+                strategy = self.strategies[symbol]
+                strategy.should_reset_trade_count()
+                signals[symbol] = strategy.evaluate(price, rsi[i], ma[i])
+
+        except Exception as e:
+            logger.error("Error scanning symbols: %s", e)
+
+        metrics.observe('signal_generation_seconds', time.perf_counter() - started, component='scanner')
+        return signals
@@ -0,0 +1,185 @@
+import queue
+import threading
+import clock
+from config import (
+    KLINE_INTERVAL, SCHEDULER_TRIGGERS, SCHEDULER_INTERVAL, CANDLE_CLOSE_DELAY
+)
+from logger_setup import get_logger
+
+logger = get_logger('scheduler')
+
+TRIGGER_CANDLE_CLOSE = 'candle_close'
+TRIGGER_STOP_LEVEL = 'stop_level'
+TRIGGER_ORDER_UPDATE = 'order_update'
+TRIGGER_INTERVAL = 'interval'
+
+INTERVAL_UNITS = {'m': 60, 'h': 60 * 60, 'd': 24 * 60 * 60, 'w': 7 * 24 * 60 * 60}
+
+
+def interval_seconds(interval):
+    """Length of a kline interval such as '15m' or '1h', in seconds."""
+    return int(interval[:-1]) * INTERVAL_UNITS[interval[-1]]
+
+
+class EventScheduler:
+    def __init__(self, callback, triggers=SCHEDULER_TRIGGERS, interval=KLINE_INTERVAL,
+                 candle_timer=True, poll_interval=SCHEDULER_INTERVAL):
+        """Run strategy evaluations when something relevant happens.
+
+        Triggers:
+            candle_close: a candle closed (pushed by the kline stream, or a
+                timer aligned to the interval boundary when candle_timer is set)
+            stop_level: a streamed or polled price crossed a registered stop level
+            order_update: an order was filled, cancelled, rejected or expired
+            interval: fixed polling every poll_interval seconds
+
+        The run loop blocks until the next event or timer deadline, so it
+        costs nothing while idle. Events that arrive together are coalesced
+        into one evaluation.
+
+        Args:
+            callback: Called with the set of trigger names that fired
+            triggers: Enabled trigger names
+            interval: Kline interval used for the candle-close timer
+            candle_timer: Schedule candle closes from the clock (REST market data)
+            poll_interval: Seconds between evaluations for the interval trigger
+        """
+        self.callback = callback
+        self.triggers = set(triggers)
+        self.candle_seconds = interval_seconds(interval)
+        self.candle_timer = candle_timer
+        self.poll_interval = poll_interval
+        self.events = queue.Queue()
+        self.stop_levels = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self.deadlines = {}
+
+    def _notify(self, trigger, detail=None):
+        if trigger in self.triggers:
+            self.events.put((trigger, detail))
+
+    def on_candle_close(self, symbol, interval, candle):
+        """Kline stream callback for closed candles."""
+        self._notify(TRIGGER_CANDLE_CLOSE, symbol)
+
+    def on_price(self, symbol, price):
+        """Price callback; fires once when a registered stop level is crossed."""
+        levels = self.stop_levels.get(symbol)
+        if levels is None:
+            return
+        lower, upper = levels
+        if price <= lower or price >= upper:
+            with self.lock:
+                # Disarm until the next evaluation registers levels again
+                if self.stop_levels.pop(symbol, None) is None:
+                    return
+            logger.info("%s price %s crossed stop level (%s, %s)", symbol, price, lower, upper)
+            self._notify(TRIGGER_STOP_LEVEL, symbol)
+
+    def on_order_update(self, order_update):
+        """User data callback for executionReport events."""
+        if order_update.get('X') in ('FILLED', 'PARTIALLY_FILLED', 'CANCELED', 'REJECTED', 'EXPIRED'):
+            self._notify(TRIGGER_ORDER_UPDATE, order_update.get('s'))
+
+    def set_stop_levels(self, symbol, lower, upper):
+        """Register prices that trigger an evaluation when crossed."""
+        with self.lock:
+            self.stop_levels[symbol] = (lower, upper)
+
+    def clear_stop_levels(self, symbol):
+        with self.lock:
+            self.stop_levels.pop(symbol, None)
+
+    def request_evaluation(self, reason='manual'):
+        """Force an evaluation regardless of the enabled triggers."""
+        self.events.put((reason, None))
+
+    def _next_candle_close(self, now):
+        boundary = (int(now // self.candle_seconds) + 1) * self.candle_seconds
+        return boundary + CANDLE_CLOSE_DELAY
+
+    def _schedule_timers(self, now):
+        if self.candle_timer and TRIGGER_CANDLE_CLOSE in self.triggers:
+            self.deadlines.setdefault(TRIGGER_CANDLE_CLOSE, self._next_candle_close(now))
+        if TRIGGER_INTERVAL in self.triggers:
+            self.deadlines.setdefault(TRIGGER_INTERVAL, now + self.poll_interval)
+
+    def _due_timers(self, now):
+        fired = {name for name, deadline in self.deadlines.items() if deadline <= now}
+        for name in fired:
+            del self.deadlines[name]
+        return fired
+
+    def _dispatch(self, fired):
+        if fired:
+            try:
+                self.callback(fired)
+            except Exception as e:
+                logger.error("Error in scheduled evaluation: %s", e)
+
+    def next_deadline(self):
+        """Time of the earliest armed timer, or None."""
+        return min(self.deadlines.values()) if self.deadlines else None
+
+    def run_pending(self):
+        """Dispatch queued events and timers due at the current clock time without blocking.
+
+        Used instead of run() when a simulated clock drives the bot; call
+        again at next_deadline() so timers fire on time.
+
+        Returns:
+            Set of triggers dispatched
+        """
+        now = clock.timestamp()
+        self._schedule_timers(now)
+        fired = set()
+        while True:
+            try:
+                trigger, _ = self.events.get_nowait()
+            except queue.Empty:
+                break
+            fired.add(trigger)
+        fired.discard(None)
+        fired |= self._due_timers(now)
+        self._dispatch(fired)
+        # Re-arm the timers that fired so next_deadline() sees them
+        self._schedule_timers(now)
+        return fired
+
+    def run(self):
+        """Block and dispatch evaluations until stop() is called."""
+        self.running = True
+        logger.info("Scheduler started with triggers: %s", ', '.join(sorted(self.triggers)))
+
+        # Evaluate once at start-up
+        self.request_evaluation('startup')
+
+        while self.running:
+            now = clock.timestamp()
+            self._schedule_timers(now)
+            timeout = max(min(self.deadlines.values()) - now, 0) if self.deadlines else None
+
+            fired = set()
+            try:
+                trigger, _ = self.events.get(timeout=timeout)
+                fired.add(trigger)
+                # Coalesce everything that arrived together
+                while True:
+                    trigger, _ = self.events.get_nowait()
+                    fired.add(trigger)
+            except queue.Empty:
+                pass
+
+            fired.discard(None)
+            fired |= self._due_timers(clock.timestamp())
+            if not self.running:
+                break
+            self._dispatch(fired)
+
+        logger.info("Scheduler stopped")
+
+    def stop(self):
+        """Stop the run loop."""
+        self.running = False
+        self.events.put((None, None))
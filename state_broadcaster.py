@@ -0,0 +1,126 @@
+import json
+import queue
+import threading
+import time
+from config import DASHBOARD_STREAM_POLL_INTERVAL, DASHBOARD_STREAM_QUEUE_SIZE
+from logger_setup import get_logger
+
+logger = get_logger('state_broadcaster')
+
+# Top-level snapshot keys sent whole when they change; `symbols` is diffed per field
+REPLACED_KEYS = ('running', 'last_check_time', 'active_orders', 'balances')
+# Snapshot keys not streamed to browsers (metrics are served by /metrics)
+PRIVATE_KEYS = ('metrics',)
+
+
+def diff_state(old, new):
+    """Fields of `new` that differ from `old`, or None when nothing changed."""
+    delta = {}
+    old_symbols = old.get('symbols', {})
+    symbols = {}
+    for symbol, fields in new.get('symbols', {}).items():
+        old_fields = old_symbols.get(symbol, {})
+        changed = {key: value for key, value in fields.items() if old_fields.get(key) != value}
+        if changed:
+            symbols[symbol] = changed
+    if symbols:
+        delta['symbols'] = symbols
+
+    for key in REPLACED_KEYS:
+        if old.get(key) != new.get(key):
+            delta[key] = new.get(key)
+    return delta or None
+
+
+def format_event(event, data):
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class StateBroadcaster:
+    def __init__(self, state_channel, poll_interval=DASHBOARD_STREAM_POLL_INTERVAL,
+                 queue_size=DASHBOARD_STREAM_QUEUE_SIZE):
+        """Fan bot state changes out to streaming dashboard clients.
+
+        One thread watches the state channel and encodes each change once as
+        a `delta` event shared by every subscriber. New subscribers first get
+        a full `snapshot` event. A client whose queue overflows is dropped
+        so it reconnects and resyncs from a fresh snapshot.
+
+        Args:
+            state_channel: StateChannel to read bot snapshots from
+            poll_interval: Seconds between checks of the channel sequence number
+            queue_size: Events buffered per client before it is dropped
+        """
+        self.state_channel = state_channel
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.state = None
+        self.snapshot_event = None
+        self.last_seq = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self):
+        """Register a client; returns its event queue, primed with a snapshot."""
+        client = queue.Queue(self.queue_size)
+        with self.lock:
+            if self.snapshot_event:
+                client.put_nowait(self.snapshot_event)
+            self.subscribers.add(client)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._watch)
+                self.thread.daemon = True
+                self.thread.start()
+        logger.info("Stream client connected (%s total)", len(self.subscribers))
+        return client
+
+    def is_subscribed(self, client):
+        return client in self.subscribers
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.subscribers.discard(client)
+        logger.info("Stream client disconnected (%s total)", len(self.subscribers))
+
+    def _broadcast(self, event):
+        """Queue an event for every client; must be called with the lock held."""
+        for client in list(self.subscribers):
+            try:
+                client.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: end its stream so it reconnects with a snapshot
+                self.subscribers.discard(client)
+                logger.warning("Dropped a stream client that fell behind")
+
+    def _poll(self):
+        """Publish a delta if the bot wrote a new snapshot."""
+        seq = self.state_channel.sequence()
+        if seq == self.last_seq:
+            return
+        state = self.state_channel.read()
+        if state is None:
+            return
+        self.last_seq = seq
+        for key in PRIVATE_KEYS:
+            state.pop(key, None)
+
+        with self.lock:
+            previous = self.state
+            self.state = state
+            self.snapshot_event = format_event('snapshot', state)
+            if previous is None:
+                self._broadcast(self.snapshot_event)
+                return
+            delta = diff_state(previous, state)
+            if delta:
+                self._broadcast(format_event('delta', delta))
+
+    def _watch(self):
+        while True:
+            try:
+                self._poll()
+            except Exception as e:
+                logger.error("Error watching state channel: %s", e)
+            time.sleep(self.poll_interval)
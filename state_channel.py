@@ -0,0 +1,145 @@
+import json
+import struct
+import threading
+import time
+from multiprocessing import shared_memory, resource_tracker
+from config import STATE_CHANNEL_NAME, STATE_CHANNEL_SIZE
+from logger_setup import get_logger
+
+logger = get_logger('state_channel')
+
+# Segment layout: sequence number, payload length, JSON payload
+HEADER = struct.Struct('<QQ')
+READ_ATTEMPTS = 100
+# Readers re-open the segment after this long without a new snapshot, in
+# case the writer restarted and created a fresh one
+REATTACH_AFTER = 30.0
+
+
+class StateChannel:
+    def __init__(self, name=STATE_CHANNEL_NAME, size=STATE_CHANNEL_SIZE, create=False):
+        """Single-writer snapshot channel over a shared memory segment.
+
+        The bot publishes its state as one JSON document; other processes
+        (the dashboard) read the latest copy without any locking. Writes are
+        guarded by a sequence number that is odd while a write is in
+        progress, so readers retry instead of seeing a torn snapshot.
+        Threads within one process are serialized by a lock.
+
+        Args:
+            name: Shared memory segment name
+            size: Segment size in bytes, including the header
+            create: Create the segment (writer) instead of attaching to it (reader)
+        """
+        self.name = name
+        self.size = size
+        self.create = create
+        self.shm = None
+        self.seq = 0
+        self.seen_at = 0.0
+        self.lock = threading.Lock()
+
+    def _attach(self):
+        """Open the segment; readers return False until the writer has created it."""
+        if self.shm is not None:
+            return True
+        if self.create:
+            try:
+                self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=self.size)
+            except FileExistsError:
+                # Left behind by a previous run that did not shut down cleanly
+                self.shm = shared_memory.SharedMemory(name=self.name)
+                if self.shm.size < self.size:
+                    self.shm.close()
+                    self.shm.unlink()
+                    self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=self.size)
+            self.seq = 0
+            HEADER.pack_into(self.shm.buf, 0, 0, 0)
+            logger.info("State channel %s created (%s bytes)", self.name, self.size)
+            return True
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return False
+        # Readers must not unlink the writer's segment when they exit
+        resource_tracker.unregister(self.shm._name, 'shared_memory')
+        self.seen_at = time.monotonic()
+        return True
+
+    def publish(self, state):
+        """Write a new snapshot of `state` (a JSON-serializable dict).
+
+        Returns:
+            True if the snapshot was written
+        """
+        payload = json.dumps(state, default=str).encode('utf-8')
+        if HEADER.size + len(payload) > self.size:
+            logger.error("State snapshot of %s bytes does not fit the channel", len(payload))
+            return False
+        with self.lock:
+            self._attach()
+            buf = self.shm.buf
+            self.seq += 1
+            HEADER.pack_into(buf, 0, self.seq, 0)
+            buf[HEADER.size:HEADER.size + len(payload)] = payload
+            self.seq += 1
+            HEADER.pack_into(buf, 0, self.seq, len(payload))
+        return True
+
+    def read(self):
+        """Return the latest snapshot, or None if nothing has been published yet."""
+        with self.lock:
+            return self._read()
+
+    def _read(self):
+        if not self._attach():
+            return None
+
+        buf = self.shm.buf
+        for _ in range(READ_ATTEMPTS):
+            seq, length = HEADER.unpack_from(buf, 0)
+            if seq == 0:
+                return None
+            if seq % 2 == 0:
+                payload = bytes(buf[HEADER.size:HEADER.size + length])
+                if HEADER.unpack_from(buf, 0)[0] == seq:
+                    self._track(seq)
+                    return json.loads(payload)
+            time.sleep(0.0005)
+
+        logger.warning("Timed out waiting for a consistent state snapshot")
+        return None
+
+    def sequence(self):
+        """Sequence number of the latest snapshot (0 if none), without copying it."""
+        with self.lock:
+            if not self._attach():
+                return 0
+            seq = HEADER.unpack_from(self.shm.buf, 0)[0]
+            seq -= seq % 2
+            self._track(seq)
+            return seq
+
+    def _track(self, seq):
+        """Drop the mapping when the writer seems gone so the next read re-attaches."""
+        now = time.monotonic()
+        if seq != self.seq:
+            self.seq = seq
+            self.seen_at = now
+        elif now - self.seen_at > REATTACH_AFTER:
+            self.shm.close()
+            self.shm = None
+
+    def close(self):
+        """Detach from the segment; the writer also removes it."""
+        with self.lock:
+            if self.shm is None:
+                return
+            self.shm.close()
+            if self.create:
+                try:
+                    self.shm.unlink()
+                except FileNotFoundError:
+                    pass
+            self.shm = None
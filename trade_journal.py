@@ -0,0 +1,148 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from config import TRADE_JOURNAL_FILE, JOURNAL_BATCH_SIZE, JOURNAL_FLUSH_INTERVAL
+from logger_setup import get_logger
+
+logger = get_logger('trade_journal')
+
+# Order statuses after which an order is no longer active; RECONCILED marks
+# orders that were no longer open on the exchange at start-up
+TERMINAL_STATUSES = ('FILLED', 'CANCELED', 'REJECTED', 'EXPIRED', 'RECONCILED')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    symbol TEXT,
+    order_id INTEGER,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_kind_symbol ON events (kind, symbol);
+CREATE INDEX IF NOT EXISTS events_order_id ON events (order_id);
+"""
+
+
+class TradeJournal:
+    def __init__(self, path=TRADE_JOURNAL_FILE, batch_size=JOURNAL_BATCH_SIZE,
+                 flush_interval=JOURNAL_FLUSH_INTERVAL):
+        """Append-only journal of orders, order updates and position changes.
+
+        Events are queued by the caller and written by a background thread
+        in batched transactions on a SQLite database in WAL mode, so the
+        order path never waits on disk.
+
+        Args:
+            path: SQLite database file
+            batch_size: Maximum events written per transaction
+            flush_interval: Seconds the writer waits to fill a batch
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.events = queue.Queue()
+        self.writer = None
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def start(self):
+        """Start the background writer."""
+        if self.writer and self.writer.is_alive():
+            return
+        self.writer = threading.Thread(target=self._write_loop)
+        self.writer.daemon = True
+        self.writer.start()
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = [self.events.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size and batch[-1] is not None:
+                    try:
+                        batch.append(self.events.get(timeout=max(deadline - time.monotonic(), 0)))
+                    except queue.Empty:
+                        break
+
+                rows = [row for row in batch if row is not None]
+                if rows:
+                    try:
+                        with conn:
+                            conn.executemany(
+                                'INSERT INTO events (ts, kind, symbol, order_id, status, data) '
+                                'VALUES (?, ?, ?, ?, ?, ?)',
+                                rows
+                            )
+                    except sqlite3.Error as e:
+                        logger.error("Failed to write %s journal events: %s", len(rows), e)
+                if batch[-1] is None:
+                    break
+        finally:
+            conn.close()
+
+    def _record(self, kind, symbol, data, order_id=None, status=None):
+        self.events.put_nowait((time.time(), kind, symbol, order_id, status, json.dumps(data, default=str)))
+
+    def record_order(self, order_id, order_info):
+        """Journal a newly placed order."""
+        self._record('order', order_info['symbol'], order_info, order_id, 'NEW')
+
+    def record_order_update(self, symbol, order_id, status, data=None):
+        """Journal a status change or fill of an order."""
+        self._record('order_update', symbol, data or {}, order_id, status)
+
+    def record_position(self, symbol, position_info):
+        """Journal the position of a symbol after it changed."""
+        self._record('position', symbol, position_info)
+
+    def load_state(self):
+        """Rebuild the latest positions and the orders not known to be finished.
+
+        Returns:
+            {'positions': {symbol: position info}, 'active_orders': {order_id: order info}}
+        """
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            positions = {
+                symbol: json.loads(data)
+                for symbol, data in conn.execute(
+                    "SELECT symbol, data FROM events WHERE id IN "
+                    "(SELECT MAX(id) FROM events WHERE kind = 'position' GROUP BY symbol)"
+                )
+            }
+            placeholders = ', '.join('?' * len(TERMINAL_STATUSES))
+            active_orders = {
+                order_id: json.loads(data)
+                for order_id, data in conn.execute(
+                    "SELECT order_id, data FROM events WHERE kind = 'order' AND order_id NOT IN "
+                    f"(SELECT order_id FROM events WHERE kind = 'order_update' AND status IN ({placeholders}))",
+                    TERMINAL_STATUSES
+                )
+            }
+        finally:
+            conn.close()
+        logger.info("Journal state loaded in %.1fms: %s positions, %s active orders",
+                    (time.perf_counter() - started) * 1000, len(positions), len(active_orders))
+        return {'positions': positions, 'active_orders': active_orders}
+
+    def close(self):
+        """Write all queued events and stop the writer."""
+        if self.writer and self.writer.is_alive():
+            self.events.put(None)
+            self.writer.join(timeout=10)
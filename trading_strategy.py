@@ -1,11 +1,17 @@
+import time
 import numpy as np
-from datetime import datetime
+import clock
+from datetime import date
 from enum import Enum
 from config import (
     TRADING_PAIR, RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD,
-    MOVING_AVERAGE_PERIOD, STOP_LOSS_PERCENTAGE, TAKE_PROFIT_PERCENTAGE
+    MOVING_AVERAGE_PERIOD, STOP_LOSS_PERCENTAGE, TAKE_PROFIT_PERCENTAGE,
+    MAX_TRADES_PER_DAY, KLINE_INTERVAL
 )
 from logger_setup import get_logger
+from metrics import metrics
+from kline_store import KlineStore, OPEN_TIME, CLOSE
+from indicators import RSI, SMA
 
 logger = get_logger('trading_strategy')
 
@@ -14,44 +20,47 @@ class Signal(Enum):
     SELL = "SELL"
     HOLD = "HOLD"
 
+def is_entry_signal(rsi, price, ma, oversold=RSI_OVERSOLD):
+    """Oversold RSI with price above its moving average (scalars or arrays)."""
+    return (rsi <= oversold) & (price > ma)
+
+def is_exit_signal(rsi, price, ma, overbought=RSI_OVERBOUGHT):
+    """Overbought RSI with price below its moving average (scalars or arrays)."""
+    return (rsi >= overbought) & (price < ma)
+
+def loss_percentage(entry_price, price):
+    """Loss relative to the entry price, in percent."""
+    return ((entry_price - price) / entry_price) * 100
+
+def profit_percentage(entry_price, price):
+    """Profit relative to the entry price, in percent."""
+    return ((price - entry_price) / entry_price) * 100
+
 class TradingStrategy:
-    def __init__(self, binance_client):
+    def __init__(self, binance_client, kline_store=None, symbol=None):
         self.binance_client = binance_client
-        self.trading_pair = TRADING_PAIR
+        self.kline_store = kline_store or KlineStore(binance_client)
+        self.trading_pair = symbol or TRADING_PAIR
+        self.interval = KLINE_INTERVAL
         self.position = None
         self.entry_price = None
         self.last_signal = None
         self.trades_today = 0
         self.last_trade_date = None
 
+        # Streaming indicators fed with closed candles only
+        self.rsi = RSI(RSI_PERIOD)
+        self.ma = SMA(MOVING_AVERAGE_PERIOD)
+        self.last_fed_open_time = None
+
     def calculate_rsi(self, prices, period=RSI_PERIOD):
-        """Calculate Relative Strength Index."""
+        """Calculate Relative Strength Index with Wilder smoothing."""
         try:
             if len(prices) < period + 1:
                 return None
-
-            # Calculate price changes
-            deltas = np.diff(prices)
-            
-            # Calculate gains (positive changes) and losses (negative changes)
-            gains = np.where(deltas > 0, deltas, 0)
-            losses = np.where(deltas < 0, -deltas, 0)
-            
-            # Calculate average gains and losses
-            avg_gain = np.mean(gains[:period])
-            avg_loss = np.mean(losses[:period])
-            
-            if avg_loss == 0:
-                return 100
-            
-            # Calculate RS and RSI
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-            
-            return rsi
-            
+            return RSI(period).seed(prices)
         except Exception as e:
-            logger.error(f"Error calculating RSI: {e}")
+            logger.error("Error calculating RSI: %s", e)
             return None
 
     def calculate_moving_average(self, prices, period=MOVING_AVERAGE_PERIOD):
@@ -61,12 +70,33 @@ class TradingStrategy:
                 return None
             return np.mean(prices[-period:])
         except Exception as e:
-            logger.error(f"Error calculating MA: {e}")
+            logger.error("Error calculating MA: %s", e)
             return None
 
+    def update_indicators(self, candles):
+        """Feed newly closed candles into the streaming indicators.
+
+        The newest candle is treated as still open and is never fed. If the
+        stored history no longer overlaps what was fed (first call or a gap),
+        the indicators are re-seeded from the full history.
+        """
+        closed = candles[:-1]
+        if len(closed) == 0:
+            return
+
+        if self.last_fed_open_time is None or closed[0, OPEN_TIME] > self.last_fed_open_time:
+            self.rsi.seed(closed[:, CLOSE])
+            self.ma.seed(closed[:, CLOSE])
+        else:
+            for price in closed[closed[:, OPEN_TIME] > self.last_fed_open_time, CLOSE]:
+                self.rsi.update(price)
+                self.ma.update(price)
+
+        self.last_fed_open_time = closed[-1, OPEN_TIME]
+
     def should_reset_trade_count(self):
         """Check if trades count should be reset (new day)."""
-        current_date = datetime.now().date()
+        current_date = clock.now().date()
         if self.last_trade_date != current_date:
             self.trades_today = 0
             self.last_trade_date = current_date
@@ -76,86 +106,108 @@ class TradingStrategy:
     def check_stop_loss(self, current_price):
         """Check if stop loss has been triggered."""
         if self.position and self.entry_price:
-            loss_percentage = ((self.entry_price - current_price) / self.entry_price) * 100
-            if loss_percentage >= STOP_LOSS_PERCENTAGE:
-                logger.info(f"Stop loss triggered at {loss_percentage:.2f}%")
+            loss = loss_percentage(self.entry_price, current_price)
+            if loss >= STOP_LOSS_PERCENTAGE:
+                logger.info("Stop loss triggered at %.2f%%", loss)
                 return True
         return False
 
     def check_take_profit(self, current_price):
         """Check if take profit has been triggered."""
         if self.position and self.entry_price:
-            profit_percentage = ((current_price - self.entry_price) / self.entry_price) * 100
-            if profit_percentage >= TAKE_PROFIT_PERCENTAGE:
-                logger.info(f"Take profit triggered at {profit_percentage:.2f}%")
+            profit = profit_percentage(self.entry_price, current_price)
+            if profit >= TAKE_PROFIT_PERCENTAGE:
+                logger.info("Take profit triggered at %.2f%%", profit)
                 return True
         return False
 
+    def stop_levels(self):
+        """(stop loss, take profit) prices of the open position, or None."""
+        if not (self.position and self.entry_price):
+            return None
+        return (
+            self.entry_price * (1 - STOP_LOSS_PERCENTAGE / 100),
+            self.entry_price * (1 + TAKE_PROFIT_PERCENTAGE / 100)
+        )
+
     def generate_signal(self):
         """Generate trading signal based on technical indicators."""
+        started = time.perf_counter()
         try:
             # Reset daily trade count if needed
             self.should_reset_trade_count()
 
-            # Get historical klines data
-            klines = self.binance_client.get_klines(
-                self.trading_pair,
-                interval='1h',
-                limit=100
-            )
+            # Fetch only candles newer than the local history
+            self.kline_store.update(self.trading_pair, self.interval)
+            candles = self.kline_store.get_candles(self.trading_pair, self.interval)
             
-            if not klines:
+            if len(candles) == 0:
                 logger.warning("No klines data available")
                 return Signal.HOLD
 
-            # Extract closing prices
-            prices = np.array([float(k[4]) for k in klines])
-            current_price = prices[-1]
-
-            # Calculate indicators
-            rsi = self.calculate_rsi(prices)
-            ma = self.calculate_moving_average(prices)
-
-            if rsi is None or ma is None:
-                logger.warning("Unable to calculate indicators")
-                return Signal.HOLD
+            current_price = candles[-1, CLOSE]
 
-            logger.info(f"Current RSI: {rsi:.2f}, MA: {ma:.2f}, Price: {current_price:.2f}")
+            # Update indicators with closed candles, then evaluate the open one
+            self.update_indicators(candles)
+            rsi = self.rsi.peek(current_price)
+            ma = self.ma.peek(current_price)
 
-            # Check stop loss and take profit if in position
-            if self.position:
-                if self.check_stop_loss(current_price) or self.check_take_profit(current_price):
-                    self.last_signal = Signal.SELL
-                    return Signal.SELL
-
-            # Generate signals based on RSI and MA
-            if rsi <= RSI_OVERSOLD and current_price > ma:
-                if not self.position and self.trades_today < MAX_TRADES_PER_DAY:
-                    self.last_signal = Signal.BUY
-                    return Signal.BUY
-                    
-            elif rsi >= RSI_OVERBOUGHT and current_price < ma:
-                if self.position:
-                    self.last_signal = Signal.SELL
-                    return Signal.SELL
+            return self.evaluate(current_price, rsi, ma)
 
+        except Exception as e:
+            logger.error("Error generating trading signal: %s", e)
             return Signal.HOLD
+        finally:
+            metrics.observe('signal_generation_seconds', time.perf_counter() - started, component='strategy')
 
-        except Exception as e:
-            logger.error(f"Error generating trading signal: {e}")
+    def evaluate(self, current_price, rsi, ma):
+        """Apply the entry/exit rules to the latest price and indicator values."""
+        if rsi is None or ma is None or np.isnan(rsi) or np.isnan(ma):
+            logger.warning("Unable to calculate indicators for %s", self.trading_pair)
             return Signal.HOLD
 
+        logger.info("%s RSI: %.2f, MA: %.2f, Price: %.2f", self.trading_pair, rsi, ma, current_price)
+
+        # Check stop loss and take profit if in position
+        if self.position:
+            if self.check_stop_loss(current_price) or self.check_take_profit(current_price):
+                self.last_signal = Signal.SELL
+                return Signal.SELL
+
+        # Generate signals based on RSI and MA
+        if is_entry_signal(rsi, current_price, ma):
+            if not self.position and self.trades_today < MAX_TRADES_PER_DAY:
+                self.last_signal = Signal.BUY
+                return Signal.BUY
+
+        elif is_exit_signal(rsi, current_price, ma):
+            if self.position:
+                self.last_signal = Signal.SELL
+                return Signal.SELL
+
+        return Signal.HOLD
+
     def update_position(self, side, price=None):
         """Update the current position after order execution."""
         if side == Signal.BUY:
             self.position = True
             self.entry_price = price
             self.trades_today += 1
-            self.last_trade_date = datetime.now().date()
+            self.last_trade_date = clock.now().date()
         elif side == Signal.SELL:
             self.position = False
             self.entry_price = None
 
+    def restore_position(self, position_info):
+        """Restore the position saved by get_position_info() (e.g. from the trade journal)."""
+        self.position = position_info.get('in_position', False)
+        self.entry_price = position_info.get('entry_price')
+        self.trades_today = position_info.get('trades_today', 0)
+        last_trade_date = position_info.get('last_trade_date')
+        self.last_trade_date = date.fromisoformat(last_trade_date) if last_trade_date else None
+        last_signal = position_info.get('last_signal')
+        self.last_signal = Signal(last_signal) if last_signal else None
+
     def get_position_info(self):
         """Get current position information."""
         return {
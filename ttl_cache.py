@@ -0,0 +1,87 @@
+import threading
+import time
+
+
+class _Flight:
+    def __init__(self):
+        """A load in progress that other callers for the same key wait on."""
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, default_ttl=1.0):
+        """Thread-safe TTL cache with single-flight loading.
+
+        Concurrent misses for the same key share one call to the loader;
+        the other callers wait for its result. Loader errors are passed to
+        every waiting caller and are not cached.
+
+        Args:
+            default_ttl: Seconds an entry stays fresh when get() gets no ttl
+        """
+        self.default_ttl = default_ttl
+        self.entries = {}  # key -> (expires_at, value)
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, loader, ttl=None):
+        """Return the cached value for `key`, calling loader() when it is missing or expired."""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+            flight = self.flights.get(key)
+            if flight:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                flight = self.flights[key] = _Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            with self.lock:
+                self.entries[key] = (time.monotonic() + ttl, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or all entries when key is None."""
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+    def get_stats(self):
+        """Hit/miss counters; coalesced counts callers that waited on another caller's load."""
+        with self.lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_ratio': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                'entries': len(self.entries)
+            }
@@ -1,22 +1,51 @@
 import json
+import queue
 import threading
 import time
 import websocket
-from config import WS_BASE_URL
+import json_codec
+from config import WS_BASE_URL, USER_STREAM_QUEUE_SIZE
 from logger_setup import get_logger
+from metrics import metrics
 
 logger = get_logger('user_data_stream')
 
 class UserDataStream:
-    def __init__(self, binance_client, message_handler=None):
+    def __init__(self, binance_client, message_handler=None, handlers=None,
+                 decoder=json_codec.decode, queue_size=USER_STREAM_QUEUE_SIZE, recorder=None,
+                 on_connect=None):
         """Initialize the user data stream.
+
+        The socket thread only enqueues raw frames; a worker thread decodes
+        them and dispatches each event to the handler registered for its
+        type, so bursts of fills never stall the socket read loop.
         
         Args:
             binance_client: Instance of BinanceClient
-            message_handler: Callback function for handling incoming messages
+            message_handler: Callback for events without a handler in `handlers`;
+                when omitted, account, order and balance events are logged
+            handlers: {event type: callback(event)} dispatch table
+            decoder: Function parsing a raw frame into a dict
+            queue_size: Frames buffered between the socket and worker threads
+            recorder: Optional MarketDataRecorder capturing raw frames
+            on_connect: Called on the socket thread after every (re)connect,
+                e.g. to resync state from REST after events may have been missed
         """
         self.binance_client = binance_client
         self.message_handler = message_handler
+        self.handlers = {}
+        if message_handler is None:
+            self.handlers.update({
+                'outboundAccountPosition': self._handle_account_update,
+                'executionReport': self._handle_order_update,
+                'balanceUpdate': self._handle_balance_update
+            })
+        self.handlers.update(handlers or {})
+        self.decoder = decoder
+        self.recorder = recorder
+        self.on_connect = on_connect
+        self.events = queue.Queue(queue_size)
+        self.worker = None
         self.ws = None
         self.listen_key = None
         self.ws_url = WS_BASE_URL
@@ -24,38 +53,70 @@ class UserDataStream:
         self.reconnect_delay = 1  # Initial reconnect delay in seconds
         self.max_reconnect_delay = 300  # Maximum reconnect delay (5 minutes)
         self.keepalive_timer = None
+        self.message_count = metrics.counter('ws_messages_total', stream='user_data')
+        self.handler_time = metrics.histogram('ws_handler_seconds', stream='user_data')
+        self.queue_wait = metrics.histogram('ws_queue_wait_seconds', stream='user_data')
 
     def _on_message(self, ws, message):
-        """Handle incoming WebSocket messages."""
+        """Hand a raw frame to the worker thread."""
+        self.message_count.inc()
+        if self.recorder:
+            self.recorder.record_frame('user_data', message)
+        item = (time.perf_counter(), message)
         try:
-            data = json.loads(message)
-            logger.debug(f"Received message: {message}")
-            
-            if self.message_handler:
-                self.message_handler(data)
-            
-            # Process different event types
-            if 'e' in data:
-                event_type = data['e']
-                if event_type == 'outboundAccountPosition':
-                    self._handle_account_update(data)
-                elif event_type == 'executionReport':
-                    self._handle_order_update(data)
-                elif event_type == 'balanceUpdate':
-                    self._handle_balance_update(data)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse message: {e}")
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
+            self.events.put_nowait(item)
+        except queue.Full:
+            # Account events must not be dropped; apply backpressure instead
+            logger.warning("User data queue full (%s frames), waiting for the worker", self.events.maxsize)
+            self.events.put(item)
+
+    def register_handler(self, event_type, handler):
+        """Route events of `event_type` to handler(event)."""
+        self.handlers[event_type] = handler
+
+    def dispatch(self, data):
+        """Call the handler registered for the event type of a decoded message."""
+        handler = self.handlers.get(data.get('e'))
+        if handler:
+            handler(data)
+        elif self.message_handler:
+            self.message_handler(data)
+
+    def _process_events(self):
+        """Worker loop: decode and dispatch queued frames until a None sentinel."""
+        while True:
+            item = self.events.get()
+            if item is None:
+                break
+            received, message = item
+            started = time.perf_counter()
+            self.queue_wait.observe(started - received)
+            try:
+                data = self.decoder(message)
+                logger.debug("Received message: %s", message)
+                self.dispatch(data)
+            except json.JSONDecodeError as e:
+                logger.error("Failed to parse message: %s", e)
+            except Exception as e:
+                logger.error("Error processing message: %s", e)
+            finally:
+                self.handler_time.observe(time.perf_counter() - started)
+
+    def _start_worker(self):
+        if self.worker and self.worker.is_alive():
+            return
+        self.worker = threading.Thread(target=self._process_events)
+        self.worker.daemon = True
+        self.worker.start()
 
     def _on_error(self, ws, error):
         """Handle WebSocket errors."""
-        logger.error(f"WebSocket error: {error}")
+        logger.error("WebSocket error: %s", error)
         self._schedule_reconnect()
 
     def _on_close(self, ws, close_status_code, close_msg):
         """Handle WebSocket connection close."""
-        logger.warning(f"WebSocket connection closed: {close_status_code} - {close_msg}")
+        logger.warning("WebSocket connection closed: %s - %s", close_status_code, close_msg)
         self._schedule_reconnect()
 
     def _on_open(self, ws):
@@ -63,11 +124,13 @@ class UserDataStream:
         logger.info("WebSocket connection established")
         self.reconnect_delay = 1  # Reset reconnect delay on successful connection
         self._start_keepalive_timer()
+        if self.on_connect:
+            self.on_connect()
 
     def _schedule_reconnect(self):
         """Schedule a reconnection attempt with exponential backoff."""
         if self.running:
-            logger.info(f"Attempting to reconnect in {self.reconnect_delay} seconds...")
+            logger.info("Attempting to reconnect in %s seconds...", self.reconnect_delay)
             time.sleep(self.reconnect_delay)
             self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
             self.connect()
@@ -86,7 +149,7 @@ class UserDataStream:
                             self._schedule_reconnect()
                     time.sleep(30 * 60)  # Send keepalive every 30 minutes
                 except Exception as e:
-                    logger.error(f"Keepalive error: {e}")
+                    logger.error("Keepalive error: %s", e)
                     self._schedule_reconnect()
                     break
 
@@ -96,17 +159,17 @@ class UserDataStream:
 
     def _handle_account_update(self, data):
         """Handle account position updates."""
-        logger.info(f"Account update received: {data['B']}")
+        logger.info("Account update received: %s", data['B'])
         # Implement specific account update handling logic here
 
     def _handle_order_update(self, data):
         """Handle order execution updates."""
-        logger.info(f"Order update received: {data['s']} - {data['X']}")
+        logger.info("Order update received: %s - %s", data['s'], data['X'])
         # Implement specific order update handling logic here
 
     def _handle_balance_update(self, data):
         """Handle balance updates."""
-        logger.info(f"Balance update received: {data['a']} - {data['d']}")
+        logger.info("Balance update received: %s - %s", data['a'], data['d'])
         # Implement specific balance update handling logic here
 
     def connect(self):
@@ -117,7 +180,7 @@ class UserDataStream:
             
             ws_url = f"{self.ws_url}/{self.listen_key}"
             
-            websocket.enableTrace(True)
+            self._start_worker()
             self.ws = websocket.WebSocketApp(
                 ws_url,
                 on_message=self._on_message,
@@ -136,7 +199,7 @@ class UserDataStream:
             logger.info("WebSocket connection started")
             
         except Exception as e:
-            logger.error(f"Failed to establish WebSocket connection: {e}")
+            logger.error("Failed to establish WebSocket connection: %s", e)
             self._schedule_reconnect()
 
     def disconnect(self):
@@ -146,6 +209,10 @@ class UserDataStream:
             self.ws.close()
         if self.keepalive_timer:
             self.keepalive_timer.join(timeout=1)
+        if self.worker:
+            # Let the worker finish the events already received
+            self.events.put(None)
+            self.worker.join(timeout=5)
         logger.info("WebSocket connection closed")
 
     def is_connected(self):
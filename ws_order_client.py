@@ -0,0 +1,282 @@
+import hmac
+import hashlib
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from urllib.parse import urlencode
+import websocket
+import json_codec
+from config import WS_API_URL, ORDER_REQUEST_TIMEOUT
+from logger_setup import get_logger
+from metrics import metrics
+from clock_sync import is_timestamp_error
+from rate_limiter import request_weight, request_priority, is_new_order
+
+logger = get_logger('ws_order_client')
+
+# WebSocket API method -> equivalent REST call, for rate limit accounting
+REST_EQUIVALENTS = {
+    'order.place': ('POST', '/v3/order'),
+    'order.cancel': ('DELETE', '/v3/order'),
+    'order.status': ('GET', '/v3/order'),
+    'openOrders.status': ('GET', '/v3/openOrders'),
+}
+
+
+class WebSocketAPIError(Exception):
+    def __init__(self, status, error):
+        super().__init__(f"{status} {error.get('code')}: {error.get('msg')}")
+        self.status = status
+        self.code = error.get('code')
+        self.error = error
+
+
+class WebSocketOrderClient:
+    def __init__(self, binance_client, url=WS_API_URL, timeout=ORDER_REQUEST_TIMEOUT):
+        """Place, cancel and query orders over a persistent WebSocket API connection.
+
+        Exposes the order methods of BinanceClient, so OrderManager can use
+        either. Requests carry an ID and callers block on a future that
+        the socket thread resolves when the response with that ID
+        arrives, so any number of requests can be in flight. Each request
+        is signed with the REST client's credentials and server clock and
+        counted against its rate limiter. While the connection is down,
+        calls fall back to REST.
+
+        Args:
+            binance_client: BinanceClient providing credentials, limits and the REST fallback
+            url: WebSocket API endpoint
+            timeout: Seconds to wait for a response
+        """
+        self.binance_client = binance_client
+        self.rate_limiter = binance_client.rate_limiter
+        self.server_clock = binance_client.server_clock
+        self.url = url
+        self.timeout = timeout
+        self.ws = None
+        self.running = False
+        self.connected = threading.Event()
+        self.pending = {}  # request ID -> Future
+        self.lock = threading.Lock()
+        self.request_ids = itertools.count(1)
+        self.reconnect_delay = 1
+        self.max_reconnect_delay = 300
+
+    def _sign(self, params):
+        """Copy of params with apiKey, timestamp and recvWindow, signed over the sorted fields."""
+        signed = dict(params, apiKey=self.binance_client.api_key,
+                      timestamp=self.server_clock.timestamp(), recvWindow=self.server_clock.recv_window)
+        signed['signature'] = hmac.new(
+            self.binance_client.api_secret.encode('utf-8'),
+            urlencode(sorted(signed.items())).encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+        return signed
+
+    def _on_message(self, ws, message):
+        """Resolve the pending request a response belongs to."""
+        try:
+            response = json_codec.decode(message)
+            limits = response.get('rateLimits')
+            if limits:
+                self.rate_limiter.update_from_headers(self._usage_headers(limits))
+            with self.lock:
+                future = self.pending.pop(response.get('id'), None)
+            if future:
+                future.set_result(response)
+            else:
+                logger.debug("Response to unknown or timed out request: %s", message)
+        except Exception as e:
+            logger.error("Error processing WebSocket API message: %s", e)
+
+    @staticmethod
+    def _usage_headers(limits):
+        """Map rateLimits of a response to the usage headers RateLimiter reads."""
+        headers = {}
+        for limit in limits:
+            if 'count' not in limit:
+                continue
+            if limit['rateLimitType'] == 'REQUEST_WEIGHT' and limit['interval'] == 'MINUTE' \
+                    and limit['intervalNum'] == 1:
+                headers['X-MBX-USED-WEIGHT-1M'] = limit['count']
+            elif limit['rateLimitType'] == 'ORDERS' and limit['interval'] == 'SECOND' \
+                    and limit['intervalNum'] == 10:
+                headers['X-MBX-ORDER-COUNT-10S'] = limit['count']
+        return headers
+
+    def _fail_pending(self, reason):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError(reason))
+
+    def _on_error(self, ws, error):
+        """Handle WebSocket errors; the following close reconnects."""
+        logger.error("WebSocket API error: %s", error)
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        """Fail in-flight requests and reconnect."""
+        logger.warning("WebSocket API connection closed: %s - %s", close_status_code, close_msg)
+        self.connected.clear()
+        self._fail_pending("WebSocket API connection closed")
+        self._schedule_reconnect()
+
+    def _on_open(self, ws):
+        """Handle WebSocket connection open."""
+        logger.info("WebSocket API connection established")
+        self.reconnect_delay = 1
+        self.connected.set()
+
+    def _schedule_reconnect(self):
+        """Schedule a reconnection attempt with exponential backoff."""
+        if self.running:
+            logger.info("Reconnecting WebSocket API in %s seconds...", self.reconnect_delay)
+            time.sleep(self.reconnect_delay)
+            self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
+            self.connect()
+
+    def connect(self):
+        """Open the connection and wait up to the request timeout for it to be ready."""
+        try:
+            self.ws = websocket.WebSocketApp(
+                self.url,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+                on_open=self._on_open
+            )
+
+            self.running = True
+
+            ws_thread = threading.Thread(target=self.ws.run_forever)
+            ws_thread.daemon = True
+            ws_thread.start()
+
+            if not self.connected.wait(self.timeout):
+                logger.warning("WebSocket API not connected yet, orders use REST until it is")
+
+        except Exception as e:
+            logger.error("Failed to start WebSocket API connection: %s", e)
+            self._schedule_reconnect()
+
+    def disconnect(self):
+        """Close WebSocket connection."""
+        self.running = False
+        self.connected.clear()
+        if self.ws:
+            self.ws.close()
+        self._fail_pending("WebSocket API client disconnected")
+        logger.info("WebSocket API connection closed")
+
+    def _request(self, method, params, resync=True):
+        """Send a signed request and block until its response; returns the result."""
+        http_method, endpoint = REST_EQUIVALENTS[method]
+        self.rate_limiter.acquire(
+            request_weight(http_method, endpoint, params),
+            request_priority(endpoint),
+            1 if is_new_order(http_method, endpoint) else 0
+        )
+
+        request_id = next(self.request_ids)
+        future = Future()
+        with self.lock:
+            self.pending[request_id] = future
+        started = time.perf_counter()
+        try:
+            self.ws.send(json.dumps({'id': request_id, 'method': method, 'params': self._sign(params)}))
+            response = future.result(self.timeout)
+        except FutureTimeoutError:
+            metrics.inc('ws_api_errors_total', method=method, status='timeout')
+            raise TimeoutError(f"No response to {method} within {self.timeout}s")
+        finally:
+            with self.lock:
+                self.pending.pop(request_id, None)
+        metrics.observe('ws_api_request_seconds', time.perf_counter() - started, method=method)
+
+        status = response.get('status')
+        if status == 200:
+            return response['result']
+        error = response.get('error') or {}
+        metrics.inc('ws_api_errors_total', method=method, status=status)
+        if resync and is_timestamp_error(error):
+            # Clock drift: resync and resend at once with a fresh timestamp
+            logger.warning("Request timestamp rejected, resyncing server time: %s", error.get('msg'))
+            self.server_clock.sync('rejected')
+            return self._request(method, params, resync=False)
+        raise WebSocketAPIError(status, error)
+
+    def _call(self, method, params, fallback):
+        """Send over the WebSocket API, or over REST while it is disconnected."""
+        if not self.connected.is_set():
+            metrics.inc('ws_api_fallbacks_total', method=method)
+            logger.warning("WebSocket API not connected, sending %s over REST", method)
+            return fallback()
+        return self._request(method, params)
+
+    def create_order(self, symbol, side, order_type, quantity=None, price=None, time_in_force=None,
+                     client_order_id=None):
+        """Create a new order."""
+        try:
+            params = {
+                'symbol': symbol,
+                'side': side,
+                'type': order_type,
+            }
+
+            if quantity:
+                params['quantity'] = quantity
+            if price and order_type != 'MARKET':
+                params['price'] = price
+            if time_in_force:
+                params['timeInForce'] = time_in_force
+            if client_order_id:
+                params['newClientOrderId'] = client_order_id
+
+            response = self._call('order.place', params, lambda: self.binance_client.create_order(
+                symbol, side, order_type, quantity, price, time_in_force, client_order_id
+            ))
+            logger.info("Successfully created %s %s order for %s", order_type, side, symbol)
+            return response
+        except Exception as e:
+            logger.error("Failed to create order: %s", e)
+            raise
+
+    def get_order_status(self, symbol, order_id):
+        """Get status of an order."""
+        try:
+            params = {
+                'symbol': symbol,
+                'orderId': order_id
+            }
+            return self._call('order.status', params,
+                              lambda: self.binance_client.get_order_status(symbol, order_id))
+        except Exception as e:
+            logger.error("Failed to get order status: %s", e)
+            raise
+
+    def cancel_order(self, symbol, order_id):
+        """Cancel an existing order."""
+        try:
+            params = {
+                'symbol': symbol,
+                'orderId': order_id
+            }
+            response = self._call('order.cancel', params,
+                                  lambda: self.binance_client.cancel_order(symbol, order_id))
+            logger.info("Successfully cancelled order %s for %s", order_id, symbol)
+            return response
+        except Exception as e:
+            logger.error("Failed to cancel order: %s", e)
+            raise
+
+    def get_open_orders(self, symbol=None):
+        """Get open orders of one symbol, or of all symbols in a single request."""
+        try:
+            params = {'symbol': symbol} if symbol else {}
+            return self._call('openOrders.status', params,
+                              lambda: self.binance_client.get_open_orders(symbol))
+        except Exception as e:
+            logger.error("Failed to get open orders: %s", e)
+            raise